@@ -13,4 +13,40 @@ PINECONE_REGION=getenv("PINECONE_REGION")
 PINECONE_HOST=getenv("PINECONE_HOST")
 WHATSAPP_TOKEN=getenv("WA_ACCESS_TOKEN")
 PHONE_NUMBER_ID=getenv("WA_PHONE_NUMBER_ID")
-GUARDRAILS_API_KEY=getenv("GUARDRAILS_API_KEY")
\ No newline at end of file
+GUARDRAILS_API_KEY=getenv("GUARDRAILS_API_KEY")
+ANALYST_CONTEXT_TOKEN_BUDGET=int(getenv("ANALYST_CONTEXT_TOKEN_BUDGET", "2000"))
+QUERY_ROUTER_EMBEDDINGS=getenv("QUERY_ROUTER_EMBEDDINGS", "false").lower() == "true"
+REQUEST_DEADLINE_SECONDS=float(getenv("REQUEST_DEADLINE_SECONDS", "20"))
+RERANK_MIN_REMAINING_SECONDS=float(getenv("RERANK_MIN_REMAINING_SECONDS", "8"))
+RETRY_MIN_REMAINING_SECONDS=float(getenv("RETRY_MIN_REMAINING_SECONDS", "6"))
+FULL_CONTEXT_MIN_REMAINING_SECONDS=float(getenv("FULL_CONTEXT_MIN_REMAINING_SECONDS", "5"))
+DEFAULT_CLIENT_ID=getenv("DEFAULT_CLIENT_ID", "")
+SENDER_CLIENT_IDS=getenv("SENDER_CLIENT_IDS", "")
+MIREMS_API_URL=getenv("MIREMS_API_URL", "https://mirems-ai-stage.scrobits.com/api/v1")
+MIREMS_API_TOKEN=getenv("MIREMS_API_TOKEN")
+MIREMS_CLIENT_ID=getenv("MIREMS_CLIENT_ID")
+MIREMS_PROMPT_ID=getenv("MIREMS_PROMPT_ID", "4")
+MIREMS_MODEL_TYPE=getenv("MIREMS_MODEL_TYPE", "gemini")
+MIREMS_CURSOR_PATH=getenv("MIREMS_CURSOR_PATH", ".mirems_cursor.json")
+MIREMS_FETCH_CONCURRENCY=int(getenv("MIREMS_FETCH_CONCURRENCY", "8"))
+MIREMS_MAX_RETRIES=int(getenv("MIREMS_MAX_RETRIES", "4"))
+EMBEDDING_BACKEND=getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_MODEL_DIR=getenv("EMBEDDING_MODEL_DIR", ".embedding_models/all-MiniLM-L6-v2")
+EMBEDDING_MIN_COSINE=float(getenv("EMBEDDING_MIN_COSINE", "0.99"))
+EMBEDDING_THREADS=int(getenv("EMBEDDING_THREADS", "0"))
+UPLOAD_CHUNK_WORKERS=int(getenv("UPLOAD_CHUNK_WORKERS", "4"))
+SESSION_MAX_SENDERS=int(getenv("SESSION_MAX_SENDERS", "1000"))
+SESSION_MAX_TURNS=int(getenv("SESSION_MAX_TURNS", "3"))
+SESSION_TTL_SECONDS=float(getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_FOLLOW_UP_SECONDS=float(getenv("SESSION_FOLLOW_UP_SECONDS", "600"))
+SESSION_REUSE_MIN_SCORE=float(getenv("SESSION_REUSE_MIN_SCORE", "0.55"))
+SESSION_DB_PATH=getenv("SESSION_DB_PATH", "")
+LLM_GOVERNOR_CONCURRENCY=int(getenv("LLM_GOVERNOR_CONCURRENCY", "8"))
+LLM_GOVERNOR_MAX_CONCURRENCY=int(getenv("LLM_GOVERNOR_MAX_CONCURRENCY", "32"))
+LLM_GOVERNOR_LIMITS=getenv("LLM_GOVERNOR_LIMITS", "")
+LLM_GOVERNOR_MAX_RETRIES=int(getenv("LLM_GOVERNOR_MAX_RETRIES", "3"))
+LLM_GOVERNOR_LATENCY_TARGET_SECONDS=float(getenv("LLM_GOVERNOR_LATENCY_TARGET_SECONDS", "0"))
+LLM_HEDGE_AFTER_SECONDS=float(getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+LEAN_VECTOR_PAYLOADS=getenv("LEAN_VECTOR_PAYLOADS", "false").lower() == "true"
+CHUNK_STORE_PATH=getenv("CHUNK_STORE_PATH", ".chunk_store.sqlite3")
+CHUNK_STORE_COMPRESSION=getenv("CHUNK_STORE_COMPRESSION", "zstd").lower()
\ No newline at end of file
@@ -1,28 +1,31 @@
+import re
 import sys
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from abc import ABC, abstractmethod
-from langchain_experimental.text_splitter import SemanticChunker
-from sentence_transformers import SentenceTransformer
-from langchain_huggingface import HuggingFaceEmbeddings
-from pinecone import Pinecone, ServerlessSpec
 
 current_file = Path(__file__).resolve()
 project_root = current_file.parent.parent.parent 
 sys.path.insert(0, str(project_root))
 
-from settings import PINECONE_API_KEY, PINECONE_INDEX_NAME, PINECONE_REGION
-from src.document_loader.local_loader import get_combined_text
+from settings import LEAN_VECTOR_PAYLOADS, PINECONE_API_KEY, PINECONE_INDEX_NAME, PINECONE_REGION, UPLOAD_CHUNK_WORKERS
+from src.document_loader.local_loader import DocumentLoader
+from src.utils.chunk_store import get_chunk_store
+from src.utils.tenancy import chunk_metadata, client_namespace, filterable_metadata
 
 class DocumentUploader(ABC):
     
     def __init__(self):
+        # The encoder (torch or ONNX, per EMBEDDING_BACKEND) and the Pinecone SDK load here, not at import
+        from pinecone import Pinecone
+        from src.utils.embeddings import EncoderEmbeddings, load_embedding_model
+
         self.pc = Pinecone(api_key=PINECONE_API_KEY)
         self.index_name = PINECONE_INDEX_NAME
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.semantic_chunker = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2"
-        )
+        self.embedding_model = load_embedding_model()
+        # One model instance serves both chunking and embedding
+        self.semantic_chunker = EncoderEmbeddings(self.embedding_model)
     
     @abstractmethod
     def semantic_chunking(self, text: str):
@@ -33,6 +36,8 @@ class DocumentUploader(ABC):
         pass
     
     def ensure_index(self):
+        from pinecone import ServerlessSpec
+
         if not self.pc.has_index(self.index_name):
             self.pc.create_index(
                 name=self.index_name,
@@ -42,38 +47,126 @@ class DocumentUploader(ABC):
             )
         self.index = self.pc.Index(self.index_name)
     
-    def upload_documents(self, documents_dir: str = "documents"):
-        combined_text = get_combined_text(documents_dir)
-        
-        if not combined_text or "No readable content found" in combined_text:
+    def upload_documents(self, documents_dir: str = "documents", client_id=None,
+                         source: str = "documents_folder", outlet: str = None, published=None,
+                         workers: int = UPLOAD_CHUNK_WORKERS) -> int:
+        """
+        Chunk and embed each document on its own, `workers` documents at a time, and
+        upsert each one as soon as it is ready. Chunks never span two files, and only
+        the documents in flight are held in memory, however large the folder is.
+        """
+        loader = DocumentLoader(documents_dir)
+        paths = loader.document_paths()
+        if getattr(self, "index", None) is None:
+            self.ensure_index()
+
+        def prepare(path):
+            document = loader.load_document(path)
+            if not document.text:
+                return document, []
+            chunks = self.locate_chunks(document.text, self.semantic_chunking(document.text), document)
+            return document, list(zip(chunks, self.embed_chunks(chunks)))
+
+        uploaded, documents, futures = 0, 0, {}
+        tagging = dict(client_id=client_id, source=source, outlet=outlet, published=published)
+
+        def collect(block: bool):
+            nonlocal uploaded, documents
+            done = wait(futures, return_when=FIRST_COMPLETED).done if block else [f for f in futures if f.done()]
+            for future in done:
+                path = futures.pop(future)
+                try:
+                    document, embedded = future.result()
+                except Exception as e:
+                    print(f"Error uploading {path.name}: {e}")
+                    continue
+                if embedded:
+                    documents += 1
+                    uploaded += self.upsert_chunks(
+                        embedded, id_prefix="doc_" + re.sub(r"[^\w.-]", "_", document.name),
+                        source_file=document.name, **tagging,
+                    )
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="chunk") as pool:
+            for path in paths:
+                while len(futures) >= max(1, workers):
+                    collect(block=True)
+                futures[pool.submit(prepare, path)] = path
+                collect(block=False)
+            while futures:
+                collect(block=True)
+
+        if not uploaded:
             print("No content to upload")
-            return
+        else:
+            print(f"Uploaded {uploaded} chunks from {documents} of {len(paths)} files")
+        return uploaded
 
-        self.ensure_index()
+    @staticmethod
+    def locate_chunks(text: str, chunks, document=None):
+        """Record each chunk's character range in `text` and, for paged documents, its pages"""
+        cursor = 0
+        for chunk in chunks:
+            start = text.find(chunk.page_content, cursor)
+            if start < 0:
+                start = text.find(chunk.page_content)
+            if start < 0:
+                continue
+            end = start + len(chunk.page_content)
+            chunk.metadata.update(char_start=start, char_end=end)
+            if document is not None and document.page_starts:
+                chunk.metadata.update(page=document.page_at(start), page_end=document.page_at(max(end - 1, start)))
+            cursor = start + 1
+        return chunks
+
+    def upload_text(self, text: str, client_id=None, source: str = "documents_folder", outlet: str = None,
+                    published=None, id_prefix: str = "chunk", **extra) -> int:
+        """Chunk, embed and upsert `text` into the client's namespace, tagging every chunk for filtering"""
+        if getattr(self, "index", None) is None:
+            self.ensure_index()
 
-        chunks = self.semantic_chunking(combined_text)
+        chunks = self.locate_chunks(text, self.semantic_chunking(text))
 
         embeddings = self.embed_chunks(chunks)
 
-        pinecone_vectors = []
-        for i, (embedding, chunk) in enumerate(zip(embeddings, chunks)):
+        return self.upsert_chunks(list(zip(chunks, embeddings)), client_id=client_id, source=source,
+                                  outlet=outlet, published=published, id_prefix=id_prefix, **extra)
+
+    def upsert_chunks(self, embedded, client_id=None, source: str = "documents_folder", outlet: str = None,
+                      published=None, id_prefix: str = "chunk", **extra) -> int:
+        """
+        Upsert (chunk, embedding) pairs; chunk offsets and pages are stored with the other metadata.
+        With LEAN_VECTOR_PAYLOADS the text and offsets go to the chunk store and Pinecone gets
+        only the filterable fields; the store is written first, so no vector lacks its text.
+        """
+        pinecone_vectors, stored = [], []
+        for i, (chunk, embedding) in enumerate(embedded):
+            metadata = chunk_metadata(
+                chunk.page_content, i, client_id=client_id, source=source,
+                outlet=outlet, published=published, **{**chunk.metadata, **extra},
+            )
             vector_data = {
-                "id": f"chunk_{i}",
+                "id": f"{id_prefix}_{i}",
                 "values": embedding.tolist(),
-                "metadata": {
-                    "chunk_text": chunk.page_content,
-                    "chunk_id": i,
-                    "source": "documents_folder"
-                }
+                "metadata": filterable_metadata(metadata) if LEAN_VECTOR_PAYLOADS else metadata,
             }
             pinecone_vectors.append(vector_data)
+            if LEAN_VECTOR_PAYLOADS:
+                text = metadata.pop("chunk_text")
+                stored.append((vector_data["id"], text, metadata))
 
-        self.index.upsert(vectors=pinecone_vectors)
-        print(f" Uploaded {len(pinecone_vectors)} chunks to Pinecone index '{self.index_name}'")
+        namespace = client_namespace(client_id)
+        if LEAN_VECTOR_PAYLOADS:
+            get_chunk_store().put_many(namespace, stored)
+        self.index.upsert(vectors=pinecone_vectors, namespace=namespace)
+        print(f" Uploaded {len(pinecone_vectors)} chunks to Pinecone index '{self.index_name}' (namespace '{namespace}')")
+        return len(pinecone_vectors)
 
 class MyDocumentUploader(DocumentUploader):
     
     def semantic_chunking(self, text: str):
+        from langchain_experimental.text_splitter import SemanticChunker
+
         text_splitter = SemanticChunker(
             self.semantic_chunker, 
             breakpoint_threshold_type="percentile"
@@ -89,5 +182,16 @@ class MyDocumentUploader(DocumentUploader):
         return embeddings
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Upload the documents folder to Pinecone")
+    parser.add_argument("--client-id", help="Client whose namespace receives the chunks (default: shared)")
+    parser.add_argument("--source", default="documents_folder")
+    parser.add_argument("--outlet")
+    parser.add_argument("--date", help="Publication date (ISO format) stored for date filters")
+    parser.add_argument("--workers", type=int, default=UPLOAD_CHUNK_WORKERS, help="Documents chunked and embedded at once")
+    args = parser.parse_args()
+
     uploader = MyDocumentUploader()
-    uploader.upload_documents()
+    uploader.upload_documents(client_id=args.client_id, source=args.source, outlet=args.outlet, published=args.date,
+                              workers=args.workers)
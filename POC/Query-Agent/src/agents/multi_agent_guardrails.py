@@ -1,17 +1,31 @@
+import asyncio
 from langgraph.graph import StateGraph, START, END
 from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import TypedDict, Literal
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from src.agents.retriver_agent import create_query_agent
-from settings import GOOGLE_API_KEY 
+from src.agents.query_router import QueryRouter, CANNED, DIRECT, RETRIEVE
+from src.utils.yaml_loader import load_prompts
+from src.utils.deadline import degradation, has_budget
+from src.utils.llm_governor import governed
+from src.utils.sessions import Conversation, conversation_scope, get_session_store, is_follow_up
+from src.utils.tenancy import retrieval_scope
+from settings import GOOGLE_API_KEY, QUERY_ROUTER_EMBEDDINGS, RETRY_MIN_REMAINING_SECONDS
 from guardrails import Guard
 from guardrails.hub import  ProfanityFree
 from guardrails.errors import ValidationError
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash",google_api_key = GOOGLE_API_KEY)
+model = governed(ChatGoogleGenerativeAI(model="gemini-2.5-flash",google_api_key = GOOGLE_API_KEY))
 query_agent = create_query_agent(api_key= GOOGLE_API_KEY)
 guard = Guard().use(
     ProfanityFree, on_fail="exception"
 )
+if QUERY_ROUTER_EMBEDDINGS:
+    from src.tools.query_tool import get_embedding_model
+    router = QueryRouter(encoder=get_embedding_model())
+else:
+    router = QueryRouter()
+prompts = load_prompts("src/utils/prompts.yml")
 
 class ResponseSchema(TypedDict):
     user_query: str
@@ -19,23 +33,99 @@ class ResponseSchema(TypedDict):
     evaluation_state: Literal["True", "False"]
     retry_count: int
     instruction: str
+    route: str
+    deadline: float
+    degradations: list[dict]
+    client_id: str
+    search_filters: dict
+    sender: str
+    previous_query: str
+    retrieved_chunks: list[dict]
 
 
-def retriver_agent(state: ResponseSchema) -> ResponseSchema:
+def query_router(state: ResponseSchema) -> ResponseSchema:
+    """Send greetings and small talk around the retrieval agent"""
+    decision = router.route(state["user_query"])
+    print(f"Routed to {decision.route} ({decision.reason})")
+    if decision.route == CANNED:
+        return {"route": decision.route, "query_response": decision.reply, "evaluation_state": "True"}
+    sessions = get_session_store()
+    session = sessions.get(state.get("sender"))
+    if is_follow_up(state["user_query"], session):
+        # "and in Surrey?" reads as chit-chat on its own; after a question it needs retrieval
+        sessions.stats.record_follow_up()
+        print(f"Follow-up to: {session.last_turn.query}")
+        return {"route": RETRIEVE, "previous_query": session.last_turn.query}
+    return {"route": decision.route, "previous_query": ""}
+
+def route_edge(state: ResponseSchema):
+    if state["route"] == CANNED:
+        return END
+    return "direct_agent" if state["route"] == DIRECT else "retriver_agent"
+
+def _direct_messages(state: ResponseSchema) -> list:
     user_query = state["user_query"]
     instruction = state["instruction"]
+    return [
+        ("system", prompts["direct_answer_prompt"]),
+        ("human", f"{user_query}\n\n{instruction}" if instruction else user_query),
+    ]
+
+def _direct_model(config: RunnableConfig):
+    factory = config.get("configurable", {}).get("chat_model_factory")
+    return factory(temperature=0.3) if factory is not None else model
+
+def direct_agent(state: ResponseSchema, config: RunnableConfig) -> ResponseSchema:
+    """Answer small talk with a single LLM call and no tools"""
+    response = _direct_model(config).invoke(_direct_messages(state))
+    return _agent_output(state, {"output": response.content})
+
+async def adirect_agent(state: ResponseSchema, config: RunnableConfig) -> ResponseSchema:
+    response = await _direct_model(config).ainvoke(_direct_messages(state))
+    return _agent_output(state, {"output": response.content})
+
+def _agent_input(state: ResponseSchema) -> dict:
+    user_query = state["user_query"]
+    if state.get("previous_query"):
+        # Without the previous question the agent spends tool calls rediscovering the topic
+        user_query = f"(Follow-up to the previous question: \"{state['previous_query']}\")\n{user_query}"
+    instruction = state["instruction"]
     modified_input = {"input": f"{user_query}\n\n{instruction}" if instruction else user_query}
-    result = query_agent.invoke({"input": modified_input})
-    response_str = result["output"]
+    return {"input": modified_input}
 
+def _agent_output(state: ResponseSchema, result: dict) -> ResponseSchema:
     return {
-        "user_query": user_query,
-        "query_response": response_str,
+        "user_query": state["user_query"],
+        "query_response": result["output"],
         "evaluation_state": "",
         "retry_count": state["retry_count"] + 1,
-        "instruction": instruction
+        "instruction": state["instruction"],
+        "route": state["route"]
     }
 
+def _conversation(state: ResponseSchema) -> Conversation:
+    """Follow-ups may answer from the chunks of the sender's previous turns; every turn records what it retrieved"""
+    sessions = get_session_store()
+    session = sessions.get(state.get("sender")) if state.get("previous_query") else None
+    return Conversation(session.cached_chunks() if session else None, sessions.stats,
+                        keep_chunks=bool(state.get("sender")))
+
+def retriver_agent(state: ResponseSchema, config: RunnableConfig) -> ResponseSchema:
+    # `configurable.query_agent` lets offline runs swap in an agent backed by stub models
+    agent = config.get("configurable", {}).get("query_agent", query_agent)
+    # Retrieval only sees the sender's client namespace, whatever the agent asks for
+    with retrieval_scope(state.get("client_id"), state.get("search_filters")), \
+            conversation_scope(_conversation(state)) as conversation:
+        result = agent.invoke(_agent_input(state))
+    return {**_agent_output(state, result), "retrieved_chunks": conversation.retrieved}
+
+async def aretriver_agent(state: ResponseSchema, config: RunnableConfig) -> ResponseSchema:
+    agent = config.get("configurable", {}).get("query_agent", query_agent)
+    with retrieval_scope(state.get("client_id"), state.get("search_filters")), \
+            conversation_scope(_conversation(state)) as conversation:
+        result = await agent.ainvoke(_agent_input(state))
+    return {**_agent_output(state, result), "retrieved_chunks": conversation.retrieved}
+
 def evaluator_agent(state: ResponseSchema) -> ResponseSchema:
     user_query = state["user_query"]
     query_response = state["query_response"]
@@ -57,6 +147,15 @@ def evaluator_agent(state: ResponseSchema) -> ResponseSchema:
             "instruction": ""
         }
     except ValidationError:
+        if not has_budget(state, RETRY_MIN_REMAINING_SECONDS):
+            # Not enough time left to regenerate; never send the unvalidated text
+            return {
+                "user_query": user_query,
+                "query_response": "Sorry, I couldn't put together a suitable answer in time. Please try asking again.",
+                "evaluation_state": "True",
+                "instruction": "",
+                "degradations": degradation(state, "evaluator_agent", "retry_skipped")
+            }
         retry_instruction = "Rephrase the response to be completely profanity-free. Avoid any explicit language, slurs, or direct quotes of offensive content. Summarize factually and neutrally."
         return {
             "user_query": user_query,
@@ -65,21 +164,42 @@ def evaluator_agent(state: ResponseSchema) -> ResponseSchema:
             "instruction": retry_instruction
         }
 
+async def aevaluator_agent(state: ResponseSchema) -> ResponseSchema:
+    # Guard validators are synchronous and CPU-bound; keep them off the event loop
+    return await asyncio.to_thread(evaluator_agent, state)
+
 def evaluation_edge(state: ResponseSchema):
-    return "retriver_agent" if state["evaluation_state"] == "False" else END
+    # Retries are capped by evaluator_agent, which records the skip when the deadline is near
+    if state["evaluation_state"] != "False":
+        return END
+    return "direct_agent" if state["route"] == DIRECT else "retriver_agent"
 
 graph = StateGraph(ResponseSchema)
 
-graph.add_node('retriver_agent', retriver_agent)
-graph.add_node('evaluator_agent', evaluator_agent)
+# Each node has a sync body for workflow.invoke and an async one for workflow.ainvoke
+graph.add_node('query_router', query_router)
+graph.add_node('retriver_agent', RunnableLambda(retriver_agent, afunc=aretriver_agent, name="retriver_agent"))
+graph.add_node('direct_agent', RunnableLambda(direct_agent, afunc=adirect_agent, name="direct_agent"))
+graph.add_node('evaluator_agent', RunnableLambda(evaluator_agent, afunc=aevaluator_agent, name="evaluator_agent"))
 
-graph.add_edge(START, 'retriver_agent')
+graph.add_edge(START, 'query_router')
+graph.add_conditional_edges(
+    "query_router",
+    route_edge,
+    {
+        "retriver_agent": "retriver_agent",
+        "direct_agent": "direct_agent",
+        END: END
+    }
+)
 graph.add_edge('retriver_agent', 'evaluator_agent')
+graph.add_edge('direct_agent', 'evaluator_agent')
 graph.add_conditional_edges(
     "evaluator_agent",
     evaluation_edge,
     {
         "retriver_agent": "retriver_agent",
+        "direct_agent": "direct_agent",
         END: END
     }
 )
@@ -92,7 +212,9 @@ if __name__ == "__main__":
         "query_response": "",
         "evaluation_state": "",
         "retry_count": 0,
-        "instruction": ""
+        "instruction": "",
+        "route": "",
+        "degradations": []
     }
 
     final_state = workflow.invoke(initial_state, config={"verbose": True})
@@ -1,79 +1,215 @@
+import asyncio
+import re
 from typing import Literal
 from langgraph.graph import StateGraph, START, END
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from src.agents.state import QueryAgentState
-from src.tools.query_tool import get_context
+from src.schemas.evaluation_schema import EvaluationOutput
+from src.tools.query_tool import collect_retrieved_chunks, get_context, get_embedding_model
+from src.utils.context_packer import pack_context
+from src.utils.deadline import degradation, has_budget
+from src.utils.llm_governor import governed
+from src.utils.tenancy import retrieval_scope
 from src.utils.yaml_loader import load_prompts
 from src.agents.retriver_agent import create_query_agent
-from settings import GOOGLE_API_KEY
+from settings import (
+    GOOGLE_API_KEY, ANALYST_CONTEXT_TOKEN_BUDGET, RERANK_MIN_REMAINING_SECONDS,
+    RETRY_MIN_REMAINING_SECONDS, FULL_CONTEXT_MIN_REMAINING_SECONDS,
+)
 prompts = load_prompts("src/utils/prompts.yml")
 
 
-def retriever_agent(state: QueryAgentState) -> QueryAgentState:
-    """Retrieve relevant documents for the user query using existing retriever agent"""
-    try:
-        agent = create_query_agent(api_key=GOOGLE_API_KEY)
-        result = agent.invoke({"input": state["user_query"]})
-        
+def get_chat_model(config: RunnableConfig | None, temperature: float):
+    """Return the chat model for a node; `configurable.chat_model_factory` overrides Gemini."""
+    factory = (config or {}).get("configurable", {}).get("chat_model_factory")
+    if factory is not None:
+        return factory(temperature=temperature)
+    return governed(ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=temperature))
+
+def get_query_agent(config: RunnableConfig | None):
+    """Return the retriever agent; `configurable.query_agent` overrides a freshly built one."""
+    agent = (config or {}).get("configurable", {}).get("query_agent")
+    if agent is not None:
+        return agent
+    return create_query_agent(api_key=GOOGLE_API_KEY)
+
+def parse_evaluation(text: str) -> EvaluationOutput:
+    """Parse the evaluator's fixed-format report into an EvaluationOutput"""
+    def field(name):
+        match = re.search(rf"{name}:\s*\[?([^\]\n]*)", text, re.IGNORECASE)
+        return match.group(1).strip() if match else ""
+
+    evaluation = EvaluationOutput(evaluation_feedback=field("FEEDBACK") or text)
+    if field("HALLUCINATIONS_FOUND"):
+        evaluation.has_hallucinations = field("HALLUCINATIONS_FOUND").upper().startswith("YES")
+    if field("CITATIONS_COMPLETE"):
+        evaluation.citations_complete = field("CITATIONS_COMPLETE").upper().startswith("YES")
+    score = re.match(r"\d+(\.\d+)?", field("ACCURACY_SCORE"))
+    if score:
+        evaluation.evaluation_score = float(score.group(0))
+    return evaluation
+
+
+RERANKER_PROMPT = ChatPromptTemplate([
+    ("system", prompts.get("reranker_agent_prompt")),
+    ("user", "User Query: {query}\n\nRetrieved Document Chunks:\n{documents}\n\nRerank these chunks by semantic relevance:")
+])
+
+ANALYST_PROMPT = ChatPromptTemplate([
+    ("system", prompts.get("analyst_agent_prompt")),
+    ("user", "User Query: {query}\n\nTop-Ranked Context Chunks:\n{context}\n\nGenerate a comprehensive, citation-backed response:")
+])
+
+EVALUATOR_PROMPT = ChatPromptTemplate([
+    ("system", prompts.get("evaluator_agent_prompt")),
+    ("user", "User Query: {query}\n\nSource Chunks:\n{context}\n\nGenerated Response:\n{response}\n\nEvaluate the generated response:")
+])
+
+
+def _apply_retrieval(state: QueryAgentState, result: dict | None, error: Exception | None = None,
+                     chunks: list[str] | None = None) -> QueryAgentState:
+    # The individual chunks `get_context` loaded; the agent's output is one summary string
+    state["retrieved_chunks"] = list(chunks or [])
+    if error is None:
         retrieved_docs = result.get("output", "")
         state["retrieved_documents"] = [retrieved_docs] if isinstance(retrieved_docs, str) else retrieved_docs
         state["metadata"] = {"retrieval_status": "success", "retrieval_method": "existing_agent"}
-        state["retry_count"] = state.get("retry_count", 0)
-        
-    except Exception as e:
+    else:
         state["retrieved_documents"] = []
-        state["metadata"] = {"retrieval_status": "failed", "error": str(e)}
-        state["retry_count"] = state.get("retry_count", 0)
+        state["metadata"] = {"retrieval_status": "failed", "error": str(error)}
+    state["retry_count"] = state.get("retry_count", 0)
     return state
 
-def reranker_agent(state: QueryAgentState) -> QueryAgentState:
-    """Rerank and filter retrieved documents by true semantic relevance"""
-    model = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.1)
-    
-    model_prompt = ChatPromptTemplate([
-        ("system", prompts.get("reranker_agent_prompt")),
-        ("user", "User Query: {query}\n\nRetrieved Document Chunks:\n{documents}\n\nRerank these chunks by semantic relevance:")
-    ])
-    
-    chain = model_prompt | model
-    response = chain.invoke({
+def retriever_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Retrieve relevant documents for the user query using existing retriever agent"""
+    chunks = []
+    try:
+        agent = get_query_agent(config)
+        with retrieval_scope(state.get("client_id"), state.get("search_filters")), collect_retrieved_chunks() as chunks:
+            return _apply_retrieval(state, agent.invoke({"input": state["user_query"]}), chunks=chunks)
+    except Exception as e:
+        return _apply_retrieval(state, None, e, chunks)
+
+async def aretriever_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Async variant of retriever_agent"""
+    chunks = []
+    try:
+        agent = get_query_agent(config)
+        with retrieval_scope(state.get("client_id"), state.get("search_filters")), collect_retrieved_chunks() as chunks:
+            return _apply_retrieval(state, await agent.ainvoke({"input": state["user_query"]}), chunks=chunks)
+    except Exception as e:
+        return _apply_retrieval(state, None, e, chunks)
+
+
+def _reranker_inputs(state: QueryAgentState) -> dict:
+    return {
         "query": state["user_query"],
         "documents": "\n---\n".join(state["retrieved_documents"])
-    })
-    
+    }
+
+def _apply_reranking(state: QueryAgentState, response) -> QueryAgentState:
     reranked_text = response.content
     state["reranked_documents"] = [reranked_text] if reranked_text else state["retrieved_documents"]
-    
     return state
 
-def analyst_generator_agent(state: QueryAgentState) -> QueryAgentState:
+def _skip_reranking(state: QueryAgentState) -> QueryAgentState:
+    """Pass the retrieval order through unchanged when there is no time for another LLM call"""
+    state["reranked_documents"] = state["retrieved_documents"]
+    state["degradations"] = degradation(state, "reranker_agent", "skipped")
+    return state
+
+def _keep_chunk_order(state: QueryAgentState) -> QueryAgentState:
+    """The analyst packs the individual chunks, ranking their sentences by relevance itself"""
+    state["reranked_documents"] = state["retrieved_chunks"]
+    return state
+
+def reranker_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Rerank and filter retrieved documents by true semantic relevance"""
+    if state.get("retrieved_chunks"):
+        return _keep_chunk_order(state)
+    if not has_budget(state, RERANK_MIN_REMAINING_SECONDS):
+        return _skip_reranking(state)
+    chain = RERANKER_PROMPT | get_chat_model(config, temperature=0.1)
+    return _apply_reranking(state, chain.invoke(_reranker_inputs(state)))
+
+async def areranker_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Async variant of reranker_agent"""
+    if state.get("retrieved_chunks"):
+        return _keep_chunk_order(state)
+    if not has_budget(state, RERANK_MIN_REMAINING_SECONDS):
+        return _skip_reranking(state)
+    chain = RERANKER_PROMPT | get_chat_model(config, temperature=0.1)
+    return _apply_reranking(state, await chain.ainvoke(_reranker_inputs(state)))
+
+
+def _analyst_inputs(state: QueryAgentState) -> dict:
+    """Pack the retrieved chunks into the analyst's token budget (CPU-bound: embeds sentences)"""
+    token_budget = ANALYST_CONTEXT_TOKEN_BUDGET
+    if not has_budget(state, FULL_CONTEXT_MIN_REMAINING_SECONDS):
+        # A shorter prompt is the only lever left on the analyst's latency
+        token_budget //= 2
+        state["degradations"] = degradation(state, "analyst_generator_agent", "context_halved")
+    packed = pack_context(
+        state["user_query"],
+        # One entry per chunk when get_context recorded them, so duplicates are dropped and
+        # each keeps its own source label; otherwise the reranker's single block
+        state["reranked_documents"],
+        token_budget=token_budget,
+        embed=get_embedding_model().encode,
+    )
+    state.setdefault("metadata", {})["context_packing"] = packed.report()
+    # The evaluator checks the answer's [Source n] citations against exactly this text
+    state["packed_context"] = packed.text
+    return {"query": state["user_query"], "context": packed.text}
+
+def analyst_generator_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
     """Core reasoning agent - generates comprehensive, citation-backed response"""
-    model = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.3)
-    
-    model_prompt = ChatPromptTemplate([
-        ("system", prompts.get("analyst_agent_prompt")),
-        ("user", "User Query: {query}\n\nTop-Ranked Context Chunks:\n{context}\n\nGenerate a comprehensive, citation-backed response:")
-    ])
-    
-    chain = model_prompt | model
-    response = chain.invoke({
-        "query": state["user_query"],
-        "context": "\n---\n".join(state["reranked_documents"])
-    })
-    
+    chain = ANALYST_PROMPT | get_chat_model(config, temperature=0.3)
+    response = chain.invoke(_analyst_inputs(state))
     state["analysis_result"] = response.content
     return state
 
-def evaluator_agent(state: QueryAgentState) -> QueryAgentState:
-    model = ChatGoogleGenerativeAI(model = "gemini-2.0-flash", temperature=0.3)
+async def aanalyst_generator_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Async variant of analyst_generator_agent; context packing runs in a worker thread"""
+    chain = ANALYST_PROMPT | get_chat_model(config, temperature=0.3)
+    inputs = await asyncio.to_thread(_analyst_inputs, state)
+    response = await chain.ainvoke(inputs)
+    state["analysis_result"] = response.content
+    return state
 
-    model_prompt = ChatPromptTemplate([
-        ("system", prompts.get("evaluator_agent_prompt")),
-        ("user", "User Query: {query}\n\nTop-Ranked Context Chunks:\n{context}\n\nGenerate a comprehensive, citation-backed response:")
-    ])
 
-    
+def _evaluator_inputs(state: QueryAgentState) -> dict:
+    return {
+        "query": state["user_query"],
+        "context": state.get("packed_context") or "\n---\n".join(state["reranked_documents"]),
+        "response": state.get("analysis_result", "")
+    }
+
+def _apply_evaluation(state: QueryAgentState, response) -> QueryAgentState:
+    evaluation = parse_evaluation(response.content)
+    state["has_hallucinations"] = evaluation.has_hallucinations
+    state["citations_complete"] = evaluation.citations_complete
+    state["evaluation_score"] = evaluation.evaluation_score
+    state["evaluation_feedback"] = evaluation.evaluation_feedback
+    # Routing functions cannot update state, so the attempt is counted here
+    if evaluation.evaluation_score < 6.0:
+        if has_budget(state, RETRY_MIN_REMAINING_SECONDS):
+            state["retry_count"] = state.get("retry_count", 0) + 1
+        else:
+            state["degradations"] = degradation(state, "evaluator_agent", "retry_skipped")
+    return state
+
+def evaluator_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Evaluator Agent - checks the generated response against the source chunks"""
+    chain = EVALUATOR_PROMPT | get_chat_model(config, temperature=0.3)
+    return _apply_evaluation(state, chain.invoke(_evaluator_inputs(state)))
+
+async def aevaluator_agent(state: QueryAgentState, config: RunnableConfig) -> QueryAgentState:
+    """Async variant of evaluator_agent"""
+    chain = EVALUATOR_PROMPT | get_chat_model(config, temperature=0.3)
+    return _apply_evaluation(state, await chain.ainvoke(_evaluator_inputs(state)))
 
 def presenter_agent(state: QueryAgentState) -> QueryAgentState:
     """Presenter Agent - displays the final result in console"""
@@ -82,24 +218,33 @@ def presenter_agent(state: QueryAgentState) -> QueryAgentState:
     print("\nFinal Answer:\n", state.get("analysis_result", ""))
     print("\nEvaluation score:", state.get("evaluation_score"))
     print("Evaluation feedback:", state.get("evaluation_feedback"))
+    if state.get("degradations"):
+        print("Degraded to meet the deadline:", state["degradations"])
     return state
 
 def should_regenerate(state: QueryAgentState) -> Literal["retriever_agent", "presenter_agent"]:
     """Decide whether to route back to Retriever Agent based on quality issues"""
-    if state.get("evaluation_score", 0) < 6.0 and state.get("retry_count", 0) < 2:
-        state["retry_count"] = state.get("retry_count", 0) + 1
+    if (
+        state.get("evaluation_score", 0) < 6.0
+        and state.get("retry_count", 0) <= 2
+        and has_budget(state, RETRY_MIN_REMAINING_SECONDS)
+    ):
         return "retriever_agent"
     return "presenter_agent"
 
+def node(func, afunc=None):
+    """Wrap a node so `invoke` runs `func` and `ainvoke` runs `afunc`"""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
 # Create the workflow graph
 def create_query_workflow():
     graph = StateGraph(QueryAgentState)
     
-    # nodes for each agent
-    graph.add_node("retriever_agent", retriever_agent)
-    graph.add_node("reranker_agent", reranker_agent)
-    graph.add_node("analyst_generator_agent", analyst_generator_agent)
-    graph.add_node("evaluator_agent", evaluator_agent)
+    # nodes for each agent (sync for workflow.invoke, async for workflow.ainvoke)
+    graph.add_node("retriever_agent", node(retriever_agent, aretriever_agent))
+    graph.add_node("reranker_agent", node(reranker_agent, areranker_agent))
+    graph.add_node("analyst_generator_agent", node(analyst_generator_agent, aanalyst_generator_agent))
+    graph.add_node("evaluator_agent", node(evaluator_agent, aevaluator_agent))
     graph.add_node("presenter_agent", presenter_agent)
     
     # flow with feedback loop
@@ -128,7 +273,9 @@ if __name__ == "__main__":
     result = workflow.invoke({
         "user_query": "What initiative did the federal government announce regarding AI?",
         "retrieved_documents": [],
+        "retrieved_chunks": [],
         "reranked_documents": [],
+        "packed_context": "",
         "analysis_result": "",
         "evaluation_score": 0.0,
         "evaluation_feedback": "",
@@ -136,7 +283,8 @@ if __name__ == "__main__":
         "metadata": {},
         "retry_count": 0,
         "has_hallucinations": False,
-        "citations_complete": True
+        "citations_complete": True,
+        "degradations": []
     })
     
     print(f"Final Evaluation Score: {result.get('evaluation_score', 'N/A')}/10")
@@ -0,0 +1,201 @@
+"""
+Cheap local router that decides how much of the agent pipeline a message needs.
+
+Routes:
+    canned   - greetings, thanks, farewells and capability questions; answered from a
+               template with no LLM, embedding or vector-store call
+    direct   - chit-chat and out-of-scope requests; answered by one LLM call without tools
+    retrieve - everything else goes through the full retrieval agent
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+CANNED = "canned"
+DIRECT = "direct"
+RETRIEVE = "retrieve"
+ROUTES = (CANNED, DIRECT, RETRIEVE)
+
+CANNED_REPLIES = {
+    "greeting": "Hi! I'm the ScroBits assistant. Ask me anything about the news stories and documents we monitor.",
+    "thanks": "You're welcome! Let me know if there's anything else I can help with.",
+    "farewell": "Goodbye! Message me anytime you have another question.",
+    "acknowledgement": "Great! Send me a question whenever you're ready.",
+    "capabilities": "I answer questions about the news stories, broadcasts and documents indexed for you. Try asking about a person, an organisation or an event.",
+}
+
+# Keyword rules only fire for short messages, so "hi, what did the mayor say..." still retrieves
+MAX_RULE_WORDS = 6
+
+CANNED_RULES = [
+    ("greeting", re.compile(r"^(hi+|hey+|hello+|hiya|yo|namaste|sat sri akal|good (morning|afternoon|evening|day))\b")),
+    ("thanks", re.compile(r"\b(thanks?|thank you|thx|ty|much appreciated|cheers)\b")),
+    ("farewell", re.compile(r"^(bye+|goodbye|good night|see (you|ya)|later|take care)\b")),
+    ("acknowledgement", re.compile(r"^(ok(ay)?|k|cool|great|nice|got it|alright|sure|perfect|awesome|👍|🙏)[.!]*$")),
+    ("capabilities", re.compile(r"^(help|menu|who are you|what are you|what can you do|what do you do|how do you work|how can you help( me)?)\b")),
+]
+
+# Words that may surround a canned phrase without turning it into a real question
+FILLER_WORDS = {
+    "so", "much", "a", "lot", "again", "there", "you", "all", "very", "for", "the", "your",
+    "help", "bot", "team", "everyone", "guys", "sir", "madam", "dear", "and", "me", "now", "?",
+    "ton", "mate", "ji", "bhai", "friend",
+}
+
+DIRECT_RULES = [
+    re.compile(r"^how are (you|u)\b"),
+    re.compile(r"\b(tell me a joke|joke|poem|riddle|sing)\b"),
+    re.compile(r"^(what('s| is) your name|are you (a )?(bot|robot|human|real))\b"),
+    re.compile(r"^(lol|(ha){2,}|hm+)\b"),
+]
+
+# Exemplars for the optional embedding nearest-centroid classifier
+CANNED_EXAMPLES = {
+    "greeting": ["hi", "hello there", "good morning"],
+    "thanks": ["thanks a lot", "thank you so much"],
+    "farewell": ["bye", "see you later"],
+    "acknowledgement": ["ok", "got it"],
+    "capabilities": ["what can you do", "who are you", "help"],
+}
+
+ROUTE_EXAMPLES = {
+    CANNED: [example for examples in CANNED_EXAMPLES.values() for example in examples],
+    DIRECT: [
+        "how are you doing today", "tell me a joke", "write me a poem", "are you a robot",
+        "what's your favourite colour", "do you like music", "what is the meaning of life",
+        "can you sing a song",
+    ],
+    RETRIEVE: [
+        "what did the mayor say about the budget", "which outlet covered the strike",
+        "what initiative did the federal government announce regarding AI",
+        "summarise the coverage of the city council meeting",
+        "what trend did statistics canada report about electric vehicle sales",
+        "what did the anonymous BCGEU member post about the raise offer",
+        "list stories mentioning the housing crisis", "who was interviewed on the evening drive show",
+    ],
+}
+
+# Calls skipped per routed message, relative to the retrieval agent path
+# (function-call turn + final answer, query embedding, Pinecone query)
+AVOIDED_CALLS = {
+    CANNED: {"llm": 2, "embedding": 1, "vector": 1},
+    DIRECT: {"llm": 1, "embedding": 1, "vector": 1},
+    RETRIEVE: {"llm": 0, "embedding": 0, "vector": 0},
+}
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    reason: str
+    reply: str = ""
+
+
+@dataclass
+class RouterStats:
+    routed: dict = field(default_factory=lambda: {route: 0 for route in ROUTES})
+    avoided: dict = field(default_factory=lambda: {"llm": 0, "embedding": 0, "vector": 0})
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, route: str):
+        with self._lock:
+            self.routed[route] += 1
+            for kind, count in AVOIDED_CALLS[route].items():
+                self.avoided[kind] += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self.routed.values())
+            return {
+                "total": total,
+                "routed": dict(self.routed),
+                "avoided_calls": dict(self.avoided),
+                "retrieval_skip_rate": round(1 - self.routed[RETRIEVE] / total, 4) if total else 0.0,
+            }
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def is_bare_phrase(remainder: str) -> bool:
+    """True when nothing but filler is left once the canned phrase is removed ("thanks, and Q3?" is not)"""
+    words = re.findall(r"[\w?]+", remainder)
+    return all(word in FILLER_WORDS for word in words) and not (words and words[-1] == "?" and len(words) > 1)
+
+
+class QueryRouter:
+    """
+    Keyword rules first; when an encoder is supplied, messages the rules do not
+    match are classified by cosine similarity to per-route exemplar centroids.
+    Anything uncertain falls back to full retrieval.
+    """
+
+    def __init__(self, encoder=None, min_similarity: float = 0.55, min_margin: float = 0.05):
+        self.encoder = encoder
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.stats = RouterStats()
+        self._centroids = None
+        self._canned_vectors = None
+        self._lock = threading.Lock()
+
+    def _encode(self, texts) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(self.encoder.encode(texts, convert_to_numpy=True), dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _get_centroids(self) -> np.ndarray:
+        with self._lock:
+            if self._centroids is None:
+                centroids = []
+                for route in ROUTES:
+                    centroid = self._encode(ROUTE_EXAMPLES[route]).mean(axis=0)
+                    centroids.append(centroid / np.linalg.norm(centroid))
+                self._canned_vectors = self._encode(ROUTE_EXAMPLES[CANNED])
+                self._centroids = np.stack(centroids)
+            return self._centroids
+
+    def _canned_intent(self, vector: np.ndarray) -> str:
+        """Intent of the nearest canned exemplar, used to pick the template reply"""
+        nearest = int(np.argmax(self._canned_vectors @ vector))
+        for intent, examples in CANNED_EXAMPLES.items():
+            if nearest < len(examples):
+                return intent
+            nearest -= len(examples)
+        return "capabilities"
+
+    def classify(self, text: str) -> RouteDecision:
+        message = normalize(text)
+        if not message:
+            return RouteDecision(CANNED, "empty", CANNED_REPLIES["greeting"])
+
+        if len(message.split()) <= MAX_RULE_WORDS:
+            for intent, pattern in CANNED_RULES:
+                if pattern.search(message) and is_bare_phrase(pattern.sub(" ", message)):
+                    return RouteDecision(CANNED, f"rule:{intent}", CANNED_REPLIES[intent])
+            for pattern in DIRECT_RULES:
+                if pattern.search(message):
+                    return RouteDecision(DIRECT, "rule:chit-chat")
+
+        if self.encoder is not None:
+            vector = self._encode(message)[0]
+            scores = self._get_centroids() @ vector
+            ranked = np.argsort(-scores)
+            best, runner_up = ranked[0], ranked[1]
+            route = ROUTES[best]
+            confident = scores[best] >= self.min_similarity and scores[best] - scores[runner_up] >= self.min_margin
+            if route != RETRIEVE and confident:
+                if route == CANNED:
+                    intent = self._canned_intent(vector)
+                    return RouteDecision(route, f"centroid:{intent}", CANNED_REPLIES[intent])
+                return RouteDecision(route, f"centroid:{scores[best]:.2f}")
+
+        return RouteDecision(RETRIEVE, "default")
+
+    def route(self, text: str) -> RouteDecision:
+        decision = self.classify(text)
+        self.stats.record(decision.route)
+        return decision
@@ -2,19 +2,24 @@ def create_query_agent(
     model="gemini-2.0-flash",
     temperature=0.1,
     api_key=None,
-    prompt_path="src/utils/prompts.yml"
+    prompt_path="src/utils/prompts.yml",
+    llm=None,
+    verbose=True
 ):
     from langchain_google_genai import ChatGoogleGenerativeAI
     from langchain.agents import create_openai_functions_agent, AgentExecutor
     from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
     from src.tools.query_tool import get_context
+    from src.utils.llm_governor import governed
     from src.utils.yaml_loader import load_prompts
 
-    llm = ChatGoogleGenerativeAI(
-        model=model,
-        temperature=temperature,
-        google_api_key=api_key,
-    )
+    # `llm` lets callers (e.g. the offline benchmarks) swap in any chat model
+    if llm is None:
+        llm = governed(ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            google_api_key=api_key,
+        ))
     tools = [get_context]
     prompts = load_prompts(prompt_path)
     prompt_text = prompts["query_agent_prompt"]
@@ -24,4 +29,4 @@ def create_query_agent(
         MessagesPlaceholder(variable_name="agent_scratchpad"),
     ])
     agent = create_openai_functions_agent(llm, tools, prompt)
-    return AgentExecutor(agent=agent, tools=tools, verbose=True)
+    return AgentExecutor(agent=agent, tools=tools, verbose=verbose)
@@ -0,0 +1,22 @@
+from typing import TypedDict
+
+
+class QueryAgentState(TypedDict):
+    """Shared state passed between the agents of the query workflow"""
+    user_query: str
+    retrieved_documents: list[str]
+    retrieved_chunks: list[str]
+    reranked_documents: list[str]
+    packed_context: str
+    analysis_result: str
+    evaluation_score: float
+    evaluation_feedback: str
+    final_response: str
+    metadata: dict
+    retry_count: int
+    has_hallucinations: bool
+    citations_complete: bool
+    deadline: float
+    degradations: list[dict]
+    client_id: str
+    search_filters: dict
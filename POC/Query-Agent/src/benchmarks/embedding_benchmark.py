@@ -0,0 +1,160 @@
+"""
+Encode throughput, latency, memory and import cost of the embedding backends.
+
+Every backend (`torch`, `onnx`, `onnx-int8`, see `src/utils/embeddings.py`) runs in
+a fresh subprocess, so its import time and peak RSS are measured from a cold start
+and not shared with the others. Each run reports the runtime import time, model
+load time, batch encode throughput over the golden passages, single-query encode
+latency and peak RSS. When `torch` runs too, every other backend's embeddings of the
+validation sentences are compared with it (min / mean cosine).
+
+Usage (from the Query-Agent root):
+    python -m src.benchmarks.embedding_benchmark --backends torch onnx onnx-int8 --output embedding_bench.json
+"""
+import argparse
+import importlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.benchmarks.workflow_benchmark import git_commit, summarize
+from src.utils.embeddings import BACKENDS, cosine_agreement, load_embedding_model, validation_sentences
+from settings import EMBEDDING_MODEL_DIR
+
+# What each backend imports at serving time, beyond numpy
+RUNTIME_MODULES = {
+    "torch": ("sentence_transformers",),
+    "onnx": ("onnxruntime", "tokenizers"),
+    "onnx-int8": ("onnxruntime", "tokenizers"),
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(backend: str, model_dir: str, passages: list[str], queries: list[str], batch_size: int,
+            embeddings_path: str) -> dict:
+    """Runs inside the child process"""
+    baseline_rss = peak_rss_mb()
+    started = time.perf_counter()
+    for module in RUNTIME_MODULES[backend]:
+        importlib.import_module(module)
+    import_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = load_embedding_model(backend, model_dir)
+    load_s = time.perf_counter() - started
+
+    model.encode(queries[:4], batch_size=batch_size, convert_to_numpy=True)
+    started = time.perf_counter()
+    model.encode(passages, batch_size=batch_size, convert_to_numpy=True)
+    encode_s = time.perf_counter() - started
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        model.encode(query, convert_to_numpy=True)
+        latencies.append(time.perf_counter() - started)
+
+    np.save(embeddings_path, model.encode(validation_sentences(), batch_size=batch_size, convert_to_numpy=True))
+    return {
+        "backend": backend,
+        "import_s": round(import_s, 3),
+        "load_s": round(load_s, 3),
+        "passages": len(passages),
+        "throughput_per_s": round(len(passages) / encode_s, 1),
+        "query_latency": summarize(latencies),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def workload(passages: int, queries: int) -> tuple[list[str], list[str]]:
+    """Golden passages (repeated up to `passages`) for throughput, golden questions for latency"""
+    golden = json.loads((project_root / "src" / "benchmarks" / "retrieval_golden.json").read_text(encoding="utf-8"))
+    evidence = [item["evidence"] for entry in golden for item in entry["questions"]]
+    questions = [item["question"] for entry in golden for item in entry["questions"]]
+    # Passages grow to chunk size by joining neighbours, as the uploader's chunks do
+    chunks = [" ".join(evidence[i:i + 4]) for i in range(len(evidence))]
+    return [chunks[i % len(chunks)] for i in range(passages)], [questions[i % len(questions)] for i in range(queries)]
+
+
+def run_backend(backend: str, args, embeddings_path: str) -> dict:
+    command = [
+        sys.executable, "-m", "src.benchmarks.embedding_benchmark", "--child", backend,
+        "--model-dir", args.model_dir, "--passages", str(args.passages), "--queries", str(args.queries),
+        "--batch-size", str(args.batch_size), "--embeddings-out", embeddings_path,
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=project_root)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {"backend": backend, "skipped": (completed.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--model-dir", default=str(EMBEDDING_MODEL_DIR), help="ONNX export directory")
+    parser.add_argument("--passages", type=int, default=512, help="Passages encoded for the throughput run")
+    parser.add_argument("--queries", type=int, default=100, help="Single-query encodes for the latency run")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--output", default="embedding_benchmark.json")
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        passages, queries = workload(args.passages, args.queries)
+        try:
+            result = measure(args.child, args.model_dir, passages, queries, args.batch_size, args.embeddings_out)
+        except (ImportError, ValueError) as e:
+            result = {"backend": args.child, "skipped": str(e)}
+        print(json.dumps(result))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = {backend: str(Path(scratch) / f"{backend}.npy") for backend in args.backends}
+        for backend in args.backends:
+            result = run_backend(backend, args, paths[backend])
+            results.append(result)
+            if "skipped" in result:
+                print(f"SKIPPED {backend}: {result['skipped']}")
+                continue
+            print(f"{backend:<10} import={result['import_s']:.2f}s load={result['load_s']:.2f}s "
+                  f"throughput={result['throughput_per_s']:.1f}/s p50={result['query_latency']['p50_ms']}ms "
+                  f"p95={result['query_latency']['p95_ms']}ms peak_rss={result['peak_rss_mb']}MB")
+
+        reference = next((r for r in results if r["backend"] == "torch" and "skipped" not in r), None)
+        for result in results:
+            if reference is None or result is reference or "skipped" in result:
+                continue
+            result["agreement_with_torch"] = cosine_agreement(np.load(paths[result["backend"]]), np.load(paths["torch"]))
+            print(f"{result['backend']:<10} vs torch: min cosine {result['agreement_with_torch']['min_cosine']:.6f} "
+                  f"mean {result['agreement_with_torch']['mean_cosine']:.6f}")
+
+    report = {
+        "commit": git_commit(),
+        "batch_size": args.batch_size,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Deterministic offline stand-ins for Gemini, MiniLM and Pinecone used by the benchmarks.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Any
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, FunctionMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+WORD_RE = re.compile(r"\w+")
+
+FILLER_WORDS = [
+    "government", "budget", "report", "announced", "quarter", "sales", "growth",
+    "policy", "minister", "program", "investment", "province", "council", "strike",
+]
+
+
+def _stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashingEmbedder:
+    """Bag-of-words hashing encoder with the `SentenceTransformer.encode` call shape."""
+
+    def __init__(self, dimension: int = 384, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in WORD_RE.findall(text.lower()):
+            h = _stable_hash(token)
+            vector[h % self.dimension] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, convert_to_numpy=True, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.stack([self._encode_one(s) for s in sentences]) if sentences else np.zeros((0, self.dimension), dtype=np.float32)
+
+
+def matches_filter(metadata: dict, filter: dict | None) -> bool:
+    """Evaluate the subset of Pinecone's metadata filter language that `build_filter` emits"""
+    for key, condition in (filter or {}).items():
+        value = metadata.get(key)
+        for op, expected in (condition if isinstance(condition, dict) else {"$eq": condition}).items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op in ("$gte", "$lte") and (value is None or (value < expected if op == "$gte" else value > expected)):
+                return False
+    return True
+
+
+class _Namespace:
+    def __init__(self, dimension: int):
+        self.ids: list[str] = []
+        self.metadata: list[dict] = []
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+
+
+class InMemoryIndex:
+    """Exact cosine-similarity index answering the subset of the Pinecone `Index` API we use, namespaces included."""
+
+    def __init__(self, dimension: int = 384, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self._namespaces: dict[str, _Namespace] = {}
+
+    def upsert(self, vectors: list[dict], namespace: str = "", **kwargs):
+        rows = np.asarray([v["values"] for v in vectors], dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        rows = rows / np.where(norms == 0, 1, norms)
+        space = self._namespaces.setdefault(namespace, _Namespace(self.dimension))
+        space.ids.extend(v["id"] for v in vectors)
+        space.metadata.extend(v.get("metadata", {}) for v in vectors)
+        space.matrix = np.vstack([space.matrix, rows])
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, namespace: str = "",
+              filter: dict | None = None, include_values: bool = False, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        space = self._namespaces.get(namespace)
+        if space is None or not space.ids:
+            return {"matches": []}
+        scores = space.matrix @ np.asarray(vector, dtype=np.float32)
+        matches = []
+        # Like Pinecone, only this namespace is scanned and the filter applies before top_k
+        for i in np.argsort(-scores):
+            if not matches_filter(space.metadata[i], filter):
+                continue
+            match = {"id": space.ids[i], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = space.metadata[i]
+            if include_values:
+                match["values"] = space.matrix[i].tolist()
+            matches.append(match)
+            if len(matches) == top_k:
+                break
+        return {"matches": matches}
+
+    def fetch(self, ids: list[str], namespace: str = "", **kwargs):
+        space = self._namespaces.get(namespace)
+        positions = {chunk_id: i for i, chunk_id in enumerate(space.ids)} if space else {}
+        return {"vectors": {
+            chunk_id: {"id": chunk_id, "values": space.matrix[positions[chunk_id]].tolist(),
+                       "metadata": space.metadata[positions[chunk_id]]}
+            for chunk_id in ids if chunk_id in positions
+        }}
+
+
+class FakeRateLimitError(Exception):
+    """What the Gemini SDK raises when the quota is exceeded"""
+    status_code = 429
+
+    def __init__(self, message: str = "429 Resource has been exhausted (e.g. check quota)."):
+        super().__init__(message)
+
+
+class FakeQuota:
+    """
+    Provider-side limits shared by every FakeChatModel that holds it: calls beyond
+    `max_concurrent` in flight, and every `rate_limit_every`-th call, fail with a 429;
+    every `tail_every`-th call takes `tail_latency` longer.
+    """
+
+    def __init__(self, max_concurrent: int = 0, rate_limit_every: int = 0, tail_every: int = 0,
+                 tail_latency: float = 0.0):
+        self.max_concurrent = max_concurrent
+        self.rate_limit_every = rate_limit_every
+        self.tail_every = tail_every
+        self.tail_latency = tail_latency
+        self.calls = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> float:
+        """Admit one call and return its extra latency, or raise FakeRateLimitError"""
+        with self._lock:
+            self.calls += 1
+            if (self.max_concurrent and self.in_flight >= self.max_concurrent) or (
+                    self.rate_limit_every and self.calls % self.rate_limit_every == 0):
+                self.rate_limited += 1
+                raise FakeRateLimitError()
+            self.in_flight += 1
+            return self.tail_latency if self.tail_every and self.calls % self.tail_every == 0 else 0.0
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model with configurable latency and output length.
+
+    When functions are bound (as by the OpenAI-functions agent) and no tool has run yet,
+    it calls the first function with the latest human message; otherwise it answers with
+    the first `script` entry whose key appears in the system prompt, or with filler text.
+    With a `FakeQuota`, calls are rate limited and slowed as the quota dictates.
+    """
+    latency: float = 0.0
+    tokens: int = 64
+    script: dict[str, str] = {}
+    quota: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, messages, **kwargs) -> AIMessage:
+        functions = kwargs.get("functions")
+        tool_ran = any(isinstance(m, (FunctionMessage, ToolMessage)) for m in messages)
+        human = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if functions and not tool_ran:
+            function = functions[0]
+            argument = next(iter(function.get("parameters", {}).get("properties", {})), "input")
+            return AIMessage(
+                content="",
+                additional_kwargs={"function_call": {
+                    "name": function["name"],
+                    "arguments": json.dumps({argument: str(human)}),
+                }},
+            )
+
+        system = " ".join(str(m.content) for m in messages if isinstance(m, SystemMessage))
+        for key, reply in self.script.items():
+            if key in system:
+                return AIMessage(content=reply)
+
+        seed = _stable_hash(str(messages[-1].content) if messages else "")
+        words = [FILLER_WORDS[(seed + i * 7) % len(FILLER_WORDS)] for i in range(self.tokens)]
+        return AIMessage(content=" ".join(words) + " [Source 1]")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        extra = self.quota.enter() if self.quota else 0.0
+        try:
+            if self.latency + extra:
+                time.sleep(self.latency + extra)
+        finally:
+            if self.quota:
+                self.quota.exit()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        extra = self.quota.enter() if self.quota else 0.0
+        try:
+            if self.latency + extra:
+                await asyncio.sleep(self.latency + extra)
+        finally:
+            if self.quota:
+                self.quota.exit()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
@@ -0,0 +1,145 @@
+"""
+Offline benchmark for the LLM call governor (`src/utils/llm_governor.py`).
+
+Fires a stream of mixed interactive and batch calls at a `FakeChatModel` behind a
+`FakeQuota` that answers 429 once too many calls are in flight and makes a few calls
+slow, then compares three runs:
+
+- `ungoverned`: every call goes straight to the model and retries 429s itself,
+  with the same retry budget and backoff the governor uses
+- `governed`: calls go through an `LLMGovernor` (adaptive limit, priorities, retries)
+- `hedged`: the same, with interactive calls hedged after `--hedge-after` seconds
+
+For each run it reports the success rate and p50 / p95 latency per priority, the
+number of 429s the provider returned and, for governed runs, the limit it settled at.
+
+Usage (from the Query-Agent root):
+    python -m src.benchmarks.governor_benchmark --requests 400 --rate 200 --output governor_bench.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from langchain_core.messages import HumanMessage
+
+from src.benchmarks.fakes import FakeChatModel, FakeQuota
+from src.benchmarks.workflow_benchmark import git_commit, summarize
+from src.utils.llm_governor import BATCH, INTERACTIVE, PRIORITY_NAMES, LLMGovernor, governed, is_rate_limit, llm_priority
+
+MODES = ("ungoverned", "governed", "hedged")
+
+
+async def call_ungoverned(llm, message, max_retries: int, retry_backoff: float):
+    for attempt in range(max_retries + 1):
+        try:
+            return await llm.ainvoke(message)
+        except Exception as e:
+            if not is_rate_limit(e) or attempt == max_retries:
+                raise
+            await asyncio.sleep(retry_backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+async def run_mode(mode: str, args) -> dict:
+    random.seed(args.seed)
+    quota = FakeQuota(max_concurrent=args.provider_concurrency, tail_every=args.tail_every,
+                      tail_latency=args.tail_latency)
+    model = FakeChatModel(latency=args.latency, tokens=8, quota=quota)
+    governor = None
+    if mode != "ungoverned":
+        governor = LLMGovernor(
+            initial=args.initial_limit, max_limit=args.max_limit, limits={}, max_retries=args.max_retries,
+            retry_backoff=args.retry_backoff, latency_target=0.0,
+            hedge_after=args.hedge_after if mode == "hedged" else 0.0,
+        )
+        model = governed(model, model_key="fake-chat", governor=governor)
+
+    results = {name: {"latencies": [], "failed": 0} for name in PRIORITY_NAMES.values()}
+
+    async def request(index: int, priority: int):
+        message = [HumanMessage(content=f"request {index}")]
+        started = time.perf_counter()
+        with llm_priority(priority):
+            try:
+                if governor is None:
+                    await call_ungoverned(model, message, args.max_retries, args.retry_backoff)
+                else:
+                    await model.ainvoke(message)
+            except Exception:
+                results[PRIORITY_NAMES[priority]]["failed"] += 1
+                return
+        results[PRIORITY_NAMES[priority]]["latencies"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for index in range(args.requests):
+        priority = INTERACTIVE if random.random() < args.interactive_share else BATCH
+        tasks.append(asyncio.create_task(request(index, priority)))
+        await asyncio.sleep(random.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    report = {"mode": mode, "elapsed_s": round(elapsed, 3), "provider_calls": quota.calls,
+              "provider_429s": quota.rate_limited, "priorities": {}}
+    for name, result in results.items():
+        total = len(result["latencies"]) + result["failed"]
+        if not total:
+            continue
+        report["priorities"][name] = {
+            "requests": total,
+            "success_rate": round(len(result["latencies"]) / total, 4),
+            **(summarize(result["latencies"]) if result["latencies"] else {}),
+        }
+    if governor is not None:
+        report["governor"] = governor.snapshot()["fake-chat"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM governor benchmark")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200.0, help="Mean arrivals per second")
+    parser.add_argument("--interactive-share", type=float, default=0.25)
+    parser.add_argument("--latency", type=float, default=0.05, help="Model latency per call (s)")
+    parser.add_argument("--provider-concurrency", type=int, default=8, help="Calls in flight before the fake 429s")
+    parser.add_argument("--tail-every", type=int, default=25, help="Every Nth call is slow")
+    parser.add_argument("--tail-latency", type=float, default=0.5)
+    parser.add_argument("--initial-limit", type=int, default=16)
+    parser.add_argument("--max-limit", type=int, default=32)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--retry-backoff", type=float, default=0.05)
+    parser.add_argument("--hedge-after", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="governor_benchmark.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    for mode in args.modes:
+        result = asyncio.run(run_mode(mode, args))
+        results.append(result)
+        parts = [f"{mode:<11} 429s={result['provider_429s']:<5}"]
+        for name, stats in result["priorities"].items():
+            parts.append(f"{name}: ok={stats['success_rate']:.1%} p50={stats.get('p50_ms')}ms p95={stats.get('p95_ms')}ms")
+        if "governor" in result:
+            parts.append(f"limit={result['governor']['limit']} hedged={result['governor']['hedged']}")
+        print("  ".join(parts))
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("modes", "output")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
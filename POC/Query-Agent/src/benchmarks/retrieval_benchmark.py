@@ -0,0 +1,315 @@
+"""
+Retrieval quality-vs-latency benchmark over the shipped corpora.
+
+Each golden question names the passage that answers it (`retrieval_golden.json`).
+For every configuration (chunker, chunk size, encoder) the documents are chunked,
+embedded and loaded into a local in-memory index; each query-time setting (hybrid
+weight, reranker) is then scored for recall@k and MRR next to ingest time, index
+size and query latency. A retrieved chunk counts as relevant when it covers at least
+half of the answer passage (or half of the chunk is answer, for chunks smaller than
+the passage), so configurations with different chunk sizes are compared fairly.
+
+Usage (from the Query-Agent root):
+    python -m src.benchmarks.retrieval_benchmark --encoders hashing all-MiniLM-L6-v2
+    python -m src.benchmarks.retrieval_benchmark --chunkers character semantic --rerank none cross-encoder/ms-marco-MiniLM-L-6-v2
+"""
+import argparse
+import itertools
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.benchmarks.fakes import HashingEmbedder, InMemoryIndex, WORD_RE
+from src.benchmarks.workflow_benchmark import git_commit, summarize
+from src.utils.chunk_store import ChunkStore
+from src.utils.embeddings import GRAPHS, EncoderEmbeddings, load_embedding_model
+
+GOLDEN_PATH = Path(__file__).with_name("retrieval_golden.json")
+# `character` is the media-monitoring ingest splitter, `semantic` is the Pinecone uploader's
+CHUNKERS = ("character", "recursive", "semantic")
+CANDIDATES = 20
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def extract_text(path: Path) -> str:
+    """Page text with line breaks kept, as the media-monitoring ingest extracts it"""
+    from pypdf import PdfReader
+
+    return "\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+
+
+def load_golden(path: Path = GOLDEN_PATH) -> tuple[list[dict], list[dict]]:
+    """Returns (documents, questions); every evidence passage must occur in its document"""
+    documents, questions = [], []
+    for entry in json.loads(Path(path).read_text(encoding="utf-8")):
+        document_path = (project_root / entry["document"]).resolve()
+        text = extract_text(document_path)
+        flat = normalize(text)
+        documents.append({"name": document_path.name, "text": text, "flat": flat})
+        for item in entry["questions"]:
+            evidence = normalize(item["evidence"])
+            start = flat.find(evidence)
+            if start < 0:
+                raise ValueError(f"Evidence not found in {document_path.name}: {item['evidence']!r}")
+            questions.append({
+                "question": item["question"], "document": document_path.name,
+                "span": (start, start + len(evidence)),
+            })
+    return documents, questions
+
+
+_encoders = {}
+
+
+def get_encoder(name: str):
+    if name not in _encoders:
+        if name == "hashing":
+            _encoders[name] = HashingEmbedder()
+        elif name in GRAPHS:
+            _encoders[name] = load_embedding_model(name)
+        else:
+            from sentence_transformers import SentenceTransformer
+            _encoders[name] = SentenceTransformer(name)
+    return _encoders[name]
+
+
+_rerankers = {}
+
+
+def get_reranker(name: str):
+    if name not in _rerankers:
+        from sentence_transformers import CrossEncoder
+        _rerankers[name] = CrossEncoder(name)
+    return _rerankers[name]
+
+
+def chunk(text: str, chunker: str, chunk_size: int | None, encoder) -> list[str]:
+    if chunker == "character":
+        from langchain_text_splitters import CharacterTextSplitter
+        splitter = CharacterTextSplitter(separator="\n", chunk_size=chunk_size, chunk_overlap=chunk_size // 4)
+        return splitter.split_text(text)
+    if chunker == "recursive":
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_size // 4)
+        return splitter.split_text(text)
+    if chunker == "semantic":
+        from langchain_experimental.text_splitter import SemanticChunker
+        # The uploader chunks the whitespace-collapsed loader output
+        splitter = SemanticChunker(EncoderEmbeddings(encoder), breakpoint_threshold_type="percentile")
+        return [document.page_content for document in splitter.create_documents([normalize(text)])]
+    raise ValueError(f"Unknown chunker: {chunker}")
+
+
+def locate(chunks: list[str], flat: str) -> list[tuple[int, int] | None]:
+    """Character span of each chunk in the whitespace-normalized document"""
+    spans, cursor = [], 0
+    for text in chunks:
+        text = normalize(text)
+        start = flat.find(text, cursor)
+        if start < 0:
+            start = flat.find(text)
+        spans.append((start, start + len(text)) if start >= 0 else None)
+        if start >= 0:
+            cursor = start + 1
+    return spans
+
+
+def is_relevant(chunk_meta: dict, question: dict) -> bool:
+    if chunk_meta["document"] != question["document"] or chunk_meta["start"] < 0:
+        return False
+    start, end = question["span"]
+    overlap = min(end, chunk_meta["end"]) - max(start, chunk_meta["start"])
+    return overlap >= 0.5 * min(end - start, chunk_meta["end"] - chunk_meta["start"])
+
+
+class BM25:
+    """Okapi BM25 over the indexed chunks, for the lexical half of hybrid search"""
+
+    def __init__(self, texts: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.docs = [Counter(WORD_RE.findall(text.lower())) for text in texts]
+        self.lengths = np.array([sum(doc.values()) for doc in self.docs], dtype=np.float32)
+        self.avg_length = float(self.lengths.mean()) if len(self.docs) else 0.0
+        frequency = Counter(term for doc in self.docs for term in doc)
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in frequency.items()}
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / (self.avg_length or 1))
+        for term in set(WORD_RE.findall(query.lower())):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            tf = np.array([doc.get(term, 0) for doc in self.docs], dtype=np.float32)
+            scores += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+def _min_max(values: dict) -> dict:
+    if not values:
+        return {}
+    low, high = min(values.values()), max(values.values())
+    return {key: (value - low) / (high - low) if high > low else 1.0 for key, value in values.items()}
+
+
+def build_index(documents: list[dict], chunker: str, chunk_size: int | None, encoder) -> dict:
+    started = time.perf_counter()
+    texts, metadata = [], []
+    for document in documents:
+        chunks = chunk(document["text"], chunker, chunk_size, encoder)
+        for text, span in zip(chunks, locate(chunks, document["flat"])):
+            texts.append(text)
+            metadata.append({
+                "chunk_text": text, "document": document["name"],
+                "start": span[0] if span else -1, "end": span[1] if span else -1,
+            })
+    vectors = np.asarray(encoder.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    index = InMemoryIndex(dimension=vectors.shape[1])
+    index.upsert(vectors=[
+        {"id": str(i), "values": vector, "metadata": meta} for i, (vector, meta) in enumerate(zip(vectors, metadata))
+    ])
+    ingest_s = time.perf_counter() - started
+    # Lean payloads: the vector store keeps ids, vectors and the document name; text goes to the chunk store
+    chunk_store = ChunkStore(":memory:")
+    chunk_store.put_many("", [
+        (str(i), meta["chunk_text"], {key: value for key, value in meta.items() if key != "chunk_text"})
+        for i, meta in enumerate(metadata)
+    ])
+    return {
+        "index": index, "texts": texts, "metadata": metadata, "bm25": BM25(texts),
+        "ingest_s": ingest_s,
+        # What a vector store holds: float32 vectors plus the chunk text in metadata
+        "index_bytes": int(vectors.nbytes) + len(json.dumps(metadata).encode("utf-8")),
+        "lean_index_bytes": int(vectors.nbytes) + len(json.dumps([{"document": m["document"]} for m in metadata]).encode("utf-8")),
+        "chunk_store_bytes": chunk_store.stats.stored_bytes,
+        "unlocated": sum(meta["start"] < 0 for meta in metadata),
+    }
+
+
+def retrieve(built: dict, encoder, question: str, top_k: int, hybrid_alpha: float, reranker: str | None) -> list[int]:
+    """Chunk positions, best first: dense (or dense+BM25 fused) candidates, optionally cross-encoder reranked"""
+    depth = max(top_k, CANDIDATES) if (reranker or hybrid_alpha < 1) else top_k
+    vector = encoder.encode(question, convert_to_numpy=True)
+    matches = built["index"].query(vector=vector, top_k=depth)["matches"]
+    dense = {int(match["id"]): match["score"] for match in matches}
+    if hybrid_alpha < 1:
+        lexical_scores = built["bm25"].scores(question)
+        lexical = {int(i): float(lexical_scores[i]) for i in np.argsort(-lexical_scores)[:depth]}
+        dense, lexical = _min_max(dense), _min_max(lexical)
+        fused = {i: hybrid_alpha * dense.get(i, 0.0) + (1 - hybrid_alpha) * lexical.get(i, 0.0) for i in {*dense, *lexical}}
+        ranked = sorted(fused, key=fused.get, reverse=True)[:depth]
+    else:
+        ranked = list(dense)
+    if reranker:
+        scores = get_reranker(reranker).predict([(question, built["texts"][i]) for i in ranked])
+        ranked = [ranked[i] for i in np.argsort(-np.asarray(scores))]
+    return ranked[:top_k]
+
+
+def evaluate(built: dict, encoder, questions: list[dict], top_ks: list[int], hybrid_alpha: float,
+             reranker: str | None) -> dict:
+    max_k = max(top_ks)
+    hits = {k: 0 for k in top_ks}
+    reciprocal_ranks, latencies, misses = [], [], []
+    for question in questions:
+        started = time.perf_counter()
+        ranked = retrieve(built, encoder, question["question"], max_k, hybrid_alpha, reranker)
+        latencies.append(time.perf_counter() - started)
+        rank = next((r for r, i in enumerate(ranked, 1) if is_relevant(built["metadata"][i], question)), None)
+        for k in top_ks:
+            hits[k] += rank is not None and rank <= k
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(question["question"])
+    return {
+        **{f"recall@{k}": round(hits[k] / len(questions), 4) for k in top_ks},
+        "mrr": round(sum(reciprocal_ranks) / len(questions), 4),
+        "query_latency": summarize(latencies),
+        "misses": misses,
+    }
+
+
+def configurations(chunkers, chunk_sizes, encoders):
+    for chunker, encoder in itertools.product(chunkers, encoders):
+        # The semantic chunker picks its own boundaries; size does not apply
+        for size in ([None] if chunker == "semantic" else chunk_sizes):
+            yield chunker, size, encoder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrieval quality-vs-latency benchmark")
+    parser.add_argument("--golden", default=str(GOLDEN_PATH), help="Golden question→passage set")
+    parser.add_argument("--chunkers", nargs="+", choices=CHUNKERS, default=list(CHUNKERS))
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[80, 200, 500, 1000])
+    parser.add_argument("--encoders", nargs="+", default=["all-MiniLM-L6-v2"],
+                        help="SentenceTransformer model names, `onnx`/`onnx-int8` for the exported MiniLM, "
+                             "or `hashing` for the offline encoder")
+    parser.add_argument("--top-k", nargs="+", type=int, default=[1, 3, 5, 10])
+    parser.add_argument("--hybrid-alpha", nargs="+", type=float, default=[1.0, 0.5],
+                        help="Dense weight in dense+BM25 fusion (1.0 = dense only)")
+    parser.add_argument("--rerank", nargs="+", default=["none"],
+                        help="`none` or CrossEncoder model names, applied to the top 20 candidates")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    args = parser.parse_args(argv)
+
+    documents, questions = load_golden(Path(args.golden))
+    print(f"{len(questions)} golden questions over {len(documents)} documents")
+    results = []
+    for chunker, size, encoder_name in configurations(args.chunkers, args.chunk_sizes, args.encoders):
+        try:
+            encoder = get_encoder(encoder_name)
+            built = build_index(documents, chunker, size, encoder)
+        except ImportError as e:
+            print(f"SKIPPED {chunker}/{size}/{encoder_name}: {e}")
+            continue
+        for alpha, rerank in itertools.product(args.hybrid_alpha, args.rerank):
+            reranker = None if rerank == "none" else rerank
+            try:
+                scores = evaluate(built, encoder, questions, args.top_k, alpha, reranker)
+            except ImportError as e:
+                print(f"SKIPPED rerank={rerank}: {e}")
+                continue
+            result = {
+                "chunker": chunker, "chunk_size": size, "encoder": encoder_name,
+                "hybrid_alpha": alpha, "rerank": rerank,
+                "chunks": len(built["texts"]),
+                "mean_chunk_chars": round(sum(map(len, built["texts"])) / len(built["texts"]), 1),
+                "ingest_s": round(built["ingest_s"], 4),
+                "index_bytes": built["index_bytes"],
+                "lean_index_bytes": built["lean_index_bytes"],
+                "chunk_store_bytes": built["chunk_store_bytes"],
+                **scores,
+            }
+            results.append(result)
+            print(f"{chunker:<9} size={str(size):<5} {encoder_name:<18} alpha={alpha:<4} rerank={rerank:<6} "
+                  f"chunks={result['chunks']:<4} " + " ".join(f"R@{k}={result[f'recall@{k}']:.2f}" for k in args.top_k)
+                  + f" MRR={result['mrr']:.3f} ingest={result['ingest_s']:.2f}s p50={result['query_latency'].get('p50_ms')}ms")
+            if built["unlocated"]:
+                print(f"  {built['unlocated']} chunks could not be located in their document and never count as relevant")
+
+    report = {
+        "commit": git_commit(),
+        "questions": len(questions),
+        "documents": [document["name"] for document in documents],
+        "results": sorted(results, key=lambda r: (-r[f"recall@{max(args.top_k)}"], -r["mrr"])),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
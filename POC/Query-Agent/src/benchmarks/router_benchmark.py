@@ -0,0 +1,107 @@
+"""
+Accuracy and latency benchmark for the local query router.
+
+Usage (from the Query-Agent root):
+    python -m src.benchmarks.router_benchmark                # keyword rules only
+    python -m src.benchmarks.router_benchmark --embeddings   # rules + MiniLM nearest-centroid
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.agents.query_router import QueryRouter, ROUTES, CANNED, DIRECT, RETRIEVE
+
+# Held-out messages (none of them are router exemplars), labelled by the route they should take
+LABELLED_MESSAGES = [
+    ("hi", CANNED), ("Hello!", CANNED), ("hey there", CANNED), ("Good evening", CANNED),
+    ("namaste", CANNED), ("Sat Sri Akal ji", CANNED), ("hiii", CANNED), ("yo", CANNED),
+    ("thanks", CANNED), ("Thank you!", CANNED), ("thx", CANNED), ("thanks a ton", CANNED),
+    ("Much appreciated", CANNED), ("cheers mate", CANNED), ("bye", CANNED), ("Good night", CANNED),
+    ("see ya", CANNED), ("take care", CANNED), ("ok", CANNED), ("okay!", CANNED), ("cool", CANNED),
+    ("got it", CANNED), ("👍", CANNED), ("perfect", CANNED), ("help", CANNED),
+    ("what can you do?", CANNED), ("who are you", CANNED), ("how can you help me", CANNED),
+    ("how are you?", DIRECT), ("how are u doing", DIRECT), ("tell me a joke", DIRECT),
+    ("write a poem about rain", DIRECT), ("are you a bot?", DIRECT), ("are you human", DIRECT),
+    ("what's your name", DIRECT), ("lol", DIRECT), ("hahaha", DIRECT), ("can you sing", DIRECT),
+    ("What initiative did the federal government announce regarding AI?", RETRIEVE),
+    ("What trend did Statistics Canada report about electric vehicle sales in Q2 2025?", RETRIEVE),
+    ("What did the anonymous BCGEU member post on social media about the government's raise offer?", RETRIEVE),
+    ("What did Mayor Brenda Locke say about the City of Surrey budget?", RETRIEVE),
+    ("Which station covered the Surrey police transition?", RETRIEVE),
+    ("summarise yesterday's evening drive show", RETRIEVE),
+    ("and what about Q3?", RETRIEVE), ("thanks, and what about Q3?", RETRIEVE),
+    ("hi, what did the mayor say about housing?", RETRIEVE), ("housing crisis coverage", RETRIEVE),
+    ("any news on the BCGEU strike", RETRIEVE), ("who was the host of the news update", RETRIEVE),
+    ("ok so what did the minister announce", RETRIEVE), ("budget 2025 agriculture measures", RETRIEVE),
+    ("tell me about the makhana board", RETRIEVE), ("list stories mentioning tariffs", RETRIEVE),
+    ("Is there anything on the transit referendum?", RETRIEVE), ("EV sales", RETRIEVE),
+    ("What did the opposition say about the strike?", RETRIEVE),
+    ("Help me find coverage of the Surrey council meeting", RETRIEVE),
+]
+
+
+def evaluate(router: QueryRouter, messages=LABELLED_MESSAGES) -> dict:
+    confusion = {expected: {predicted: 0 for predicted in ROUTES} for expected in ROUTES}
+    mistakes = []
+    latencies = []
+    for text, expected in messages:
+        start = time.perf_counter()
+        decision = router.route(text)
+        latencies.append(time.perf_counter() - start)
+        confusion[expected][decision.route] += 1
+        if decision.route != expected:
+            mistakes.append({"message": text, "expected": expected, "predicted": decision.route, "reason": decision.reason})
+
+    correct = sum(confusion[route][route] for route in ROUTES)
+    per_route = {}
+    for route in ROUTES:
+        predicted = sum(confusion[expected][route] for expected in ROUTES)
+        actual = sum(confusion[route].values())
+        per_route[route] = {
+            "precision": round(confusion[route][route] / predicted, 4) if predicted else None,
+            "recall": round(confusion[route][route] / actual, 4) if actual else None,
+        }
+    return {
+        "messages": len(messages),
+        "accuracy": round(correct / len(messages), 4),
+        # Sending a retrieval question down a cheap path loses the answer; this is the costly error
+        "retrieve_recall": per_route[RETRIEVE]["recall"],
+        "per_route": per_route,
+        "confusion": confusion,
+        "mean_latency_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+        "max_latency_us": round(max(latencies) * 1e6, 1),
+        "stats": router.stats.snapshot(),
+        "mistakes": mistakes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy benchmark for the query router")
+    parser.add_argument("--embeddings", action="store_true", help="Enable the MiniLM nearest-centroid stage")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    encoder = None
+    if args.embeddings:
+        from src.tools.query_tool import get_embedding_model
+        encoder = get_embedding_model()
+    router = QueryRouter(encoder=encoder)
+    if encoder is not None:
+        router.classify("warm up")  # builds the centroids outside the timed loop
+
+    report = evaluate(router)
+    print(json.dumps({k: v for k, v in report.items() if k != "mistakes"}, indent=2))
+    for mistake in report["mistakes"]:
+        print(f"MISROUTED {mistake['message']!r}: expected {mistake['expected']}, got {mistake['predicted']} ({mistake['reason']})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
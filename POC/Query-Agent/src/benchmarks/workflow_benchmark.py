@@ -0,0 +1,311 @@
+"""
+Offline benchmark for the agent workflows.
+
+Runs the real LangGraph graphs (`multi_agent_guardrails.workflow` and
+`create_query_workflow`) against deterministic stub chat models and an in-memory
+vector index, so orchestration overhead can be measured without Gemini or Pinecone.
+
+Usage (from the Query-Agent root):
+    python -m src.benchmarks.workflow_benchmark --concurrency 1 4 16 --output bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# Chat model constructors validate the key at import time; no request is ever sent
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.benchmarks.fakes import FakeChatModel, HashingEmbedder, InMemoryIndex
+from src.utils.deadline import degradation_stats, new_deadline
+
+# Example questions used across the agent modules
+DEFAULT_QUERIES = [
+    "What did the anonymous BCGEU member post on social media about the government's raise offer during the strike?",
+    "What initiative did the federal government announce regarding AI?",
+    "What trend did Statistics Canada report about electric vehicle sales in Q2 2025?",
+    "Hello! How can you help me with document management?",
+]
+
+SEED_PASSAGES = [
+    "An anonymous BCGEU member posted on social media that the government's raise offer during the strike was insulting.",
+    "The federal government announced a national AI compute initiative to support Canadian researchers and startups.",
+    "Statistics Canada reported that electric vehicle sales declined in Q2 2025 after federal rebates were paused.",
+    "The city council approved a new transit budget focused on bus rapid transit corridors.",
+    "The provincial minister announced investment in rural broadband and healthcare programs.",
+]
+
+EVALUATOR_REPLY = (
+    "HALLUCINATIONS_FOUND: NO\nCITATIONS_COMPLETE: YES\nACCURACY_SCORE: 8\n"
+    "ISSUES: none\nFEEDBACK: Response is grounded in the sources."
+)
+
+WORKFLOWS = ("guardrails", "query")
+
+
+def build_retrieval_stub(passages: list[str], embed_latency: float, vector_latency: float):
+    """Seed an in-memory index (and, with lean payloads, a chunk store) and route `get_context` through the stubs"""
+    from settings import LEAN_VECTOR_PAYLOADS
+    from src.tools.query_tool import configure_retrieval
+    from src.utils.chunk_store import ChunkStore
+
+    embedder = HashingEmbedder(latency=embed_latency)
+    index = InMemoryIndex(dimension=embedder.dimension, latency=vector_latency)
+    chunk_store = ChunkStore(":memory:")
+    vectors = embedder.encode(passages)
+    index.upsert(vectors=[
+        {"id": f"chunk_{i}", "values": v.tolist(),
+         "metadata": {} if LEAN_VECTOR_PAYLOADS else {"chunk_text": text, "chunk_id": i}}
+        for i, (v, text) in enumerate(zip(vectors, passages))
+    ])
+    chunk_store.put_many("", [(f"chunk_{i}", text, {"chunk_id": i}) for i, text in enumerate(passages)])
+    configure_retrieval(embedding_model=embedder, index=index, chunk_store=chunk_store)
+    return index
+
+
+def build_workflow(name: str, llm_latency: float, llm_tokens: int, deadline: float | None = None):
+    """Return (compiled graph, invoke config, initial state factory) for a workflow"""
+    from src.agents.retriver_agent import create_query_agent
+
+    def chat_model_factory(temperature: float = 0.0):
+        return FakeChatModel(
+            latency=llm_latency,
+            tokens=llm_tokens,
+            script={"critical evaluator agent": EVALUATOR_REPLY},
+        )
+
+    query_agent = create_query_agent(llm=chat_model_factory(), verbose=False)
+
+    def deadline_keys() -> dict:
+        # Each request's clock starts when its state is built, i.e. when it leaves the queue
+        return {"deadline": new_deadline(deadline), "degradations": []} if deadline else {}
+
+    if name == "guardrails":
+        from src.agents.multi_agent_guardrails import workflow
+
+        def initial_state(query):
+            return {
+                "user_query": query,
+                "query_response": "",
+                "evaluation_state": "",
+                "retry_count": 0,
+                "instruction": "",
+                "route": "",
+                **deadline_keys(),
+            }
+
+        config = {"configurable": {"query_agent": query_agent, "chat_model_factory": chat_model_factory}}
+        return workflow, config, initial_state
+
+    from src.agents.multi_agent_workflow_old import create_query_workflow
+
+    def initial_state(query):
+        return {
+            "user_query": query,
+            "retrieved_documents": [],
+            "retrieved_chunks": [],
+            "reranked_documents": [],
+            "packed_context": "",
+            "analysis_result": "",
+            "evaluation_score": 0.0,
+            "evaluation_feedback": "",
+            "final_response": "",
+            "metadata": {},
+            "retry_count": 0,
+            "has_hallucinations": False,
+            "citations_complete": True,
+            **deadline_keys(),
+        }
+
+    config = {"configurable": {"query_agent": query_agent, "chat_model_factory": chat_model_factory}}
+    return create_query_workflow(), config, initial_state
+
+
+def run_once(workflow, config, state) -> tuple[float, dict[str, float]]:
+    """Stream one request through the graph, attributing wall time to each node"""
+    node_times: dict[str, float] = defaultdict(float)
+    start = last = time.perf_counter()
+    for update in workflow.stream(state, config=config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            node_times[node] += now - last
+        last = now
+    return time.perf_counter() - start, dict(node_times)
+
+
+async def arun_once(workflow, config, state) -> tuple[float, dict[str, float]]:
+    """Async variant of `run_once` driving the graph through `astream`"""
+    node_times: dict[str, float] = defaultdict(float)
+    start = last = time.perf_counter()
+    async for update in workflow.astream(state, config=config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            node_times[node] += now - last
+        last = now
+    return time.perf_counter() - start, dict(node_times)
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    data = np.asarray(values) * 1000.0
+    return {
+        "mean_ms": round(float(data.mean()), 3),
+        "p50_ms": round(float(np.percentile(data, 50)), 3),
+        "p95_ms": round(float(np.percentile(data, 95)), 3),
+        "p99_ms": round(float(np.percentile(data, 99)), 3),
+    }
+
+
+def run_threads(workflow, config, initial_state, requests: list[str], concurrency: int) -> list:
+    """Run requests on a thread pool through `workflow.stream`"""
+    def task(query):
+        return run_once(workflow, config, initial_state(query))
+
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(task, q) for q in requests]:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def run_async(workflow, config, initial_state, requests: list[str], concurrency: int) -> list:
+    """Run requests as coroutines on one event loop through `workflow.astream`"""
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def task(query):
+            async with semaphore:
+                return await arun_once(workflow, config, initial_state(query))
+
+        return await asyncio.gather(*(task(q) for q in requests), return_exceptions=True)
+
+    return asyncio.run(run_all())
+
+
+def run_level(workflow, config, initial_state, queries: list[str], concurrency: int, repeat: int, mode: str = "sync") -> dict:
+    requests = [q for _ in range(repeat) for q in queries]
+    latencies: list[float] = []
+    per_node: dict[str, list[float]] = defaultdict(list)
+    errors = 0
+
+    runner = run_async if mode == "async" else run_threads
+    start = time.perf_counter()
+    outcomes = runner(workflow, config, initial_state, requests, concurrency)
+    wall = time.perf_counter() - start
+
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors += 1
+            continue
+        latency, node_times = outcome
+        latencies.append(latency)
+        for node, seconds in node_times.items():
+            per_node[node].append(seconds)
+
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "wall_time_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency": summarize(latencies) if latencies else {},
+        "nodes": {node: {"calls": len(v), **summarize(v)} for node, v in sorted(per_node.items())},
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=project_root, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_queries(path: str | None) -> list[str]:
+    """Read a replayable corpus: one JSON object with a `query` key (or a bare string) per line"""
+    if not path:
+        return DEFAULT_QUERIES
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                queries.append(item["query"] if isinstance(item, dict) else item)
+    return queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the agent workflows")
+    parser.add_argument("--workflows", nargs="+", choices=WORKFLOWS, default=list(WORKFLOWS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync",
+                        help="Drive the graphs with threads + invoke, or one event loop + ainvoke")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each query is replayed per level")
+    parser.add_argument("--queries", help="JSONL corpus of queries to replay")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per stub LLM call")
+    parser.add_argument("--llm-tokens", type=int, default=64, help="Words in each stub LLM answer")
+    parser.add_argument("--embed-latency", type=float, default=0.005)
+    parser.add_argument("--vector-latency", type=float, default=0.01)
+    parser.add_argument("--deadline", type=float, help="Per-request deadline in seconds (none by default)")
+    parser.add_argument("--output", default="workflow_benchmark.json")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.queries)
+    build_retrieval_stub(SEED_PASSAGES, args.embed_latency, args.vector_latency)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "mode": args.mode,
+            "python": platform.python_version(),
+            "queries": len(queries),
+            "repeat": args.repeat,
+            "llm_latency_s": args.llm_latency,
+            "llm_tokens": args.llm_tokens,
+            "embed_latency_s": args.embed_latency,
+            "vector_latency_s": args.vector_latency,
+            "deadline_s": args.deadline,
+        },
+        "workflows": {},
+    }
+
+    for name in args.workflows:
+        workflow, config, initial_state = build_workflow(name, args.llm_latency, args.llm_tokens, args.deadline)
+        levels = {}
+        for concurrency in args.concurrency:
+            # The nodes print their progress; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                levels[str(concurrency)] = run_level(
+                    workflow, config, initial_state, queries, concurrency, args.repeat, args.mode
+                )
+            result = levels[str(concurrency)]
+            print(f"{name:<10} c={concurrency:<3} p50={result['latency'].get('p50_ms')}ms "
+                  f"p95={result['latency'].get('p95_ms')}ms rps={result['throughput_rps']} errors={result['errors']}")
+        report["workflows"][name] = levels
+
+    # Skips taken to meet --deadline, so thresholds can be tuned against latency
+    report["degradations"] = degradation_stats()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Benchmark report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
+import bisect
 import os
 import re
+from dataclasses import dataclass, field
 from pathlib import Path
 from pypdf import PdfReader
-from llama_index.core import SimpleDirectoryReader
+
+@dataclass
+class LoadedDocument:
+    """One file's text, with the offset in `text` at which each page starts"""
+    name: str
+    text: str
+    page_starts: list = field(default_factory=list)  # (offset, 1-based page number), ascending
+
+    def page_at(self, offset: int):
+        """Page containing character `offset`, or None for files without pages"""
+        if not self.page_starts:
+            return None
+        position = bisect.bisect_right([start for start, _ in self.page_starts], offset) - 1
+        return self.page_starts[max(position, 0)][1]
 
 class DocumentLoader:
     """Document loader that properly extracts text from PDFs and other file types."""
@@ -12,29 +27,24 @@ class DocumentLoader:
         self.project_root = Path(__file__).resolve().parent.parent.parent
         self.documents_dir = self.project_root / documents_dir
     
-    def _extract_pdf_text(self, pdf_path: Path) -> str:
-        """Extract text from PDF using pypdf."""
+    def _extract_pdf_pages(self, pdf_path: Path) -> list[str]:
+        """Extract the whitespace-collapsed text of each PDF page; empty pages stay as ""."""
         try:
             reader = PdfReader(str(pdf_path))
-            full_text = ""
-            
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + " "
-            
-            # Clean up text
-            full_text = re.sub(r'\n+', ' ', full_text)
-            full_text = re.sub(r'\s+', ' ', full_text)
-            return full_text.strip()
-            
+            return [re.sub(r'\s+', ' ', page.extract_text() or '').strip() for page in reader.pages]
         except Exception as e:
             print(f"Error extracting PDF {pdf_path.name}: {e}")
-            return ""
+            return []
+
+    def _extract_pdf_text(self, pdf_path: Path) -> str:
+        """Extract text from PDF using pypdf."""
+        return " ".join(page for page in self._extract_pdf_pages(pdf_path) if page)
     
     def _extract_other_text(self, file_path: Path) -> str:
         """Extract text from non-PDF files using LlamaIndex."""
         try:
+            from llama_index.core import SimpleDirectoryReader
+
             reader = SimpleDirectoryReader(
                 input_files=[str(file_path)],
                 required_exts=[".txt", ".md", ".docx"]
@@ -49,6 +59,25 @@ class DocumentLoader:
             print(f"Error extracting {file_path.name}: {e}")
             return ""
     
+    def document_paths(self) -> list[Path]:
+        """Files in the documents folder, in name order"""
+        if not self.documents_dir.exists():
+            return []
+        return sorted(path for path in self.documents_dir.iterdir() if path.is_file())
+
+    def load_document(self, file_path: Path) -> LoadedDocument:
+        """Extract one file; PDF pages are joined by a space and their start offsets kept"""
+        if file_path.suffix.lower() != '.pdf':
+            return LoadedDocument(file_path.name, self._extract_other_text(file_path))
+        parts, page_starts, offset = [], [], 0
+        for number, page in enumerate(self._extract_pdf_pages(file_path), start=1):
+            if not page:
+                continue
+            page_starts.append((offset, number))
+            parts.append(page)
+            offset += len(page) + 1
+        return LoadedDocument(file_path.name, " ".join(parts), page_starts)
+
     def load_and_combine_text(self) -> str:
         """
         Load all documents from the folder and return combined text.
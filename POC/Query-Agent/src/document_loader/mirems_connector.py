@@ -0,0 +1,246 @@
+"""
+Incremental connector for the MIREMS stories API.
+
+Radio files are listed in ascending id order after a persisted high-water mark
+(the last radio file whose stories reached Pinecone), their stories are fetched
+concurrently with a bounded pool, and each radio file is handed to the uploader as
+soon as it arrives. The cursor only moves past a radio file once it has been
+uploaded, so a crash or a failed fetch resumes from the first unfinished file.
+
+Usage (from the Query-Agent root):
+    python -m src.document_loader.mirems_connector --client-id 5
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from settings import (
+    MIREMS_API_URL, MIREMS_API_TOKEN, MIREMS_CLIENT_ID, MIREMS_PROMPT_ID, MIREMS_MODEL_TYPE,
+    MIREMS_CURSOR_PATH, MIREMS_FETCH_CONCURRENCY, MIREMS_MAX_RETRIES,
+)
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+SOURCE = "mirems"
+
+
+class MiremsAPIError(RuntimeError):
+    pass
+
+
+@dataclass
+class RadioFileStories:
+    radiofile_id: int
+    outlet: str | None
+    published: str | None
+    stories: list = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(filter(None, (story_text(story) for story in self.stories)))
+
+
+def _records(payload) -> list:
+    """The API wraps lists in `data` (sometimes nested one level); accept a bare list too"""
+    while isinstance(payload, dict):
+        payload = payload.get("data", payload.get("results", []))
+    return list(payload or [])
+
+
+def _first(record: dict, *keys):
+    for key in keys:
+        if record.get(key) not in (None, ""):
+            return record[key]
+    return None
+
+
+def story_text(story) -> str:
+    if isinstance(story, str):
+        return story.strip()
+    parts = [_first(story, "title", "headline"), _first(story, "summary", "story", "content", "text", "transcript")]
+    return "\n".join(str(part).strip() for part in parts if part)
+
+
+class CursorStore:
+    """High-water marks per client in a small JSON file, replaced atomically on every save"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def get(self, client_id) -> int:
+        return int(self._read().get(str(client_id), {}).get("last_radiofile_id", 0))
+
+    def set(self, client_id, radiofile_id: int) -> None:
+        cursors = self._read()
+        cursors[str(client_id)] = {
+            "last_radiofile_id": int(radiofile_id),
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(cursors, indent=2), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class MiremsStoriesConnector:
+    def __init__(self, client_id=MIREMS_CLIENT_ID, base_url: str = MIREMS_API_URL, token: str | None = MIREMS_API_TOKEN,
+                 prompt_id=MIREMS_PROMPT_ID, model_type: str = MIREMS_MODEL_TYPE,
+                 cursor_path: str = MIREMS_CURSOR_PATH, concurrency: int = MIREMS_FETCH_CONCURRENCY,
+                 max_retries: int = MIREMS_MAX_RETRIES, page_size: int = 100, timeout: float = 30.0,
+                 backoff: float = 0.5):
+        if client_id in (None, ""):
+            raise ValueError("MIREMS_CLIENT_ID (or --client-id) is required")
+        if not token:
+            raise ValueError("MIREMS_API_TOKEN is not set")
+        self.client_id = str(client_id)
+        self.prompt_id = prompt_id
+        self.model_type = model_type
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.page_size = page_size
+        self.backoff = backoff
+        self.cursors = CursorStore(cursor_path)
+        # One pooled client shared by the fetch threads; the pool is sized to the concurrency
+        self.http = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {token}", "Accept": "application/json"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, path: str, params: dict):
+        """GET with exponential backoff on timeouts, connection errors, 429 and 5xx"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.http.get(path, params=params)
+            except httpx.TransportError as e:
+                error, retry_after = e, None
+            else:
+                if response.status_code < 400:
+                    return response.json()
+                if response.status_code not in TRANSIENT_STATUS:
+                    hint = " (check MIREMS_API_TOKEN)" if response.status_code in (401, 403) else ""
+                    raise MiremsAPIError(f"GET {path} returned {response.status_code}{hint}: {response.text[:200]}")
+                error, retry_after = f"HTTP {response.status_code}", response.headers.get("Retry-After")
+            if attempt == self.max_retries:
+                raise MiremsAPIError(f"GET {path} failed after {attempt + 1} attempts: {error}")
+            delay = self.backoff * 2 ** attempt * (1 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+    def list_radio_files(self, after_id: int = 0):
+        """Radio files with an id above `after_id`, ascending, fetched one page at a time"""
+        while True:
+            page = _records(self._get("/radiofiles", {
+                "client_id": self.client_id, "after_id": after_id, "limit": self.page_size,
+            }))
+            page = sorted((record for record in page if int(record["id"]) > after_id), key=lambda r: int(r["id"]))
+            yield from page
+            if len(page) < self.page_size:
+                return
+            after_id = int(page[-1]["id"])
+
+    def fetch_stories(self, radio_file: dict) -> RadioFileStories:
+        radiofile_id = int(radio_file["id"])
+        stories = _records(self._get("/stories", {
+            "radiofile_id": radiofile_id, "client_id": self.client_id,
+            "prompt_id": self.prompt_id, "model_type": self.model_type,
+        }))
+        first = stories[0] if stories and isinstance(stories[0], dict) else {}
+        return RadioFileStories(
+            radiofile_id=radiofile_id,
+            outlet=_first(radio_file, "outlet", "station", "channel", "source_name") or _first(first, "outlet", "station"),
+            published=_first(radio_file, "broadcast_date", "published_at", "date", "created_at")
+            or _first(first, "published_at", "date"),
+            stories=stories,
+        )
+
+    def iter_stories(self, after_id: int | None = None):
+        """
+        Yield radio files in id order while up to `concurrency` fetches run ahead.
+        At most twice that many results are held, so memory stays flat on long backfills.
+        """
+        after_id = self.cursors.get(self.client_id) if after_id is None else after_id
+        radio_files = self.list_radio_files(after_id)
+        window = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="mirems-fetch") as pool:
+            pending = deque()
+            try:
+                for radio_file in radio_files:
+                    pending.append(pool.submit(self.fetch_stories, radio_file))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def sync(self, uploader, limit: int | None = None) -> dict:
+        """
+        Upload every radio file after the cursor through `uploader.upload_text` and
+        advance the cursor after each one. Stops at the first radio file that cannot be
+        fetched, leaving the cursor just before it for the next run.
+        """
+        started = time.perf_counter()
+        stats = {"radio_files": 0, "stories": 0, "chunks": 0, "error": None}
+        try:
+            for item in self.iter_stories():
+                if item.stories:
+                    stats["chunks"] += uploader.upload_text(
+                        item.text, client_id=self.client_id, source=SOURCE, outlet=item.outlet,
+                        published=item.published, id_prefix=f"mirems_{item.radiofile_id}",
+                        radiofile_id=item.radiofile_id,
+                    ) or 0
+                self.cursors.set(self.client_id, item.radiofile_id)
+                stats["radio_files"] += 1
+                stats["stories"] += len(item.stories)
+                if limit and stats["radio_files"] >= limit:
+                    break
+        except MiremsAPIError as e:
+            stats["error"] = str(e)
+            print(f"MIREMS sync stopped: {e}")
+        stats["cursor"] = self.cursors.get(self.client_id)
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pull new MIREMS stories into Pinecone")
+    parser.add_argument("--client-id", default=MIREMS_CLIENT_ID)
+    parser.add_argument("--base-url", default=MIREMS_API_URL, help="e.g. the URL printed by mirems_stub_server")
+    parser.add_argument("--concurrency", type=int, default=MIREMS_FETCH_CONCURRENCY)
+    parser.add_argument("--limit", type=int, help="Stop after this many radio files")
+    parser.add_argument("--reset", action="store_true", help="Start again from the first radio file")
+    args = parser.parse_args()
+
+    from src.Uploader.uploader_pinecone import MyDocumentUploader
+
+    with MiremsStoriesConnector(args.client_id, base_url=args.base_url, concurrency=args.concurrency) as connector:
+        if args.reset:
+            connector.cursors.set(connector.client_id, 0)
+        print(json.dumps(connector.sync(MyDocumentUploader(), limit=args.limit), indent=2))
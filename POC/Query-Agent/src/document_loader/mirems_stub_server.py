@@ -0,0 +1,156 @@
+"""
+Local stand-in for the MIREMS stories API, for exercising the connector offline.
+
+Serves `/radiofiles` and `/stories` with the same query parameters the connector
+sends, checks the bearer token, and can inject latency and transient 503s so the
+retry and concurrency paths are exercised.
+
+Usage (from the Query-Agent root):
+    python -m src.document_loader.mirems_stub_server --radio-files 200 --fail-every 7
+    MIREMS_API_TOKEN=stub-token python -m src.document_loader.mirems_connector \
+        --client-id 5 --base-url http://127.0.0.1:8765
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+OUTLETS = ["CBC Radio One", "CKNW", "News 1130", "CFAX 1070"]
+TOPICS = [
+    ("Transit budget approved", "The city council approved a new transit budget focused on bus rapid transit corridors."),
+    ("BCGEU strike update", "Union members called the government's latest raise offer insulting as the strike continued."),
+    ("Federal AI initiative", "The federal government announced a national AI compute initiative for researchers."),
+    ("EV sales dip", "Statistics Canada reported that electric vehicle sales declined after rebates were paused."),
+    ("Rural broadband", "The provincial minister announced investment in rural broadband and healthcare programs."),
+]
+
+
+def make_radio_files(count: int, client_id: str = "5", start_id: int = 1000) -> dict:
+    """Synthetic radio files with two or three stories each, keyed by id"""
+    radio_files = {}
+    for n in range(count):
+        radiofile_id = start_id + n
+        stories = [
+            {"title": f"{title} ({radiofile_id})", "summary": summary}
+            for title, summary in (TOPICS[(n + k) % len(TOPICS)] for k in range(2 + n % 2))
+        ]
+        radio_files[radiofile_id] = {
+            "id": radiofile_id,
+            "client_id": client_id,
+            "station": OUTLETS[n % len(OUTLETS)],
+            "broadcast_date": (date(2025, 1, 1) + timedelta(days=n % 365)).isoformat(),
+            "stories": stories,
+        }
+    return radio_files
+
+
+class StubMiremsServer:
+    def __init__(self, radio_files: dict, token: str = "stub-token", host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, fail_every: int = 0):
+        self.radio_files = radio_files
+        self.token = token
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.failures = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    n = next(stub._counter)
+                if self.headers.get("Authorization") != f"Bearer {stub.token}":
+                    return self._send(401, {"message": "Unauthorized"})
+                if stub.fail_every and n % stub.fail_every == 0:
+                    with stub._lock:
+                        stub.failures += 1
+                    return self._send(503, {"message": "Service Unavailable"})
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                client_id = params.get("client_id")
+                if url.path.endswith("/radiofiles"):
+                    after_id, limit = int(params.get("after_id", 0)), int(params.get("limit", 100))
+                    page = [
+                        {key: value for key, value in radio_file.items() if key != "stories"}
+                        for radiofile_id, radio_file in sorted(stub.radio_files.items())
+                        if radiofile_id > after_id and radio_file["client_id"] == client_id
+                    ][:limit]
+                    return self._send(200, {"data": page})
+                if url.path.endswith("/stories"):
+                    radio_file = stub.radio_files.get(int(params.get("radiofile_id", 0)))
+                    if radio_file is None or radio_file["client_id"] != client_id:
+                        return self._send(404, {"message": "Radio file not found"})
+                    return self._send(200, {"data": radio_file["stories"]})
+                return self._send(404, {"message": "Not found"})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake MIREMS stories API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--radio-files", type=int, default=50)
+    parser.add_argument("--client-id", default="5")
+    parser.add_argument("--token", default="stub-token")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with a 503")
+    args = parser.parse_args()
+
+    server = StubMiremsServer(
+        make_radio_files(args.radio_files, args.client_id), token=args.token, port=args.port,
+        latency=args.latency, fail_every=args.fail_every,
+    )
+    print(f"MIREMS stub serving {args.radio_files} radio files for client {args.client_id} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,7 +1,13 @@
 from fastapi import FastAPI, Request, Query, HTTPException, Response
-from settings import WHATSAPP_TOKEN, PHONE_NUMBER_ID, GOOGLE_API_KEY
+from settings import WHATSAPP_TOKEN, PHONE_NUMBER_ID, GOOGLE_API_KEY, REQUEST_DEADLINE_SECONDS
 from src.agents.retriver_agent import create_query_agent
-from src.agents.multi_agent_guardrails import workflow
+from src.agents.multi_agent_guardrails import workflow, router
+from src.agents.query_router import RETRIEVE
+from src.utils.deadline import new_deadline, degradation_stats
+from src.utils.chunk_store import get_chunk_store
+from src.utils.llm_governor import INTERACTIVE, get_governor, llm_priority
+from src.utils.sessions import get_session_store
+from src.utils.tenancy import client_for_sender
 import httpx
 import re
 
@@ -16,6 +22,31 @@ app = FastAPI()
 def root():
     return {"status": "ok"}
 
+# --- Router counters: messages answered without retrieval and calls avoided ---
+@app.get("/router/stats")
+def router_stats():
+    return router.stats.snapshot()
+
+# --- Steps skipped to meet the request deadline, by node and action ---
+@app.get("/deadline/stats")
+def deadline_stats():
+    return degradation_stats()
+
+# --- LLM governor: per-model concurrency limits, 429s, retries and hedges ---
+@app.get("/llm/stats")
+def llm_stats():
+    return get_governor().snapshot()
+
+# --- Chunk store: lean Pinecone payloads hydrated by id ---
+@app.get("/chunks/stats")
+def chunk_stats():
+    return get_chunk_store().snapshot()
+
+# --- Follow-up sessions: cached-context hit rate and retrieval time saved ---
+@app.get("/sessions/stats")
+def session_stats():
+    return get_session_store().snapshot()
+
 # --- Webhook verification (GET) ---
 @app.get("/webhook")
 def verify_whatsapp(
@@ -77,9 +108,19 @@ async def receive_whatsapp(request: Request):
             "query_response": "",
             "evaluation_state": "",
             "retry_count": 0,
-            "instruction": ""
+            "instruction": "",
+            "route": "",
+            "deadline": new_deadline(REQUEST_DEADLINE_SECONDS),
+            "degradations": [],
+            "client_id": client_for_sender(sender),
+            "search_filters": {},
+            "sender": sender,
+            "previous_query": "",
+            "retrieved_chunks": []
         }
-        final_state = workflow.invoke(initial_state, config={"verbose": True})
+        # WhatsApp replies queue ahead of batch and evaluation calls for the same Gemini quota
+        with llm_priority(INTERACTIVE):
+            final_state = await workflow.ainvoke(initial_state, config={"verbose": True})
         print(final_state)
         query_response = final_state["query_response"]
         if "ValidationOutcome" in query_response:
@@ -110,6 +151,10 @@ async def receive_whatsapp(request: Request):
         
         # FINAL CLEANUP: Remove any trailing newlines or extra whitespace
         answer = re.sub(r'\n+$', '', answer).strip()
+
+        # Remember this turn's chunks so a follow-up can build on them
+        if final_state.get("route") == RETRIEVE:
+            get_session_store().record(sender, text, answer, final_state.get("retrieved_chunks") or [])
     except Exception as e:
         print("Agent error:", e)
         answer = "⚠️ Oops, something went wrong. Please try again."
@@ -1,10 +1,135 @@
-from sentence_transformers import SentenceTransformer
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
 from pinecone import Pinecone
-from settings import PINECONE_API_KEY, PINECONE_INDEX_NAME
-from langchain.tools import tool
+from settings import LEAN_VECTOR_PAYLOADS, PINECONE_API_KEY, PINECONE_INDEX_NAME
+from langchain.tools import StructuredTool
+from src.utils.chunk_store import get_chunk_store, hydrate
+from src.utils.embeddings import load_embedding_model
+from src.utils.sessions import CACHED_CHUNKS_PER_TURN, current_conversation
+from src.utils.tenancy import current_scope
 
-@tool
-def get_context(user_question: str) -> str:
+# Loaded once per process instead of on every tool call
+_embedding_model = None
+_index = None
+_chunk_store = None
+
+def configure_retrieval(embedding_model=None, index=None, chunk_store=None):
+    """Override the encoder, vector index and chunk store used by `get_context` (e.g. with offline stubs)."""
+    global _embedding_model, _index, _chunk_store
+    _embedding_model = embedding_model
+    _index = index
+    _chunk_store = chunk_store
+
+def get_embedding_model():
+    global _embedding_model
+    if _embedding_model is None:
+        # EMBEDDING_BACKEND picks sentence-transformers (torch) or the validated ONNX export
+        _embedding_model = load_embedding_model()
+    return _embedding_model
+
+def get_index():
+    global _index
+    if _index is None:
+        pc = Pinecone(api_key=PINECONE_API_KEY)
+        _index = pc.Index(PINECONE_INDEX_NAME)
+    return _index
+
+# Chunks loaded by `get_context` calls inside `collect_retrieved_chunks`, best match first
+_retrieved_chunks: ContextVar[list | None] = ContextVar("retrieved_chunks", default=None)
+
+@contextmanager
+def collect_retrieved_chunks():
+    """Yield a list that every `get_context` call made inside the block appends its chunk texts to"""
+    chunks = []
+    token = _retrieved_chunks.set(chunks)
+    try:
+        yield chunks
+    finally:
+        _retrieved_chunks.reset(token)
+
+def _record_chunks(texts):
+    chunks = _retrieved_chunks.get()
+    if chunks is None:
+        return
+    for text in texts:
+        if text not in chunks:
+            chunks.append(text)
+
+# Encoding is CPU-bound; a small dedicated pool keeps it from starving the default executor
+_encode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="encode")
+
+def _chunk_texts(index, matches) -> dict:
+    """Text of `matches` by id: from their metadata, or with lean payloads hydrated from the chunk store"""
+    if not LEAN_VECTOR_PAYLOADS:
+        return {match["id"]: match["metadata"]["chunk_text"] for match in matches}
+    ids = [match["id"] for match in matches]
+    return hydrate(ids, current_scope().namespace, store=_chunk_store or get_chunk_store(), index=index)
+
+def _format_matches(results, texts: dict) -> str:
+    if results["matches"] and results["matches"][0]["id"] in texts:
+        context = texts[results["matches"][0]["id"]]
+        return context
+    else:
+        return "No relevant context found for the question."
+
+def _query_index(index, query_embedding):
+    # The namespace and filters come from the request's scope, never from the LLM's tool call
+    scope = current_scope()
+    query = {
+        "vector": query_embedding.tolist(),
+        "top_k": 20,
+        # Lean payloads hold no text: ask for ids and scores and hydrate only the chunks used
+        "include_metadata": not LEAN_VECTOR_PAYLOADS,
+        "score_threshold": 0.7,
+        "namespace": scope.namespace,
+    }
+    if scope.filters:
+        query["filter"] = scope.filters
+    return index.query(**query)
+
+def _fetch_vectors(index, ids: list[str]) -> dict:
+    """{id: values} for `ids` in the current namespace (SDK response or plain dict)"""
+    if not ids:
+        return {}
+    response = index.fetch(ids=ids, namespace=current_scope().namespace)
+    vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+    return {
+        chunk_id: vector.get("values") if isinstance(vector, dict) else vector.values
+        for chunk_id, vector in vectors.items()
+    }
+
+def _search(index, query_embedding) -> str:
+    """Answer from the conversation's cached chunks when they match, else query the index and remember the result"""
+    conversation = current_conversation()
+    if conversation is None or not conversation.keep_chunks:
+        results = _query_index(index, query_embedding)
+        texts = _chunk_texts(index, results["matches"][:1])
+        _record_chunks(texts.values())
+        return _format_matches(results, texts)
+    cached = conversation.reuse(query_embedding)
+    if cached is not None:
+        _record_chunks([cached])
+        return cached
+    started = time.perf_counter()
+    results = _query_index(index, query_embedding)
+    # The session keeps the top chunks, so they are hydrated together with the one answered from;
+    # only their vectors are needed, so they are fetched by id rather than returned for all 20 matches
+    top = results["matches"][:CACHED_CHUNKS_PER_TURN]
+    texts = _chunk_texts(index, top)
+    vectors = _fetch_vectors(index, [match["id"] for match in top if match["id"] in texts])
+    conversation.stats.record_fresh(time.perf_counter() - started)
+    conversation.add([
+        {"id": match["id"], "text": texts[match["id"]], "score": match["score"], "vector": vectors[match["id"]]}
+        for match in top if vectors.get(match["id"]) and match["id"] in texts
+    ])
+    _record_chunks(texts[match["id"]] for match in results["matches"] if match["id"] in texts)
+    return _format_matches(results, texts)
+
+def _get_context(user_question: str) -> str:
     """
     This function helps to answer user question by retrieving relevant context from documents.
     
@@ -15,26 +140,37 @@ def get_context(user_question: str) -> str:
         Context related to user's question in string format
     """
     try:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        pc = Pinecone(api_key=PINECONE_API_KEY)
+        model = get_embedding_model()
         query_embedding = model.encode(user_question, convert_to_numpy=True)
-        index = pc.Index(PINECONE_INDEX_NAME)
+        index = get_index()
 
-        results = index.query(
-            vector=query_embedding.tolist(),
-            top_k=20,
-            include_metadata=True,
-            score_threshold=0.7
-        )
-        
-        if results["matches"]:
-            context = results["matches"][0]["metadata"]["chunk_text"]
-            return context
-        else:
-            return "No relevant context found for the question."
+        return _search(index, query_embedding)
             
     except Exception as e:
         return f"Error retrieving context: {str(e)}"
 
+async def _aget_context(user_question: str) -> str:
+    """Async variant of `_get_context`; encoding and the Pinecone round trip run off the event loop."""
+    try:
+        loop = asyncio.get_running_loop()
+        model = get_embedding_model()
+        query_embedding = await loop.run_in_executor(
+            _encode_executor, partial(model.encode, user_question, convert_to_numpy=True)
+        )
+        index = get_index()
+
+        # to_thread copies the context, so the worker sees this request's retrieval scope and conversation
+        return await asyncio.to_thread(_search, index, query_embedding)
+
+    except Exception as e:
+        return f"Error retrieving context: {str(e)}"
+
+get_context = StructuredTool.from_function(
+    func=_get_context,
+    coroutine=_aget_context,
+    name="get_context",
+    description=_get_context.__doc__,
+)
+
 if __name__ == "__main__":
     print(get_context("What initiative did the federal government announce regarding AI?"))
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Local store of chunk text and metadata, keyed by the vector id.
+
+With `LEAN_VECTOR_PAYLOADS` on, the uploader writes each chunk's text and full
+metadata here and gives Pinecone only the id, the vector and the fields filters
+need (`tenancy.filterable_metadata`). Queries ask Pinecone for ids and scores
+only, and `hydrate` then loads the text of just the chunks the answer uses.
+
+Rows are a compressed JSON body in SQLite (WAL, so the API can read while an
+upload writes). `zstd` needs the `zstandard` package; without it rows are written
+with `zlib`. The codec is stored per row, so either one can read the other's rows.
+Chunks uploaded before the store existed still carry `chunk_text` in Pinecone;
+`hydrate` fetches those ids from the index when the store does not have them.
+"""
+import json
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass, field
+
+from settings import CHUNK_STORE_COMPRESSION, CHUNK_STORE_PATH
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+CODECS = ("zstd", "zlib", "none")
+
+
+def _codec(preferred: str) -> str:
+    if preferred not in CODECS:
+        raise ValueError(f"Unknown CHUNK_STORE_COMPRESSION {preferred!r}; expected one of {', '.join(CODECS)}")
+    return "zlib" if preferred == "zstd" and zstandard is None else preferred
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    return data
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("This chunk store holds zstd rows; install `zstandard` to read them")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+@dataclass
+class ChunkStoreStats:
+    written: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+    lookups: int = 0
+    hits: int = 0
+    index_fetches: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_write(self, rows: int, raw_bytes: int, stored_bytes: int):
+        with self._lock:
+            self.written += rows
+            self.raw_bytes += raw_bytes
+            self.stored_bytes += stored_bytes
+
+    def record_lookup(self, requested: int, found: int):
+        with self._lock:
+            self.lookups += requested
+            self.hits += found
+
+    def record_index_fetch(self, ids: int):
+        with self._lock:
+            self.index_fetches += ids
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "written": self.written,
+                "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+                "lookups": self.lookups,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "index_fetches": self.index_fetches,
+            }
+
+
+class ChunkStore:
+    """Thread-safe SQLite table of compressed chunk bodies, one row per (namespace, id)"""
+
+    def __init__(self, path: str = CHUNK_STORE_PATH, compression: str = CHUNK_STORE_COMPRESSION):
+        self.path = path
+        self.codec = _codec(compression)
+        self.stats = ChunkStoreStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "namespace TEXT NOT NULL, id TEXT NOT NULL, codec TEXT NOT NULL, body BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, id))"
+        )
+        self._db.commit()
+
+    def put_many(self, namespace: str, rows: list[tuple[str, str, dict]]) -> int:
+        """Insert or replace (id, text, metadata) rows"""
+        records, raw_bytes, stored_bytes = [], 0, 0
+        for chunk_id, text, metadata in rows:
+            raw = json.dumps({"text": text, "metadata": metadata}, separators=(",", ":")).encode("utf-8")
+            body = compress(raw, self.codec)
+            records.append((namespace, str(chunk_id), self.codec, body))
+            raw_bytes += len(raw)
+            stored_bytes += len(body)
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (namespace, id, codec, body) VALUES (?, ?, ?, ?)", records
+            )
+            self._db.commit()
+        self.stats.record_write(len(records), raw_bytes, stored_bytes)
+        return len(records)
+
+    def get_many(self, namespace: str, ids: list[str]) -> dict[str, dict]:
+        """{id: {"text", "metadata"}} for the ids the store has"""
+        ids = [str(chunk_id) for chunk_id in dict.fromkeys(ids)]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, codec, body FROM chunks WHERE namespace = ? AND id IN ({placeholders})",
+                (namespace, *ids),
+            ).fetchall()
+        found = {chunk_id: json.loads(decompress(body, codec)) for chunk_id, codec, body in rows}
+        self.stats.record_lookup(len(ids), len(found))
+        return found
+
+    def delete_namespace(self, namespace: str) -> int:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM chunks WHERE namespace = ?", (namespace,)).rowcount
+            self._db.commit()
+        return deleted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        return {"path": self.path, "codec": self.codec, "chunks": len(self), **self.stats.snapshot()}
+
+
+_store: ChunkStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore()
+        return _store
+
+
+def _fetched_metadata(response) -> dict[str, dict]:
+    """{id: metadata} from a Pinecone fetch response (SDK object or plain dict)"""
+    vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+    metadata = {}
+    for chunk_id, vector in vectors.items():
+        metadata[chunk_id] = (vector.metadata if hasattr(vector, "metadata") else vector.get("metadata")) or {}
+    return metadata
+
+
+def hydrate(ids: list[str], namespace: str = "", store: ChunkStore | None = None, index=None) -> dict[str, str]:
+    """
+    Chunk text for `ids`, from the store first; ids it lacks are fetched from `index`
+    and read from their `chunk_text` metadata, as stored before payloads were lean.
+    """
+    store = store or get_chunk_store()
+    texts = {chunk_id: row["text"] for chunk_id, row in store.get_many(namespace, ids).items()}
+    missing = [str(chunk_id) for chunk_id in dict.fromkeys(ids) if str(chunk_id) not in texts]
+    if missing and index is not None:
+        store.stats.record_index_fetch(len(missing))
+        for chunk_id, metadata in _fetched_metadata(index.fetch(ids=missing, namespace=namespace)).items():
+            if "chunk_text" in metadata:
+                texts[chunk_id] = metadata["chunk_text"]
+    return texts
@@ -0,0 +1,115 @@
+"""
+Token-budgeted context packing for the analyst prompt.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+import numpy as np
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+CHUNK_SEPARATOR = "\n---\n"
+
+# Gemini averages roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    dropped_duplicates: list[int] = field(default_factory=list)
+    dropped_sources: list[int] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def report(self) -> dict:
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+            "dropped_duplicates": self.dropped_duplicates,
+            "dropped_sources": self.dropped_sources,
+        }
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def pack_context(
+    query: str,
+    documents: Sequence[str],
+    token_budget: int,
+    embed: Callable[[list[str]], np.ndarray],
+    duplicate_threshold: float = 0.95,
+) -> PackedContext:
+    """
+    Pack retrieved chunks into at most `token_budget` tokens.
+
+    Each chunk keeps the `[Source n]` label of its original position. Near-duplicate
+    chunks (cosine >= `duplicate_threshold` with an earlier chunk) are dropped, then the
+    most query-relevant sentences across all chunks are kept until the budget is spent.
+    Kept sentences stay in their original order within each chunk.
+    """
+    tokens_before = estimate_tokens(CHUNK_SEPARATOR.join(documents))
+    if not documents:
+        return PackedContext(text="", tokens_before=0, tokens_after=0)
+
+    chunk_vectors = _normalize(embed(list(documents)))
+    kept: list[int] = []
+    duplicates: list[int] = []
+    for i in range(len(documents)):
+        if kept and float(np.max(chunk_vectors[kept] @ chunk_vectors[i])) >= duplicate_threshold:
+            duplicates.append(i + 1)
+        else:
+            kept.append(i)
+
+    sentences: list[tuple[int, int, str]] = []
+    for i in kept:
+        for position, sentence in enumerate(split_sentences(documents[i])):
+            sentences.append((i, position, sentence))
+    if not sentences:
+        return PackedContext(text="", tokens_before=tokens_before, tokens_after=0, dropped_duplicates=duplicates)
+
+    vectors = _normalize(embed([query] + [s for _, _, s in sentences]))
+    scores = vectors[1:] @ vectors[0]
+
+    selected: dict[int, list[tuple[int, str]]] = {}
+    used = 0
+    for k in np.argsort(-scores, kind="stable"):
+        source, position, sentence = sentences[k]
+        cost = estimate_tokens(sentence) + 1
+        if source not in selected:
+            cost += estimate_tokens(f"[Source {source + 1}] ") + estimate_tokens(CHUNK_SEPARATOR)
+        if used + cost > token_budget:
+            continue
+        selected.setdefault(source, []).append((position, sentence))
+        used += cost
+
+    blocks = [
+        f"[Source {source + 1}] " + " ".join(s for _, s in sorted(selected[source]))
+        for source in sorted(selected)
+    ]
+    text = CHUNK_SEPARATOR.join(blocks)
+    return PackedContext(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+        dropped_duplicates=duplicates,
+        dropped_sources=[i + 1 for i in kept if i not in selected],
+    )
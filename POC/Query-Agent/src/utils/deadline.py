@@ -0,0 +1,45 @@
+"""
+Per-request deadlines carried through graph state.
+
+The entry point stores an absolute `deadline` (epoch seconds) in the initial state.
+Nodes ask how much budget is left and skip optional work when it is short; every skip
+is appended to the state's `degradations` list and counted here so SLO thresholds can
+be tuned from real traffic.
+"""
+import math
+import threading
+import time
+from collections import Counter
+
+_counts = Counter()
+_lock = threading.Lock()
+
+
+def new_deadline(seconds: float) -> float:
+    return time.time() + seconds
+
+
+def remaining(state: dict) -> float:
+    """Seconds left before the request's deadline (infinite when none was set)"""
+    deadline = state.get("deadline")
+    if not deadline:
+        return math.inf
+    return deadline - time.time()
+
+
+def has_budget(state: dict, seconds: float) -> bool:
+    return remaining(state) >= seconds
+
+
+def degradation(state: dict, node: str, action: str) -> list[dict]:
+    """Record a skipped step and return the state's updated `degradations` list"""
+    left = remaining(state)
+    entry = {"node": node, "action": action, "remaining_s": round(left, 3) if math.isfinite(left) else None}
+    with _lock:
+        _counts[f"{node}.{action}"] += 1
+    return list(state.get("degradations") or []) + [entry]
+
+
+def degradation_stats() -> dict:
+    with _lock:
+        return dict(_counts)
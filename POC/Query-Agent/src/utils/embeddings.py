@@ -0,0 +1,219 @@
+"""
+Sentence encoders for retrieval, selected by `EMBEDDING_BACKEND`.
+
+`torch` is the reference: `all-MiniLM-L6-v2` through sentence-transformers.
+`onnx` and `onnx-int8` run the same transformer exported to ONNX (the int8 graph
+has dynamically quantized weights) under onnxruntime, with the Rust `tokenizers`
+tokenizer and MiniLM's mean pooling + L2 normalization done in numpy, so serving
+needs neither torch nor transformers. Export once on a machine that has them:
+
+    python -m src.utils.embeddings export --output .embedding_models/all-MiniLM-L6-v2
+
+Export checks every graph against the reference model on the golden retrieval
+questions and passages, and records the cosine agreement in `encoder.json`; a graph
+whose worst-case cosine is below `EMBEDDING_MIN_COSINE` is refused at load time.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from settings import EMBEDDING_BACKEND, EMBEDDING_MIN_COSINE, EMBEDDING_MODEL_DIR, EMBEDDING_THREADS
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+GRAPHS = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+METADATA_FILE = "encoder.json"
+
+
+class OnnxSentenceEncoder:
+    """`SentenceTransformer.encode`-compatible MiniLM encoder over an exported ONNX graph"""
+
+    def __init__(self, model_dir, graph: str = GRAPHS["onnx"], max_seq_length: int = 256,
+                 normalize: bool = True, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+        self._tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_seq_length)
+        pad_id = self._tokenizer.token_to_id("[PAD]") or 0
+        self._tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(
+            str(model_dir / graph), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {node.name for node in self._session.get_inputs()}
+        self.dimension = self._session.get_outputs()[0].shape[-1]
+
+    @classmethod
+    def load(cls, model_dir=EMBEDDING_MODEL_DIR, backend: str = "onnx", min_cosine: float = EMBEDDING_MIN_COSINE,
+             threads: int = EMBEDDING_THREADS) -> "OnnxSentenceEncoder":
+        """Open a validated export; raises ValueError if the graph never passed validation"""
+        model_dir = Path(model_dir)
+        metadata_path = model_dir / METADATA_FILE
+        if not metadata_path.exists():
+            raise ValueError(f"No ONNX export in {model_dir}; run `python -m src.utils.embeddings export` first")
+        metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+        graph = GRAPHS[backend]
+        validation = metadata.get("validation", {}).get(graph)
+        if validation is None:
+            raise ValueError(f"{graph} in {model_dir} was never validated against {metadata.get('model')}")
+        if validation["min_cosine"] < min_cosine:
+            raise ValueError(
+                f"{graph} agrees with {metadata.get('model')} only to cosine {validation['min_cosine']:.6f} "
+                f"(EMBEDDING_MIN_COSINE={min_cosine}); use another backend or re-export"
+            )
+        return cls(model_dir, graph, metadata.get("max_seq_length", 256), metadata.get("normalize", True), threads)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **_) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        # Longest first, as sentence-transformers does, so each batch pads to a similar length
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in positions])
+            mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            hidden = self._session.run(None, {name: value for name, value in feeds.items() if name in self._inputs})[0]
+            weights = mask[..., None].astype(np.float32)
+            embeddings[positions] = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.normalize or normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+class EncoderEmbeddings:
+    """LangChain `Embeddings` over any `.encode` model, so SemanticChunker can share the configured encoder"""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def embed_documents(self, texts):
+        return [vector.tolist() for vector in self.encoder.encode(list(texts), convert_to_numpy=True)]
+
+    def embed_query(self, text):
+        return self.encoder.encode(text, convert_to_numpy=True).tolist()
+
+
+def load_embedding_model(backend: str = EMBEDDING_BACKEND, model_dir=EMBEDDING_MODEL_DIR):
+    """The configured encoder; `torch` imports sentence-transformers only when chosen"""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(MODEL_NAME)
+    if backend in GRAPHS:
+        return OnnxSentenceEncoder.load(model_dir, backend)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def cosine_agreement(candidate: np.ndarray, reference: np.ndarray) -> dict:
+    """Row-wise cosine between two embedding matrices of the same sentences"""
+    candidate = np.asarray(candidate, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    cosines = (candidate * reference).sum(axis=1) / (
+        np.linalg.norm(candidate, axis=1) * np.linalg.norm(reference, axis=1)
+    )
+    return {
+        "sentences": len(cosines),
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+    }
+
+
+def validation_sentences() -> list[str]:
+    """Golden retrieval questions and passages, plus one text long enough to be truncated"""
+    golden = json.loads((project_root / "src" / "benchmarks" / "retrieval_golden.json").read_text(encoding="utf-8"))
+    sentences = [item[key] for entry in golden for item in entry["questions"] for key in ("question", "evidence")]
+    return sentences + [" ".join(sentences)]
+
+
+def export_onnx(output_dir=EMBEDDING_MODEL_DIR, quantize: bool = True, sentences: list[str] | None = None) -> dict:
+    """Export MiniLM to ONNX (and int8), validate each graph against the reference and write `encoder.json`"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    reference = SentenceTransformer(MODEL_NAME, device="cpu")
+    transformer = reference[0].auto_model.eval()
+    reference.tokenizer.save_pretrained(str(output_dir))
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    sample = reference.tokenizer(["An example sentence to trace."], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    axes = {"batch": 0, "sequence": 1}
+    torch.onnx.export(
+        LastHiddenState(transformer), tuple(sample[name] for name in names), str(output_dir / GRAPHS["onnx"]),
+        input_names=names, output_names=["last_hidden_state"], opset_version=17,
+        dynamic_axes={name: {index: axis for axis, index in axes.items()} for name in names + ["last_hidden_state"]},
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(output_dir / GRAPHS["onnx"]), str(output_dir / GRAPHS["onnx-int8"]),
+                         weight_type=QuantType.QInt8)
+
+    sentences = sentences or validation_sentences()
+    expected = reference.encode(sentences, convert_to_numpy=True)
+    metadata = {
+        "model": MODEL_NAME,
+        "max_seq_length": reference.max_seq_length,
+        "normalize": True,
+        "dimension": int(expected.shape[1]),
+        "validation": {},
+    }
+    for backend, graph in GRAPHS.items():
+        if (output_dir / graph).exists():
+            encoder = OnnxSentenceEncoder(output_dir, graph, reference.max_seq_length)
+            metadata["validation"][graph] = cosine_agreement(encoder.encode(sentences), expected)
+    (output_dir / METADATA_FILE).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and validate the ONNX embedding backends")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Export MiniLM to ONNX + int8 and validate against the reference")
+    export.add_argument("--output", default=str(EMBEDDING_MODEL_DIR))
+    export.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args(argv)
+
+    metadata = export_onnx(args.output, quantize=not args.no_quantize)
+    for graph, validation in metadata["validation"].items():
+        verdict = "OK" if validation["min_cosine"] >= EMBEDDING_MIN_COSINE else "BELOW THRESHOLD"
+        print(f"{graph:<16} min cosine {validation['min_cosine']:.6f}  mean {validation['mean_cosine']:.6f}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
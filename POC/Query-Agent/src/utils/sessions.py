@@ -0,0 +1,283 @@
+"""
+Per-sender conversation memory for WhatsApp follow-ups.
+
+Each sender keeps their last few retrieval turns: the question, the answer, and the
+ids, texts and vectors of the chunks `get_context` returned. When a new message
+reads as a follow-up to a recent turn ("and what about Q3?"), the workflow hands
+the agent the previous question and exposes those chunks to `get_context` through
+a context variable, so a follow-up that the cached chunks already answer skips the
+Pinecone query, and one that they do not is still searched with the topic attached.
+
+Sessions are kept in memory, least recently used first out past
+`SESSION_MAX_SENDERS`; with `SESSION_DB_PATH` set they are also written through to
+SQLite, so they survive a restart and are shared by the workers of one host.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from settings import (
+    SESSION_DB_PATH, SESSION_FOLLOW_UP_SECONDS, SESSION_MAX_SENDERS, SESSION_MAX_TURNS, SESSION_REUSE_MIN_SCORE,
+    SESSION_TTL_SECONDS,
+)
+
+# Chunks kept per turn; `get_context` only ever answers from the best few
+CACHED_CHUNKS_PER_TURN = 5
+
+FOLLOW_UP_OPENERS = re.compile(
+    r"^(and|also|but|so|or|then|what about|how about|what else|what of|same for|more on|tell me more|"
+    r"anything else|why|how come|and what|what happened next|any update)\b"
+)
+REFERRING_WORDS = re.compile(r"\b(it|its|they|them|their|that|this|those|these|he|him|his|she|her|there|same)\b")
+# Short fragments ("Q3?", "in Surrey?") only make sense against the previous question
+MAX_FRAGMENT_WORDS = 4
+MAX_REFERRING_WORDS = 10
+
+
+@dataclass
+class Turn:
+    query: str
+    answer: str = ""
+    chunks: list[dict] = field(default_factory=list)  # {"id", "text", "score", "vector"}
+    at: float = field(default_factory=time.time)
+
+    def to_json(self) -> dict:
+        return {
+            "query": self.query, "answer": self.answer, "at": self.at,
+            "chunks": [{**chunk, "vector": np.asarray(chunk["vector"]).tolist()} for chunk in self.chunks],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Turn":
+        chunks = [{**chunk, "vector": np.asarray(chunk["vector"], dtype=np.float32)} for chunk in data["chunks"]]
+        return cls(data["query"], data.get("answer", ""), chunks, data["at"])
+
+
+@dataclass
+class Session:
+    sender: str
+    turns: list[Turn] = field(default_factory=list)
+
+    @property
+    def last_turn(self) -> Turn | None:
+        return self.turns[-1] if self.turns else None
+
+    def cached_chunks(self) -> list[dict]:
+        """Chunks of the kept turns, newest first, each id once"""
+        seen, chunks = set(), []
+        for turn in reversed(self.turns):
+            for chunk in turn.chunks:
+                if chunk["id"] not in seen:
+                    seen.add(chunk["id"])
+                    chunks.append(chunk)
+        return chunks
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def is_follow_up(query: str, session: Session | None, now: float | None = None,
+                 window: float = SESSION_FOLLOW_UP_SECONDS) -> bool:
+    """A recent previous turn, and a message that opens like a continuation, is a fragment or refers back"""
+    if session is None or session.last_turn is None:
+        return False
+    if (now or time.time()) - session.last_turn.at > window:
+        return False
+    message = normalize(query)
+    words = re.findall(r"\w+", message)
+    if not words:
+        return False
+    if FOLLOW_UP_OPENERS.search(message) or len(words) <= MAX_FRAGMENT_WORDS:
+        return True
+    return len(words) <= MAX_REFERRING_WORDS and bool(REFERRING_WORDS.search(message))
+
+
+@dataclass
+class SessionStats:
+    follow_ups: int = 0
+    reuse_hits: int = 0
+    reuse_misses: int = 0
+    fresh_seconds: float = 0.0
+    fresh_count: int = 0
+    reuse_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_follow_up(self):
+        with self._lock:
+            self.follow_ups += 1
+
+    def record_reuse(self, hit: bool, seconds: float):
+        with self._lock:
+            if hit:
+                self.reuse_hits += 1
+                self.reuse_seconds += seconds
+            else:
+                self.reuse_misses += 1
+
+    def record_fresh(self, seconds: float):
+        with self._lock:
+            self.fresh_seconds += seconds
+            self.fresh_count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            checked = self.reuse_hits + self.reuse_misses
+            fresh_ms = self.fresh_seconds / self.fresh_count * 1000 if self.fresh_count else None
+            reuse_ms = self.reuse_seconds / self.reuse_hits * 1000 if self.reuse_hits else None
+            saved_ms = self.reuse_hits * (fresh_ms - reuse_ms) if fresh_ms is not None and reuse_ms is not None else 0.0
+            return {
+                "follow_ups": self.follow_ups,
+                "reuse_hits": self.reuse_hits,
+                "reuse_misses": self.reuse_misses,
+                "hit_rate": round(self.reuse_hits / checked, 4) if checked else 0.0,
+                "mean_fresh_retrieval_ms": round(fresh_ms, 3) if fresh_ms is not None else None,
+                "mean_reuse_ms": round(reuse_ms, 3) if reuse_ms is not None else None,
+                "estimated_saved_ms": round(saved_ms, 1),
+            }
+
+
+class SessionStore:
+    """Thread-safe LRU of sender sessions, optionally written through to SQLite"""
+
+    def __init__(self, max_senders: int = SESSION_MAX_SENDERS, max_turns: int = SESSION_MAX_TURNS,
+                 ttl: float = SESSION_TTL_SECONDS, db_path: str | None = SESSION_DB_PATH):
+        self.max_senders = max_senders
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.stats = SessionStats()
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (sender TEXT PRIMARY KEY, updated REAL NOT NULL, turns TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: Session, now: float) -> bool:
+        return session.last_turn is None or now - session.last_turn.at > self.ttl
+
+    def _remember(self, session: Session):
+        self._sessions[session.sender] = session
+        self._sessions.move_to_end(session.sender)
+        while len(self._sessions) > self.max_senders:
+            self._sessions.popitem(last=False)
+
+    def get(self, sender: str | None) -> Session | None:
+        if not sender:
+            return None
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(sender)
+            if session is None and self._db is not None:
+                row = self._db.execute("SELECT turns FROM sessions WHERE sender = ?", (sender,)).fetchone()
+                if row:
+                    session = Session(sender, [Turn.from_json(turn) for turn in json.loads(row[0])])
+            if session is None:
+                return None
+            if self._expired(session, now):
+                self._sessions.pop(sender, None)
+                return None
+            self._remember(session)
+            return session
+
+    def record(self, sender: str | None, query: str, answer: str, chunks: list[dict]) -> None:
+        if not sender:
+            return
+        existing = self.get(sender)
+        turns = list(existing.turns) if existing else []
+        turns.append(Turn(query, answer, list(chunks[:CACHED_CHUNKS_PER_TURN])))
+        session = Session(sender, turns[-self.max_turns:])
+        with self._lock:
+            self._remember(session)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (sender, updated, turns) VALUES (?, ?, ?)",
+                    (sender, session.last_turn.at, json.dumps([turn.to_json() for turn in session.turns])),
+                )
+                self._db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+                self._db.commit()
+
+    def snapshot(self) -> dict:
+        return {"sessions_in_memory": len(self), **self.stats.snapshot()}
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+class Conversation:
+    """What `get_context` sees of the current request: chunks it may reuse, and the ones it retrieved"""
+
+    def __init__(self, cached_chunks: list[dict] | None = None, stats: SessionStats | None = None,
+                 min_score: float = SESSION_REUSE_MIN_SCORE, keep_chunks: bool = True):
+        self.cached = cached_chunks or []
+        # Without a sender to record for, no later turn can reuse what this one retrieves
+        self.keep_chunks = keep_chunks
+        self.stats = stats or SessionStats()
+        self.min_score = min_score
+        self.retrieved: list[dict] = []
+        self._lock = threading.Lock()
+        self._matrix = None
+        if self.cached:
+            matrix = np.stack([np.asarray(chunk["vector"], dtype=np.float32) for chunk in self.cached])
+            self._matrix = matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+    def reuse(self, query_vector) -> str | None:
+        """The best cached chunk if it clears `min_score` for this query, else None"""
+        if self._matrix is None:
+            return None
+        started = time.perf_counter()
+        vector = np.asarray(query_vector, dtype=np.float32)
+        scores = self._matrix @ (vector / max(float(np.linalg.norm(vector)), 1e-12))
+        best = int(np.argmax(scores))
+        hit = bool(scores[best] >= self.min_score)
+        self.stats.record_reuse(hit, time.perf_counter() - started)
+        if not hit:
+            return None
+        chunk = self.cached[best]
+        self.add([{**chunk, "score": float(scores[best])}])
+        return chunk["text"]
+
+    def add(self, chunks: list[dict]) -> None:
+        with self._lock:
+            self.retrieved.extend(chunks)
+
+
+_conversation: ContextVar[Conversation | None] = ContextVar("conversation", default=None)
+
+
+def current_conversation() -> Conversation | None:
+    return _conversation.get()
+
+
+@contextmanager
+def conversation_scope(conversation: Conversation):
+    """Make `conversation` visible to every `get_context` call made inside the block"""
+    token = _conversation.set(conversation)
+    try:
+        yield conversation
+    finally:
+        _conversation.reset(token)
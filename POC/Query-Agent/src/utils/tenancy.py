@@ -0,0 +1,124 @@
+"""
+Per-client scoping of retrieval.
+
+Each client's chunks live in their own Pinecone namespace, so a query only ever
+scans one client's corpus. The scope of the current request (client and metadata
+filters) is carried in a context variable set by the workflow rather than passed
+through the agent, so the LLM can never pick another client's namespace.
+"""
+import calendar
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+
+from settings import DEFAULT_CLIENT_ID, SENDER_CLIENT_IDS
+
+# Chunks ingested without a client (the legacy flat index) stay in the default namespace
+SHARED_NAMESPACE = ""
+
+# Chunk text and its position in the source document are only ever read, never filtered
+# on; with LEAN_VECTOR_PAYLOADS they live in the chunk store instead of Pinecone
+STORE_ONLY_FIELDS = ("chunk_text", "chunk_id", "char_start", "char_end", "page", "page_end")
+
+
+@dataclass(frozen=True)
+class RetrievalScope:
+    client_id: str | None = None
+    filters: dict = field(default_factory=dict)
+
+    @property
+    def namespace(self) -> str:
+        return client_namespace(self.client_id)
+
+
+_scope: ContextVar[RetrievalScope] = ContextVar("retrieval_scope", default=RetrievalScope())
+
+
+def client_namespace(client_id) -> str:
+    return f"client-{client_id}" if client_id not in (None, "") else SHARED_NAMESPACE
+
+
+def current_scope() -> RetrievalScope:
+    return _scope.get()
+
+
+@contextmanager
+def retrieval_scope(client_id=None, filters: dict | None = None):
+    """Scope every `get_context` call made inside the block to one client's namespace"""
+    token = _scope.set(RetrievalScope(str(client_id) if client_id not in (None, "") else None, dict(filters or {})))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _parse_mapping(raw: str) -> dict:
+    mapping = {}
+    for pair in raw.split(","):
+        sender, _, client_id = pair.partition("=")
+        if sender.strip() and client_id.strip():
+            mapping[sender.strip().lstrip("+")] = client_id.strip()
+    return mapping
+
+
+_sender_clients = _parse_mapping(SENDER_CLIENT_IDS)
+
+
+def client_for_sender(sender: str | None) -> str | None:
+    """The client a WhatsApp sender belongs to (`SENDER_CLIENT_IDS`), else `DEFAULT_CLIENT_ID`"""
+    return _sender_clients.get((sender or "").lstrip("+"), DEFAULT_CLIENT_ID or None)
+
+
+def _timestamp(value) -> int | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp())
+    if isinstance(value, date):
+        return calendar.timegm(value.timetuple())
+    return _timestamp(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+
+
+def chunk_metadata(chunk_text: str, chunk_id, client_id=None, source: str = "documents_folder",
+                   outlet: str | None = None, published=None, **extra) -> dict:
+    """
+    Pinecone metadata for one chunk. Dates are stored twice: `date` (ISO day) for
+    display and `published_ts` (epoch seconds) because Pinecone ranges need numbers.
+    """
+    metadata = {"chunk_text": chunk_text, "chunk_id": chunk_id, "source": source, **extra}
+    if client_id not in (None, ""):
+        metadata["client_id"] = str(client_id)
+    if outlet:
+        metadata["outlet"] = outlet
+    published_ts = _timestamp(published)
+    if published_ts is not None:
+        metadata["published_ts"] = published_ts
+        metadata["date"] = datetime.fromtimestamp(published_ts, timezone.utc).strftime("%Y-%m-%d")
+    # Pinecone rejects null metadata values
+    return {key: value for key, value in metadata.items() if value is not None}
+
+
+def filterable_metadata(metadata: dict) -> dict:
+    """The part of `chunk_metadata` that Pinecone needs for filtering"""
+    return {key: value for key, value in metadata.items() if key not in STORE_ONLY_FIELDS}
+
+
+def build_filter(source: str | None = None, outlet: str | list | None = None,
+                 date_from=None, date_to=None, **equals) -> dict:
+    """A Pinecone metadata filter from simple search options; empty when nothing is set"""
+    clauses = {key: {"$eq": value} for key, value in equals.items() if value not in (None, "")}
+    if source:
+        clauses["source"] = {"$eq": source}
+    if outlet:
+        clauses["outlet"] = {"$in": list(outlet)} if isinstance(outlet, (list, tuple, set)) else {"$eq": outlet}
+    published = {}
+    if _timestamp(date_from) is not None:
+        published["$gte"] = _timestamp(date_from)
+    if _timestamp(date_to) is not None:
+        published["$lte"] = _timestamp(date_to)
+    if published:
+        clauses["published_ts"] = published
+    return clauses
@@ -1,4 +1,8 @@
-from pydantic import BaseSettings, Field
+try:
+    from pydantic_settings import BaseSettings
+except ImportError:  # pydantic v1
+    from pydantic import BaseSettings
+from pydantic import Field
 from typing import List
 import os
 
@@ -41,7 +45,7 @@ class APISettings(BaseSettings):
     )
     ALLOWED_FILE_TYPES: List[str] = Field(
         default=[
-            ".pdf", ".doc", ".docx", ".txt", ".rtf", 
+            ".pdf", ".docx", ".txt",
             ".md", ".html", ".xml", ".json"
         ],
         description="Allowed file extensions"
@@ -50,6 +54,7 @@ class APISettings(BaseSettings):
         default="temp",
         description="Temporary directory for file uploads"
     )
+    INDEXING_WORKERS: int = Field(default=2, description="Uploaded documents indexed at once, outside the request")
     
     # Search Settings
     DEFAULT_TOP_K: int = Field(default=5, description="Default number of search results")
@@ -57,10 +62,21 @@ class APISettings(BaseSettings):
     MIN_QUERY_LENGTH: int = Field(default=1, description="Minimum query length")
     MAX_QUERY_LENGTH: int = Field(default=1000, description="Maximum query length")
     
-    # Rate Limiting (for future implementation)
+    # Rate Limiting
     RATE_LIMIT_ENABLED: bool = Field(default=False, description="Enable rate limiting")
-    RATE_LIMIT_REQUESTS: int = Field(default=100, description="Requests per minute")
+    RATE_LIMIT_REQUESTS: int = Field(default=100, description="Requests per client per window")
     RATE_LIMIT_WINDOW: int = Field(default=60, description="Rate limit window in seconds")
+    RATE_LIMIT_BURST: int = Field(default=10, description="Requests a client may send back to back")
+    GLOBAL_RATE_LIMIT_REQUESTS: int = Field(default=0, description="Requests per window across all clients (0 disables)")
+    GLOBAL_RATE_LIMIT_BURST: int = Field(default=50, description="Burst allowance across all clients")
+    TRUSTED_PROXIES: List[str] = Field(
+        default=[], description="Proxy addresses whose X-Forwarded-For names the client for rate limiting"
+    )
+
+    # Load Shedding
+    MAX_CONCURRENT_REQUESTS: int = Field(default=16, description="Requests processed at once (0 disables the limiter)")
+    MAX_QUEUED_REQUESTS: int = Field(default=64, description="Requests allowed to wait for a slot")
+    MAX_QUEUE_WAIT: float = Field(default=10.0, description="Seconds a request may wait before it is shed")
     
     # Authentication (for future implementation)
     AUTH_ENABLED: bool = Field(default=False, description="Enable authentication")
@@ -11,4 +11,29 @@ ASTRA_DB_API_ENDPOINT=getenv("ASTRA_DB_API_ENDPOINT")
 ASTRA_DB_COLLECTION_NAME=getenv("ASTRA_DB_COLLECTION_NAME")
 EMBEDDING_DIMENSION=getenv("EMBEDDING_DIMENSION", '768')
 ASTRA_DB_ID=getenv("ASTRA_DB_ID")
-GEMINI_API_KEY=getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY=getenv("GEMINI_API_KEY")
+INGEST_MANIFEST_PATH=getenv("INGEST_MANIFEST_PATH", str(BASE_DIR.parent / ".ingest_manifest.json"))
+SEARCH_CACHE_MAX_ENTRIES=int(getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_TTL=float(getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_SQLITE_MAX_ENTRIES=int(getenv("SEARCH_CACHE_SQLITE_MAX_ENTRIES", "100000"))
+SEARCH_CACHE_SQLITE_PATH=getenv("SEARCH_CACHE_SQLITE_PATH", str(BASE_DIR.parent / ".search_cache.sqlite3"))
+DOCUMENT_CATALOG_PATH=getenv("DOCUMENT_CATALOG_PATH", str(BASE_DIR.parent / ".document_catalog.sqlite3"))
+VECTOR_INDEX_BACKEND=getenv("VECTOR_INDEX_BACKEND", "astra")
+IN_MEMORY_INDEX_PATH=getenv("IN_MEMORY_INDEX_PATH", str(BASE_DIR.parent / ".in_memory_index"))
+BULK_INGEST_BATCH_SIZE=int(getenv("BULK_INGEST_BATCH_SIZE", "100"))
+BULK_INGEST_MAX_IN_FLIGHT=int(getenv("BULK_INGEST_MAX_IN_FLIGHT", "4"))
+BULK_INGEST_MAX_RETRIES=int(getenv("BULK_INGEST_MAX_RETRIES", "3"))
+BULK_INGEST_CHECKPOINT_DIR=getenv("BULK_INGEST_CHECKPOINT_DIR", str(BASE_DIR.parent / ".bulk_ingest"))
+PINECONE_API_KEY=getenv("PINECONE_API_KEY")
+PINECONE_INDEX_NAME=getenv("PINECONE_INDEX_NAME")
+PINECONE_HOST=getenv("PINECONE_HOST")
+PINECONE_NAMESPACE=getenv("PINECONE_NAMESPACE", "*")
+DUAL_WRITE_PRIMARY=getenv("DUAL_WRITE_PRIMARY", "astra")
+DUAL_WRITE_SECONDARY=getenv("DUAL_WRITE_SECONDARY", "memory")
+DUAL_WRITE_MISSED_PATH=getenv("DUAL_WRITE_MISSED_PATH", str(BASE_DIR.parent / ".dual_write_missed.jsonl"))
+LLM_GOVERNOR_CONCURRENCY=int(getenv("LLM_GOVERNOR_CONCURRENCY", "8"))
+LLM_GOVERNOR_MAX_CONCURRENCY=int(getenv("LLM_GOVERNOR_MAX_CONCURRENCY", "32"))
+LLM_GOVERNOR_LIMITS=getenv("LLM_GOVERNOR_LIMITS", "")
+LLM_GOVERNOR_MAX_RETRIES=int(getenv("LLM_GOVERNOR_MAX_RETRIES", "3"))
+LLM_GOVERNOR_LATENCY_TARGET_SECONDS=float(getenv("LLM_GOVERNOR_LATENCY_TARGET_SECONDS", "0"))
+LLM_HEDGE_AFTER_SECONDS=float(getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
\ No newline at end of file
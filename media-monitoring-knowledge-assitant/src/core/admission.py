@@ -0,0 +1,239 @@
+"""
+Admission control: token-bucket rate limits and a bounded-queue concurrency limiter
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import Iterable, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the HTTP status and Retry-After seconds"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0 on success, else the seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    At most `max_concurrent` requests run at once and at most `max_queued` wait.
+    A request is shed up front when the queue is full or when the expected wait
+    plus its own service time, both estimated from a moving average of service
+    time, exceeds its deadline.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, smoothing: float = 0.2):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.avg_service_time = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def expected_wait(self) -> float:
+        if self.in_flight < self.max_concurrent:
+            return 0.0
+        return (self.queued + 1) / self.max_concurrent * self.avg_service_time
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so it cannot be raced
+            await self._semaphore.acquire()
+        else:
+            if self.queued >= self.max_queued:
+                raise AdmissionRejected(503, "queue_full", self.expected_wait())
+            if self.expected_wait() + self.avg_service_time > deadline:
+                raise AdmissionRejected(503, "deadline", self.expected_wait())
+
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=deadline)
+            except asyncio.TimeoutError:
+                raise AdmissionRejected(503, "queue_timeout", self.expected_wait())
+            finally:
+                self.queued -= 1
+
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.avg_service_time += self.smoothing * (elapsed - self.avg_service_time)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+class AdmissionController:
+    """Per-client and global token buckets in front of a concurrency limiter"""
+
+    def __init__(
+        self,
+        client_rate: Optional[float],
+        client_burst: float,
+        global_rate: Optional[float],
+        global_burst: float,
+        max_concurrent: int,
+        max_queued: int,
+        max_wait: float,
+        max_clients: int = 10000,
+    ):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst) if global_rate else None
+        self.limiter = ConcurrencyLimiter(max_concurrent, max_queued) if max_concurrent else None
+        self.max_wait = max_wait
+        self.max_clients = max_clients
+        self.counts = Counter()
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _client_bucket(self, client_id: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._clients.get(client_id)
+            if bucket is None:
+                bucket = self._clients[client_id] = TokenBucket(self.client_rate, self.client_burst)
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client_id)
+            return bucket
+
+    def check_rate(self, client_id: str):
+        if self.client_rate:
+            wait = self._client_bucket(client_id).try_acquire()
+            if wait:
+                raise AdmissionRejected(429, "client_rate_limited", wait)
+        if self.global_bucket is not None:
+            wait = self.global_bucket.try_acquire()
+            if wait:
+                raise AdmissionRejected(429, "global_rate_limited", wait)
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, deadline: Optional[float] = None):
+        deadline = min(deadline, self.max_wait) if deadline else self.max_wait
+        try:
+            self.check_rate(client_id)
+            if self.limiter is None:
+                self.counts["admitted"] += 1
+                yield
+                return
+            async with self.limiter.slot(deadline):
+                self.counts["admitted"] += 1
+                yield
+        except AdmissionRejected as rejected:
+            self.counts[f"shed_{rejected.reason}"] += 1
+            raise
+
+    def metrics(self) -> dict:
+        metrics = {"counts": dict(self.counts), "tracked_clients": len(self._clients)}
+        if self.limiter is not None:
+            metrics.update({
+                "in_flight": self.limiter.in_flight,
+                "queued": self.limiter.queued,
+                "peak_queued": self.limiter.peak_queued,
+                "avg_service_time": round(self.limiter.avg_service_time, 4),
+            })
+        return metrics
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to HTTP requests.
+
+    Clients are identified by their peer address. When the peer is one of
+    `trusted_proxies`, the nearest untrusted address in `X-Forwarded-For` is used
+    instead. The caller-supplied `X-Client-ID` header is only a label echoed in
+    rejections: keying on it would let a client pick a fresh bucket per request.
+    An `X-Request-Timeout` header (seconds) tightens the queueing deadline.
+    """
+
+    def __init__(self, app, controller: AdmissionController, exempt_paths: Iterable[str] = (),
+                 trusted_proxies: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = set(exempt_paths)
+        self.trusted_proxies = set(trusted_proxies)
+
+    def client_address(self, scope, headers: dict) -> str:
+        peer = (scope.get("client") or ("unknown",))[0]
+        if peer not in self.trusted_proxies or "x-forwarded-for" not in headers:
+            return peer
+        # Proxies append the address they received from; the right-most untrusted hop is the client
+        for address in reversed([hop.strip() for hop in headers["x-forwarded-for"].split(",") if hop.strip()]):
+            if address not in self.trusted_proxies:
+                return address
+        return peer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        client_id = self.client_address(scope, headers)
+        try:
+            deadline = float(headers["x-request-timeout"]) if "x-request-timeout" in headers else None
+        except ValueError:
+            deadline = None
+
+        try:
+            async with self.controller.admit(client_id, deadline):
+                await self.app(scope, receive, send)
+        except AdmissionRejected as rejected:
+            await self._reject(send, rejected, headers.get("x-client-id"))
+
+    @staticmethod
+    async def _reject(send, rejected: AdmissionRejected, label: Optional[str] = None):
+        details = {"reason": rejected.reason, "retry_after": rejected.retry_after}
+        if label:
+            details["client_label"] = label
+        body = json.dumps({
+            "error": "RateLimited" if rejected.status_code == 429 else "Overloaded",
+            "message": "Too many requests, please retry later" if rejected.status_code == 429
+            else "Server is overloaded, please retry later",
+            "details": details,
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": rejected.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(rejected.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,89 @@
+"""
+Registry of lazily created, process-wide resources (vector stores, embedders, clients)
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict
+
+
+class ResourceRegistry:
+    """
+    Named resources built by their factory on first `get`, at most once per process.
+
+    Each name has its own lock, so a slow connection does not block unrelated
+    resources. `aget` builds in a worker thread to keep the event loop free, and
+    forked children drop the parent's instances (sockets and sessions do not
+    survive a fork) and rebuild them on first use. Resources registered with
+    `fork_safe=True` (in-memory models, read-only indexes) are kept instead, so a
+    pre-fork master can build them once and share the pages copy-on-write.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._fork_safe: set = set()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], replace: bool = False, fork_safe: bool = False):
+        """The first registration of a name wins unless `replace` is set (which also drops the instance)"""
+        with self._lock:
+            if name in self._factories and not replace:
+                return
+            self._factories[name] = factory
+            if fork_safe:
+                self._fork_safe.add(name)
+            else:
+                self._fork_safe.discard(name)
+            self._locks.setdefault(name, threading.Lock())
+            if replace:
+                self._instances.pop(name, None)
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"Resource '{name}' is not registered")
+            factory, lock = self._factories[name], self._locks[name]
+        with lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+            return self._instances[name]
+
+    async def aget(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        return await asyncio.to_thread(self.get, name)
+
+    def warm_up(self, *names: str) -> Dict[str, Any]:
+        """Build the named resources (all registered ones by default) ahead of traffic"""
+        return {name: self.get(name) for name in (names or list(self._factories))}
+
+    def warm_up_fork_safe(self) -> Dict[str, Any]:
+        """Build only the resources that may be inherited by forked workers"""
+        return self.warm_up(*self._fork_safe) if self._fork_safe else {}
+
+    def reset(self, *names: str):
+        """Forget built instances (all by default) so the next `get` rebuilds them"""
+        with self._lock:
+            for name in (names or list(self._instances)):
+                self._instances.pop(name, None)
+
+    def _reset_after_fork(self):
+        # Locks may have been held by another parent thread at fork time
+        self._lock = threading.Lock()
+        self._locks = {name: threading.Lock() for name in self._factories}
+        self._instances = {name: value for name, value in self._instances.items() if name in self._fork_safe}
+
+
+registry = ResourceRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry._reset_after_fork)
@@ -1,13 +1,37 @@
 """
 Singleton base class
 """
+import functools
+import threading
  
 class SingletonBase:
     """Provides Singleton behavior to any class that inherits it."""
     _instance = None
+    _lock = threading.RLock()
+
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
+        # Look in the class's own namespace so subclasses never share an instance
+        if cls.__dict__.get("_instance") is None:
+            with SingletonBase._lock:
+                if cls.__dict__.get("_instance") is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        init = cls.__dict__.get("__init__")
+        if init is None:
+            return
+
+        @functools.wraps(init)
+        def __init__(self, *args, **kwargs):
+            # Python calls __init__ on every instantiation; only the first one runs
+            with SingletonBase._lock:
+                if self.__dict__.get("_singleton_initialized"):
+                    return
+                init(self, *args, **kwargs)
+                self._singleton_initialized = True
+
+        cls.__init__ = __init__
  
  
\ No newline at end of file
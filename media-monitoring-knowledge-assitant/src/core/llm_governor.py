@@ -0,0 +1,388 @@
+"""
+Per-process governor for Gemini calls (answers and embeddings).
+
+Every governed call takes a slot from its model's `AdaptiveLimiter` first. The
+limit adapts AIMD-style: it grows by about one slot per round of successful calls
+while it is in use, and is cut at most once per round trip on a 429 (halved) or,
+with `LLM_GOVERNOR_LATENCY_TARGET_SECONDS` set, on a call slower than the target.
+Rate-limited calls are retried here with backoff before the caller sees the error.
+
+Queued calls are served by priority: `INTERACTIVE`, then `NORMAL` (API requests),
+then `BATCH` (seeding and bulk ingestion). With `LLM_HEDGE_AFTER_SECONDS` set, a
+non-batch call still running after that long is duplicated if its model has a free
+slot, and the first answer wins. Each worker process has its own governor.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.base.registry import registry
+from config.settings import (
+    LLM_GOVERNOR_CONCURRENCY, LLM_GOVERNOR_LATENCY_TARGET_SECONDS, LLM_GOVERNOR_LIMITS, LLM_GOVERNOR_MAX_CONCURRENCY,
+    LLM_GOVERNOR_MAX_RETRIES, LLM_HEDGE_AFTER_SECONDS,
+)
+
+LLM_GOVERNOR = "llm_governor"
+
+INTERACTIVE, NORMAL, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BATCH: "batch"}
+
+OK, RATE_LIMITED, ERROR, CANCELLED = "ok", "rate_limited", "error", "cancelled"
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=NORMAL)
+
+RATE_LIMIT_RE = re.compile(r"\b429\b|resource_?exhausted|rate.?limit|quota", re.IGNORECASE)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Every governed LLM call made inside the block queues at `priority`"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_rate_limit(error: Optional[BaseException]) -> bool:
+    """429 / RESOURCE_EXHAUSTED, however the SDK wrapped it"""
+    while error is not None:
+        code = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if code == 429:
+            return True
+        if RATE_LIMIT_RE.search(f"{type(error).__name__} {error}"):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _parse_limits(raw: str) -> dict:
+    limits = {}
+    for pair in raw.split(","):
+        model, _, limit = pair.partition("=")
+        if model.strip() and limit.strip():
+            limits[model.strip()] = int(limit)
+    return limits
+
+
+class _Waiter:
+    __slots__ = ("priority", "granted", "cancelled", "_event", "_loop", "_future")
+
+    def __init__(self, priority: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.granted = False
+        self.cancelled = False
+        self._loop = loop
+        self._event = None if loop else threading.Event()
+        self._future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(lambda: self._future.done() or self._future.set_result(None))
+
+
+class AdaptiveLimiter:
+    """Priority-ordered concurrency limit for one model, adjusted additively up and multiplicatively down"""
+
+    def __init__(self, name: str, initial: int, min_limit: int = 1, max_limit: int = 32, backoff: float = 0.5,
+                 latency_target: float = 0.0, cooldown: float = 1.0):
+        """`cooldown` spaces cuts until a call has succeeded; from then on the mean call latency does"""
+        self.name = name
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counts = {"calls": 0, OK: 0, RATE_LIMITED: 0, ERROR: 0, CANCELLED: 0, "decreases": 0,
+                       "retries": 0, "hedged": 0, "hedge_wins": 0}
+        self.waited = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self.mean_latency = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.cancelled)
+
+    def _has_room(self) -> bool:
+        return self.in_flight < max(self.min_limit, int(self.limit))
+
+    def _start_locked(self):
+        self.in_flight += 1
+        self.counts["calls"] += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _dispatch_locked(self):
+        while self._waiters and self._has_room():
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.cancelled:
+                continue
+            self._start_locked()
+            waiter.granted = True
+            waiter.wake()
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free and nobody is queued for it"""
+        with self._lock:
+            if self._waiters or not self._has_room():
+                return False
+            self._start_locked()
+            return True
+
+    def _enqueue(self, priority: int, loop=None) -> Optional[_Waiter]:
+        with self._lock:
+            if not self._waiters and self._has_room():
+                self._start_locked()
+                return None
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            return waiter
+
+    def acquire(self, priority: int = NORMAL) -> None:
+        started = time.perf_counter()
+        waiter = self._enqueue(priority)
+        if waiter is not None:
+            waiter._event.wait()
+        self._record_wait(priority, time.perf_counter() - started)
+
+    async def acquire_async(self, priority: int = NORMAL) -> None:
+        started = time.perf_counter()
+        waiter = self._enqueue(priority, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await waiter._future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter.granted:
+                        self._finish_locked(CANCELLED, 0.0)
+                    else:
+                        waiter.cancelled = True
+                raise
+        self._record_wait(priority, time.perf_counter() - started)
+
+    def _record_wait(self, priority: int, seconds: float):
+        with self._lock:
+            self.waited[PRIORITY_NAMES.get(priority, "normal")] += seconds
+
+    def _decrease_locked(self, factor: float):
+        now = time.monotonic()
+        # One cut per round trip: a burst of 429s from the same overload is one congestion signal
+        if now - self._last_decrease >= (self.mean_latency or self.cooldown):
+            self.limit = max(float(self.min_limit), self.limit * factor)
+            self._last_decrease = now
+            self.counts["decreases"] += 1
+
+    def _finish_locked(self, outcome: str, latency: float):
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        self.counts[outcome] += 1
+        if outcome == RATE_LIMITED:
+            self._decrease_locked(self.backoff)
+        elif outcome == OK:
+            self.mean_latency = latency if not self.mean_latency else 0.8 * self.mean_latency + 0.2 * latency
+            if self.latency_target and latency > self.latency_target:
+                self._decrease_locked(0.9)
+            elif saturated:
+                # Roughly +1 slot per `limit` successful calls, and only while the limit is the bottleneck
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self._dispatch_locked()
+
+    def release(self, outcome: str, latency: float) -> None:
+        with self._lock:
+            self._finish_locked(outcome, latency)
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            self.counts[counter] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "peak_in_flight": self.peak_in_flight,
+                "mean_latency_s": round(self.mean_latency, 4),
+                **self.counts,
+                "waited_s": {name: round(seconds, 3) for name, seconds in self.waited.items()},
+            }
+
+
+class LLMGovernor:
+    """One `AdaptiveLimiter` per model, plus 429 retries and optional hedging around each call"""
+
+    def __init__(self, initial: int = LLM_GOVERNOR_CONCURRENCY, max_limit: int = LLM_GOVERNOR_MAX_CONCURRENCY,
+                 limits: Optional[dict] = None, max_retries: int = LLM_GOVERNOR_MAX_RETRIES, retry_backoff: float = 0.5,
+                 latency_target: float = LLM_GOVERNOR_LATENCY_TARGET_SECONDS,
+                 hedge_after: float = LLM_HEDGE_AFTER_SECONDS, hedge_priorities: tuple = (INTERACTIVE, NORMAL),
+                 cooldown: float = 1.0):
+        self.initial = initial
+        self.max_limit = max_limit
+        self.limits = _parse_limits(LLM_GOVERNOR_LIMITS) if limits is None else dict(limits)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.latency_target = latency_target
+        self.hedge_after = hedge_after
+        self.hedge_priorities = hedge_priorities
+        self.cooldown = cooldown
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+        self._hedge_pool = None
+
+    def limiter(self, model: str) -> AdaptiveLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = AdaptiveLimiter(
+                    model, self.limits.get(model, self.initial), max_limit=self.max_limit,
+                    latency_target=self.latency_target, cooldown=self.cooldown,
+                )
+            return self._limiters[model]
+
+    def _retry_delay(self, attempt: int) -> float:
+        return self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    def _hedges(self, priority: int) -> bool:
+        return bool(self.hedge_after) and priority in self.hedge_priorities
+
+    # Sync calls (workflow.invoke, agents run in worker threads)
+
+    def _run(self, limiter: AdaptiveLimiter, fn: Callable[[], Any]):
+        """Run `fn` in an already acquired slot and report the outcome"""
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except BaseException as e:
+            limiter.release(RATE_LIMITED if is_rate_limit(e) else ERROR, time.perf_counter() - started)
+            raise
+        limiter.release(OK, time.perf_counter() - started)
+        return result
+
+    def _attempt(self, limiter: AdaptiveLimiter, fn, priority: int):
+        limiter.acquire(priority)
+        return self._run(limiter, fn)
+
+    def _hedged(self, limiter: AdaptiveLimiter, fn, priority: int):
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        primary = self._hedge_pool.submit(copy_context().run, self._attempt, limiter, fn, priority)
+        try:
+            return primary.result(timeout=self.hedge_after)
+        except FutureTimeout:
+            pass
+        if not limiter.try_acquire():
+            # No spare capacity: a duplicate would only add load
+            return primary.result()
+        limiter.record("hedged")
+        hedge = self._hedge_pool.submit(copy_context().run, self._run, limiter, fn)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        limiter.record("hedge_wins")
+                    # The loser finishes in the background and frees its slot then
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, model: str, fn: Callable[[], Any], priority: Optional[int] = None):
+        priority = current_priority() if priority is None else priority
+        limiter = self.limiter(model)
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._hedges(priority):
+                    return self._hedged(limiter, fn, priority)
+                return self._attempt(limiter, fn, priority)
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                limiter.record("retries")
+                time.sleep(self._retry_delay(attempt))
+
+    # Async calls (workflow.ainvoke)
+
+    async def _arun(self, limiter: AdaptiveLimiter, fn: Callable[[], Awaitable]):
+        started = time.perf_counter()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            limiter.release(CANCELLED, time.perf_counter() - started)
+            raise
+        except BaseException as e:
+            limiter.release(RATE_LIMITED if is_rate_limit(e) else ERROR, time.perf_counter() - started)
+            raise
+        limiter.release(OK, time.perf_counter() - started)
+        return result
+
+    async def _aattempt(self, limiter: AdaptiveLimiter, fn, priority: int):
+        await limiter.acquire_async(priority)
+        return await self._arun(limiter, fn)
+
+    async def _ahedged(self, limiter: AdaptiveLimiter, fn, priority: int):
+        primary = asyncio.ensure_future(self._aattempt(limiter, fn, priority))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done or not limiter.try_acquire():
+            return await primary
+        limiter.record("hedged")
+        hedge = asyncio.ensure_future(self._arun(limiter, fn))
+        pending, error = {primary, hedge}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            limiter.record("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acall(self, model: str, fn: Callable[[], Awaitable], priority: Optional[int] = None):
+        priority = current_priority() if priority is None else priority
+        limiter = self.limiter(model)
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._hedges(priority):
+                    return await self._ahedged(limiter, fn, priority)
+                return await self._aattempt(limiter, fn, priority)
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                limiter.record("retries")
+                await asyncio.sleep(self._retry_delay(attempt))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {model: limiter.snapshot() for model, limiter in limiters.items()}
+
+
+registry.register(LLM_GOVERNOR, LLMGovernor)
+
+
+def get_llm_governor() -> LLMGovernor:
+    return registry.get(LLM_GOVERNOR)
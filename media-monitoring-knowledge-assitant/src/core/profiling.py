@@ -0,0 +1,112 @@
+"""
+Cold-start profiling: `-X importtime` trees and time-to-first-request.
+
+Every measurement runs in a fresh interpreter so module caches from the calling
+process cannot hide import cost. Used by `manage.py profile-startup` and by the
+import-time budget test.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Iterable, List, Optional
+
+# Loading any of these at import time is a regression: they belong behind first use
+HEAVY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "langgraph",
+    "langchain_google_genai",
+    "langchain_astradb",
+    "langchain_community",
+    "langchain_text_splitters",
+    "cassio",
+    "llama_index",
+    "pinecone",
+    "uvicorn",
+)
+
+_FIRST_REQUEST_SNIPPET = """
+import importlib, json, sys, time
+started = time.perf_counter()
+module_name, _, attribute = sys.argv[1].partition(":")
+app = getattr(importlib.import_module(module_name), attribute or "app")
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+response = TestClient(app).get(sys.argv[2])
+print(json.dumps({
+    "import_s": imported - started,
+    "first_request_s": time.perf_counter() - imported,
+    "status": response.status_code,
+}))
+"""
+
+
+def _run(args: List[str], paths: Iterable[str] = ()) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([*map(str, paths), env.get("PYTHONPATH", "")]).strip(os.pathsep)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env)
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Rebuild the import tree from `-X importtime` output (children are printed before their parent)"""
+    pending = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the header row
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        node = {
+            "name": raw_name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def import_tree(module: str, paths: Iterable[str] = ()) -> List[dict]:
+    result = _run(["-X", "importtime", "-c", f"import {module}"], paths)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+
+def loaded_heavy_modules(module: str, paths: Iterable[str] = ()) -> List[str]:
+    """The HEAVY_MODULES that importing `module` pulls in"""
+    snippet = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]))"
+    )
+    result = _run(["-c", snippet], paths)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_request(app_path: str, path: str = "/health", paths: Iterable[str] = ()) -> dict:
+    """Interpreter start, app import and the first in-process request, measured in a fresh process"""
+    started = time.perf_counter()
+    result = _run(["-c", _FIRST_REQUEST_SNIPPET, app_path, path], paths)
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"First request to {app_path} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["total_s"] = total
+    return report
+
+
+def format_tree(nodes: List[dict], min_ms: float = 5.0, max_depth: Optional[int] = 6, depth: int = 0) -> List[str]:
+    """Render nodes slowest first, hiding subtrees cheaper than `min_ms`"""
+    lines = []
+    for node in sorted(nodes, key=lambda n: n["cumulative_ms"], reverse=True):
+        if node["cumulative_ms"] < min_ms:
+            continue
+        lines.append(f"{node['cumulative_ms']:9.1f} ms {node['self_ms']:8.1f} ms  {'  ' * depth}{node['name']}")
+        if max_depth is None or depth + 1 < max_depth:
+            lines.extend(format_tree(node["children"], min_ms, max_depth, depth + 1))
+    return lines
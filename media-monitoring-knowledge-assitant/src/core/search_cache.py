@@ -0,0 +1,175 @@
+"""
+Versioned cache for search results and generated answers.
+
+Keys combine the normalized query, `top_k`, filters and the index generation, so
+bumping the generation after ingestion makes every older entry unreachable. By
+default entries and the generation live in the SQLite file at
+`SEARCH_CACHE_SQLITE_PATH`, shared by all workers on the host and by the ingest
+commands in `manage.py`. Setting it to "" keeps both in process memory, where a
+bump is seen only by the process that made it; that mode is for a single worker
+that does all of its own indexing, and `serve` refuses it with more workers.
+
+ETags carry the TTL window as well as the key, so a client revalidating with an
+old ETag gets a fresh response at least once per `SEARCH_CACHE_TTL`, even if a
+generation bump was missed.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Optional
+
+from core.base.registry import registry
+from config.settings import (
+    SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_SQLITE_MAX_ENTRIES, SEARCH_CACHE_SQLITE_PATH, SEARCH_CACHE_TTL,
+)
+
+SEARCH_CACHE = "search_cache"
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+class SearchCache:
+    """In-memory LRU with TTL in front of an optional SQLite tier"""
+
+    # Every this many writes, expired SQLite rows are deleted and the table is cut to `sqlite_max_entries`
+    prune_every = 256
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, sqlite_path: Optional[str] = None,
+                 sqlite_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.sqlite_max_entries = sqlite_max_entries
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path or None
+        self.counts = Counter()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; reopen in each process
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.sqlite_path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def generation(self) -> int:
+        if not self.sqlite_path:
+            return self._generation
+        with self._lock:
+            row = self._db().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self) -> int:
+        """Invalidate everything cached so far; call after the index changes"""
+        with self._lock:
+            self._entries.clear()
+            if not self.sqlite_path:
+                self._generation += 1
+                return self._generation
+            db = self._db()
+            db.execute(
+                "INSERT INTO meta (name, value) VALUES ('generation', 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+            )
+            db.execute("DELETE FROM entries")
+            return db.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()[0]
+
+    def key(self, kind: str, query: str, top_k: int, filters: Optional[dict] = None) -> str:
+        payload = json.dumps(
+            [kind, normalize_query(query), top_k, filters or {}, self.generation()], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def etag(self, key: str) -> str:
+        """Strong ETag for `key`, valid until the current TTL window ends"""
+        window = int(time.time() // self.ttl) if self.ttl > 0 else 0
+        return f'"{key}-{window}"'
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.counts["hits"] += 1
+                    return value
+                del self._entries[key]
+            if self.sqlite_path:
+                row = self._db().execute(
+                    "SELECT value, expires FROM entries WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.counts["disk_hits"] += 1
+                    return value
+            self.counts["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires)
+            if self.sqlite_path:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires),
+                )
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    self._prune(db)
+
+    def _prune(self, db: sqlite3.Connection):
+        """Drop expired rows, then the soonest-to-expire ones past `sqlite_max_entries`"""
+        db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        db.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.sqlite_max_entries,),
+        )
+        self.counts["pruned"] += 1
+
+    def _store(self, key: str, value: Any, expires: float):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.counts["hits"] + self.counts["disk_hits"] + self.counts["misses"]
+        hits = self.counts["hits"] + self.counts["disk_hits"]
+        return {
+            **self.counts,
+            "entries": len(self._entries),
+            "generation": self.generation(),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "shared": bool(self.sqlite_path),
+        }
+
+
+registry.register(
+    SEARCH_CACHE,
+    lambda: SearchCache(
+        SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL, SEARCH_CACHE_SQLITE_PATH, SEARCH_CACHE_SQLITE_MAX_ENTRIES,
+    ),
+)
+
+
+def get_search_cache() -> SearchCache:
+    return registry.get(SEARCH_CACHE)
@@ -0,0 +1,135 @@
+"""
+Pre-fork production server.
+
+The master imports the app, builds the fork-safe resources in the registry (local
+models and read-only indexes), freezes the GC so those pages stay shared
+copy-on-write, binds one listening socket and forks the workers. Each worker
+drops the parent's network clients (see `ResourceRegistry`), reconnects during
+warm-up and only then reports ready on `/ready`.
+"""
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+
+from core.base.registry import registry
+from config.settings import SEARCH_CACHE_SQLITE_PATH
+
+STARTED_AT_ENV = "SERVE_STARTED_AT"
+WARM_UP_ENV = "WARM_UP_ON_STARTUP"
+
+
+def memory_usage_mb(pid: str = "self") -> dict:
+    """RSS and the part of it shared with other processes, from /proc (Linux only)"""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                    usage[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(usage.get("Rss", 0), 1),
+        "pss_mb": round(usage.get("Pss", 0), 1),
+        "shared_mb": round(usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0), 1),
+    }
+
+
+def time_since_start() -> float:
+    return time.time() - float(os.environ.get(STARTED_AT_ENV, time.time()))
+
+
+def load_app(app_path: str):
+    module_name, _, attribute = app_path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    # Restore default handlers; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(app_path: str = "main.main:app", host: str = "0.0.0.0", port: int = 8000,
+          workers: int = 2, log_level: str = "info") -> int:
+    if workers > 1 and not SEARCH_CACHE_SQLITE_PATH:
+        # Each worker would keep its own cache generation and miss the others' bumps
+        print("SEARCH_CACHE_SQLITE_PATH is empty; the search cache must be shared to run more than one worker",
+              file=sys.stderr)
+        return 1
+    os.environ.setdefault(STARTED_AT_ENV, str(time.time()))
+    os.environ[WARM_UP_ENV] = "true"
+
+    gc.disable()
+    app = load_app(app_path)
+    preloaded = registry.warm_up_fork_safe()
+    gc.collect()
+    gc.freeze()
+    print(f"Master {os.getpid()} preloaded {sorted(preloaded) or 'nothing'} in {time_since_start():.2f}s "
+          f"{memory_usage_mb()}")
+
+    sock = bind_socket(host, port)
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            gc.enable()
+            try:
+                _run_worker(app, sock, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.time()
+        return pid
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    gc.enable()
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if not stopping and started is not None:
+            print(f"Worker {pid} exited with status {status}; restarting", file=sys.stderr)
+            if time.time() - started < 1:
+                time.sleep(1)  # avoid a tight crash loop
+            spawn()
+    sock.close()
+    return 0
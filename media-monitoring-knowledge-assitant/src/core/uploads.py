@@ -0,0 +1,142 @@
+"""
+Streaming multipart upload: the body is parsed as it arrives and the file part is
+written to disk chunk by chunk, hashed and size-checked on the way, so memory per
+upload stays constant regardless of file size.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    filename: str
+    size: int
+    sha256: str
+
+
+class _FilePartWriter:
+    """Multipart callbacks that stream the `field_name` part into a temp file"""
+
+    def __init__(self, field_name: str, dest_dir: Path, max_size: int, is_allowed: Callable[[str], bool]):
+        self.field_name = field_name
+        self.dest_dir = dest_dir
+        self.max_size = max_size
+        self.is_allowed = is_allowed
+        self.result: Optional[StoredUpload] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+        self._file = None
+        self._path = None
+        self._hash = None
+        self._size = 0
+        self._filename = None
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda data, start, end: self._append("_header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._append("_header_value", data[start:end]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def _append(self, attribute: str, data: bytes):
+        setattr(self, attribute, getattr(self, attribute) + data)
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field, self._header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("latin-1") != self.field_name or b"filename" not in options:
+            return
+        if self.result is not None or self._file is not None:
+            raise UploadRejected(400, "Only one file can be uploaded per request")
+        filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+        if not filename:
+            raise UploadRejected(400, "No filename provided")
+        if not self.is_allowed(filename):
+            raise UploadRejected(415, f"File type not allowed: {Path(filename).suffix or filename}")
+        self._filename = filename
+        self._hash = hashlib.sha256()
+        self._size = 0
+        fd, path = tempfile.mkstemp(dir=self.dest_dir, suffix=Path(filename).suffix)
+        self._file = os.fdopen(fd, "wb")
+        self._path = Path(path)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._file is None:
+            return
+        self._size += end - start
+        if self._size > self.max_size:
+            raise UploadRejected(413, f"File exceeds the {self.max_size} byte limit")
+        chunk = data[start:end]
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def on_part_end(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self.result = StoredUpload(self._path, self._filename, self._size, self._hash.hexdigest())
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None and self._path.exists():
+            self._path.unlink()
+
+
+async def receive_upload(request, dest_dir, max_size: int, is_allowed: Callable[[str], bool],
+                         field_name: str = "file") -> StoredUpload:
+    """Stream the `field_name` file part of a multipart request to `dest_dir`"""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadRejected(415, "Expected a multipart/form-data upload")
+    # Reject before reading a byte when the client announces an oversized body
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_size + 64 * 1024:
+        raise UploadRejected(413, f"File exceeds the {max_size} byte limit")
+
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    writer = _FilePartWriter(field_name, dest_dir, max_size, is_allowed)
+    parser = MultipartParser(options[b"boundary"], writer.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except MultipartParseError as e:
+        writer.discard()
+        raise UploadRejected(400, f"Malformed multipart body: {e}")
+    except BaseException:
+        writer.discard()
+        raise
+    if writer.result is None:
+        writer.discard()
+        raise UploadRejected(400, f"No '{field_name}' file part in the request")
+    return writer.result
@@ -1,11 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
 
-from src.vector_store.vector_index_strategies.astradb_vector_index import AstraDBVectorIndex
+# Resolved through the resource registry: Astra is connected on the first query and seeded by `manage.py seed`
+from vector_store.vectorstore_singletone import vector_store
+from main.models import (
+    BatchSearchRequest, BatchSearchResponse, DocumentInfo, DocumentsListResponse, HealthResponse, IndexingStatusResponse, SearchRequest, SearchResponse,
+    SearchResult, UploadResponse,
+)
+from config.api_settings import api_settings, is_file_type_allowed
+from config.settings import INGEST_MANIFEST_PATH
+from core.admission import AdmissionController, AdmissionMiddleware
+from core.llm_governor import get_llm_governor
+from core.search_cache import get_search_cache
+from core.server import WARM_UP_ENV, memory_usage_mb, time_since_start
+from core.uploads import UploadRejected, receive_upload
+from vector_store.catalog import STATUS_QUEUED, get_document_catalog
+from vector_store.ingest import can_extract, index_document
+from vector_store.vector_index_strategies.base import UnsupportedFilter
 
 app = FastAPI()
 
+# Shed excess load before it fans out to Gemini and Astra; health and metrics stay reachable
+window = api_settings.RATE_LIMIT_WINDOW
+admission = AdmissionController(
+    client_rate=api_settings.RATE_LIMIT_REQUESTS / window if api_settings.RATE_LIMIT_ENABLED else None,
+    client_burst=api_settings.RATE_LIMIT_BURST,
+    global_rate=(
+        api_settings.GLOBAL_RATE_LIMIT_REQUESTS / window
+        if api_settings.RATE_LIMIT_ENABLED and api_settings.GLOBAL_RATE_LIMIT_REQUESTS else None
+    ),
+    global_burst=api_settings.GLOBAL_RATE_LIMIT_BURST,
+    max_concurrent=api_settings.MAX_CONCURRENT_REQUESTS,
+    max_queued=api_settings.MAX_QUEUED_REQUESTS,
+    max_wait=api_settings.MAX_QUEUE_WAIT,
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    exempt_paths=(
+        "/health", "/ready", "/metrics/admission", "/metrics/cache", "/metrics/llm", "/docs", "/redoc", "/openapi.json",
+    ),
+    trusted_proxies=api_settings.TRUSTED_PROXIES,
+)
+
 class ChatRequest(BaseModel):
     query: str
 
@@ -13,15 +57,249 @@ class ChatRequest(BaseModel):
 def root():
     return{"message": "Hello world"}
 
-vector_store = AstraDBVectorIndex(
-        ASTRA_DB_APPLICATION_TOKEN="<ASTRA_DB_APPLICATION_TOKEN>",
-        ASTRA_DB_API_ENDPOINT="<ASTRA_DB_API_ENDPOINT>",
-        ASTRA_DB_COLLECTION_NAME="<ASTRA_DB_COLLECTION_NAME>",
-        ASTRA_DB_ID="<ASTRA_DB_ID>",
-        GEMINI_API_KEY="<GEMINI_API_KEY>"
-)
+@app.get("/health", response_model=HealthResponse)
+def health():
+    """Answers without touching the vector store, so it is fast even before the first query"""
+    state = "connected" if vector_store.is_open else "connects on first query"
+    return HealthResponse(
+        status="healthy",
+        message=f"Media monitoring API is running (vector store {state})",
+        version="1.0.0",
+    )
+
+# Under `manage.py serve` each worker connects before reporting ready; otherwise resources open lazily
+readiness = {"ready": os.getenv(WARM_UP_ENV, "false").lower() != "true"}
+
+async def _warm_up():
+    try:
+        await asyncio.to_thread(vector_store.warm_up)
+    except Exception as e:
+        readiness["error"] = str(e)
+        print(f"Worker {os.getpid()} warm-up failed: {e}")
+        return
+    readiness.update(ready=True, time_to_ready_s=round(time_since_start(), 3), **memory_usage_mb())
+    print(f"Worker {os.getpid()} ready: {readiness}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    if not readiness["ready"]:
+        app.state.warm_up_task = asyncio.create_task(_warm_up())
+
+@app.get("/ready")
+def ready(response: Response):
+    """200 once this worker has warmed up, 503 before; includes time-to-ready and memory usage"""
+    if not readiness["ready"]:
+        response.status_code = 503
+    return {"pid": os.getpid(), **readiness, **memory_usage_mb()}
+
+@app.get("/metrics/admission")
+def admission_metrics():
+    """Admitted and shed request counts, queue depth and in-flight requests"""
+    return admission.metrics()
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Search cache hits, misses and the current index generation"""
+    return get_search_cache().stats()
+
+@app.get("/metrics/llm")
+def llm_metrics():
+    """Per-model Gemini concurrency limit, 429s, retries, hedges and queueing time in this worker"""
+    return get_llm_governor().snapshot()
+
+def _not_modified(http_request: Request, etag: str) -> bool:
+    """True when the client already holds the response for this key, index generation and TTL window"""
+    if_none_match = http_request.headers.get("if-none-match", "")
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(",") if tag.strip())
 
 @app.post("/")
-def assistant_api(request: ChatRequest):
-    result = vector_store.query(request.query, 32)
-    return {"message":f"{result}!"}
\ No newline at end of file
+async def assistant_api(request: ChatRequest, http_request: Request, response: Response):
+    cache = get_search_cache()
+    key = cache.key("answer", request.query, 32)
+    etag = cache.etag(key)
+    if _not_modified(http_request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    result = cache.get(key)
+    if result is None:
+        result = await vector_store.aquery(request.query, 32)
+        cache.set(key, result)
+    response.headers["ETag"] = etag
+    return {"message":f"{result}!"}
+
+@app.post("/search/", response_model=SearchResponse)
+async def search(request: SearchRequest, http_request: Request, response: Response):
+    """Retrieval-only search; the LLM is called only when `generate_answer` is set"""
+    query = request.query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+
+    start = time.perf_counter()
+    cache = get_search_cache()
+    key = cache.key("search+answer" if request.generate_answer else "search", query, request.top_k, request.filters)
+    etag = cache.etag(key)
+    if _not_modified(http_request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    cached = cache.get(key)
+    if cached is not None:
+        matches, answer = cached["matches"], cached["answer"]
+    else:
+        matches, answer = await _run_search(query, request.top_k, request.generate_answer, request.filters)
+        cache.set(key, {"matches": matches, "answer": answer})
+
+    results = [SearchResult(**match) for match in matches]
+    return SearchResponse(
+        query=query,
+        results=results,
+        total_results=len(results),
+        processing_time=round(time.perf_counter() - start, 4),
+        answer=answer,
+    )
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest):
+    """Retrieval for several queries at once: cache misses are embedded in one call and searched together"""
+    queries = [query.strip() for query in request.queries]
+    if not all(queries):
+        raise HTTPException(status_code=400, detail="Search queries must not be empty")
+
+    start = time.perf_counter()
+    cache = get_search_cache()
+    # Same keys as POST /search/, so the two endpoints share cached results
+    keys = [cache.key("search", query, request.top_k, request.filters) for query in queries]
+    matches = {}
+    for key in dict.fromkeys(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            matches[key] = cached["matches"]
+
+    misses = {key: query for key, query in zip(keys, queries) if key not in matches}
+    if misses:
+        try:
+            found = await vector_store.asearch_many(list(misses.values()), request.top_k, request.filters)
+        except UnsupportedFilter as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Search operation failed: {e}")
+        for key, result in zip(misses, found):
+            matches[key] = result
+            cache.set(key, {"matches": result, "answer": None})
+
+    processing_time = round(time.perf_counter() - start, 4)
+    results = []
+    for key, query in zip(keys, queries):
+        query_results = [SearchResult(**match) for match in matches[key]]
+        results.append(SearchResponse(
+            query=query,
+            results=query_results,
+            total_results=len(query_results),
+            processing_time=processing_time,
+        ))
+    return BatchSearchResponse(
+        results=results,
+        total_queries=len(results),
+        cached_queries=len(set(keys)) - len(misses),
+        processing_time=processing_time,
+    )
+
+async def _run_search(query: str, top_k: int, generate_answer: bool, filters: Optional[dict] = None):
+    try:
+        if generate_answer:
+            matches, answer = await asyncio.gather(
+                vector_store.asearch(query, top_k, filters),
+                vector_store.aquery(query, top_k, filters),
+            )
+        else:
+            matches, answer = await vector_store.asearch(query, top_k, filters), None
+    except UnsupportedFilter as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search operation failed: {e}")
+    return matches, answer
+
+# Indexing runs on its own pool rather than as a BackgroundTask: Starlette runs those inside the
+# response, so each job would hold an admission slot and inflate the service time used for shedding
+_indexing_pool = ThreadPoolExecutor(max_workers=max(1, api_settings.INDEXING_WORKERS), thread_name_prefix="upload-index")
+
+def _index_upload(path, filename: str, sha256: str):
+    try:
+        index_document(vector_store.vector_store, path, filename, sha256, INGEST_MANIFEST_PATH)
+    except Exception:
+        # index_document has recorded the failure in the catalog and logged it
+        pass
+
+@app.on_event("shutdown")
+def stop_indexing():
+    # Let queued uploads finish, as uvicorn's graceful shutdown did for background tasks
+    _indexing_pool.shutdown(wait=True)
+
+def _is_indexable(filename: str) -> bool:
+    """Allowed by ALLOWED_FILE_TYPES and readable by the indexer, so nothing is accepted only to fail later"""
+    return is_file_type_allowed(filename) and can_extract(filename)
+
+@app.post("/upload/", response_model=UploadResponse)
+async def upload_document(http_request: Request):
+    """Stream a document to disk (hashing and size-checking as it arrives) and index it in the background"""
+    try:
+        upload = await receive_upload(
+            http_request, api_settings.TEMP_DIR, api_settings.MAX_FILE_SIZE, _is_indexable
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    content = {"sha256": upload.sha256}
+    catalog = get_document_catalog()
+    if catalog.is_indexed(upload.sha256):
+        upload.path.unlink(missing_ok=True)
+        return UploadResponse(
+            filename=upload.filename,
+            content={**content, "status": "already_indexed"},
+            message="Document already indexed; skipped",
+            file_size=upload.size,
+        )
+
+    catalog.record(
+        upload.sha256, filename=upload.filename, file_size=upload.size, source="upload",
+        processing_status=STATUS_QUEUED, indexed=False, error=None,
+    )
+    _indexing_pool.submit(_index_upload, upload.path, upload.filename, upload.sha256)
+    return UploadResponse(
+        filename=upload.filename,
+        content={**content, "status": "queued"},
+        message="Document uploaded; indexing in background",
+        file_size=upload.size,
+    )
+
+@app.get("/documents/", response_model=DocumentsListResponse)
+def list_documents(limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None):
+    """Newest first from the document catalog; follow `next_cursor` for further pages"""
+    catalog = get_document_catalog()
+    try:
+        rows, next_cursor = catalog.list(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    documents = [
+        DocumentInfo(
+            filename=row["filename"],
+            file_size=row["file_size"],
+            upload_date=row["upload_date"],
+            processing_status=row["processing_status"],
+            indexed=bool(row["indexed"]),
+            sha256=row["sha256"],
+            chunk_count=row["chunk_count"],
+        )
+        for row in rows
+    ]
+    return DocumentsListResponse(
+        documents=documents,
+        total_count=catalog.status()["total_documents"],
+        message="Documents retrieved successfully",
+        next_cursor=next_cursor,
+    )
+
+@app.get("/documents/status", response_model=IndexingStatusResponse)
+def indexing_status():
+    """Aggregate counters kept by the catalog's triggers; a single-row read"""
+    return IndexingStatusResponse(**get_document_catalog().status())
\ No newline at end of file
@@ -1,5 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
+
+# Metadata key -> required value, or a list of accepted values
+MetadataFilters = Dict[str, Union[str, int, float, bool, List[Union[str, int, float, bool]]]]
 
 class HealthResponse(BaseModel):
     """Health check response model"""
@@ -18,6 +21,8 @@ class SearchRequest(BaseModel):
     """Search request model"""
     query: str = Field(description="Search query text", example="media monitoring strategies", min_length=1, max_length=1000)
     top_k: Optional[int] = Field(description="Number of top results to return", default=5, ge=1, le=50)
+    generate_answer: bool = Field(description="Also generate an LLM answer from the matching passages", default=False)
+    filters: Optional[MetadataFilters] = Field(description="Only search chunks whose metadata matches, e.g. {\"source\": \"report.pdf\"}", default=None)
 
 class SearchResult(BaseModel):
     """Individual search result model"""
@@ -31,20 +36,37 @@ class SearchResponse(BaseModel):
     results: List[SearchResult] = Field(description="List of search results")
     total_results: int = Field(description="Total number of results found")
     processing_time: float = Field(description="Time taken to process the search in seconds")
+    answer: Optional[str] = Field(description="Generated answer, only when `generate_answer` was requested", default=None)
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request model"""
+    queries: List[str] = Field(description="Search queries, answered in order", min_items=1, max_items=32)
+    top_k: Optional[int] = Field(description="Number of top results to return per query", default=5, ge=1, le=50)
+    filters: Optional[MetadataFilters] = Field(description="Metadata filters applied to every query", default=None)
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model"""
+    results: List[SearchResponse] = Field(description="One search response per query, in request order")
+    total_queries: int = Field(description="Number of queries answered")
+    cached_queries: int = Field(description="Queries answered from the search cache")
+    processing_time: float = Field(description="Time taken to process the whole batch in seconds")
 
 class DocumentInfo(BaseModel):
     """Document information model"""
     filename: str = Field(description="Document filename")
     file_size: int = Field(description="File size in bytes")
     upload_date: str = Field(description="Date when document was uploaded")
-    processing_status: str = Field(description="Document processing status")
+    processing_status: str = Field(description="Document processing status (queued, indexing, indexed or failed)")
     indexed: bool = Field(description="Whether document is indexed in vector store")
+    sha256: Optional[str] = Field(description="SHA-256 of the document content", default=None)
+    chunk_count: int = Field(description="Number of chunks inserted into the vector store", default=0)
 
 class DocumentsListResponse(BaseModel):
     """Documents list response model"""
     documents: List[DocumentInfo] = Field(description="List of document information")
     total_count: int = Field(description="Total number of documents")
     message: str = Field(description="Response message")
+    next_cursor: Optional[str] = Field(description="Pass as `cursor` to fetch the next page; absent on the last page", default=None)
 
 class ErrorResponse(BaseModel):
     """Error response model"""
@@ -4,24 +4,27 @@ Management script for the Media Monitoring Knowledge Assistant
 This script sets up the Python environment and provides commands to run the application
 """
 
+import argparse
+import json
 import os
 import sys
 import subprocess
 from pathlib import Path
 
-# Get the project root directory
-PROJECT_ROOT = Path(__file__).parent.absolute()
+# Get the project root directory (this script lives in src/pinecone-agent)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 SRC_DIR = PROJECT_ROOT / "src"
 
 def setup_environment():
-    """Set up the Python environment by adding src to Python path"""
-    if str(SRC_DIR) not in sys.path:
-        sys.path.insert(0, str(SRC_DIR))
-        print(f"✅ Added {SRC_DIR} to Python path")
+    """Set up the Python environment by adding src (and the root, for `src.` imports) to Python path"""
+    for path in (PROJECT_ROOT, SRC_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+            print(f"✅ Added {path} to Python path")
     
     # Set environment variables
-    os.environ['PYTHONPATH'] = str(SRC_DIR)
-    print(f"✅ Set PYTHONPATH to {SRC_DIR}")
+    os.environ['PYTHONPATH'] = os.pathsep.join([str(SRC_DIR), str(PROJECT_ROOT)])
+    print(f"✅ Set PYTHONPATH to {os.environ['PYTHONPATH']}")
 
 def run_server():
     """Run the FastAPI server"""
@@ -61,6 +64,26 @@ def run_server():
     
     return 0
 
+def serve(argv):
+    """Run the production server: preload in a master process, then fork workers"""
+    parser = argparse.ArgumentParser(prog="manage.py serve")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", os.cpu_count() or 2)))
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--log-level", default=os.getenv("API_LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+
+    setup_environment()
+    print(f"🚀 Starting production server with {args.workers} workers...")
+
+    try:
+        os.chdir(SRC_DIR)
+        from core.server import serve as prefork_serve
+        return prefork_serve("main.main:app", args.host, args.port, args.workers, args.log_level)
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        return 1
+
 def run_tests():
     """Run tests"""
     setup_environment()
@@ -76,6 +99,150 @@ def run_tests():
         print(f"❌ Error running tests: {e}")
         return 1
 
+def seed_vector_store():
+    """Seed the vector store from the knowledge base; re-runs skip chunks already inserted"""
+    setup_environment()
+    print("🌱 Seeding vector store...")
+
+    try:
+        os.chdir(SRC_DIR)
+        from config.settings import BASE_DIR, INGEST_MANIFEST_PATH
+        from vector_store.ingest import seed_knowledge_base
+        from vector_store.vectorstore_singletone import vector_store
+
+        # The same backend the API serves (VECTOR_INDEX_BACKEND)
+        index = vector_store.vector_store
+        report = seed_knowledge_base(index, BASE_DIR / "knowledge_base", INGEST_MANIFEST_PATH)
+        inserted = sum(item["inserted"] for item in report.values())
+        print(f"✅ Inserted {inserted} new chunks from {len(report)} files")
+    except Exception as e:
+        print(f"❌ Error seeding vector store: {e}")
+        return 1
+
+    return 0
+
+def bulk_ingest(argv):
+    """Bulk-load a folder through the document loader with batched embedding and concurrent inserts"""
+    setup_environment()
+    os.chdir(SRC_DIR)
+    from config.settings import (
+        BASE_DIR, BULK_INGEST_BATCH_SIZE, BULK_INGEST_MAX_IN_FLIGHT, BULK_INGEST_MAX_RETRIES, INGEST_MANIFEST_PATH,
+    )
+
+    parser = argparse.ArgumentParser(prog="manage.py bulk-ingest")
+    parser.add_argument("--folder", default=str(BASE_DIR / "knowledge_base"), help="Folder of documents to ingest")
+    parser.add_argument("--batch-size", type=int, default=BULK_INGEST_BATCH_SIZE, help="Chunks per embedding call")
+    parser.add_argument("--max-in-flight", type=int, default=BULK_INGEST_MAX_IN_FLIGHT, help="Batches embedded/inserted at once")
+    parser.add_argument("--max-retries", type=int, default=BULK_INGEST_MAX_RETRIES)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"📥 Bulk ingesting {args.folder}...")
+    try:
+        from vector_store.document_strategies.local_documents_loader import LocalDocumentsLoader
+        from vector_store.vectorstore_singletone import vector_store
+
+        report = vector_store.vector_store.bulk_ingest(
+            LocalDocumentsLoader(args.folder).stream_documents(), INGEST_MANIFEST_PATH,
+            batch_size=args.batch_size, max_in_flight=args.max_in_flight, max_retries=args.max_retries,
+            chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+        )
+    except Exception as e:
+        print(f"❌ Error during bulk ingest: {e}")
+        return 1
+
+    print(f"✅ {report['inserted']} chunks inserted, {report['skipped']} already present, from "
+          f"{report['documents']} documents in {report['elapsed_s']:.1f}s ({report['rows_per_s']:.1f} rows/s)")
+    if report["failed_batches"]:
+        print(f"⚠️  {report['failed_batches']} batches failed; re-run to resume. First errors: {report['errors']}")
+        return 1
+    return 0
+
+def migrate(argv):
+    """Export, import and verify vectors between backends without re-embedding"""
+    parser = argparse.ArgumentParser(prog="manage.py migrate")
+    commands = parser.add_subparsers(dest="action", required=True)
+    export = commands.add_parser("export", help="Stream a backend's vectors to NumPy shards + JSONL")
+    export.add_argument("--from", dest="source", required=True, help="astra, memory or pinecone")
+    export.add_argument("--dir", required=True)
+    export.add_argument("--page-size", type=int, default=1000)
+    load = commands.add_parser("import", help="Load an export into a backend, several shards at a time")
+    load.add_argument("--to", dest="target", required=True)
+    load.add_argument("--dir", required=True)
+    load.add_argument("--max-in-flight", type=int, default=4)
+    check = commands.add_parser("verify", help="Compare counts and sampled neighbours of two backends")
+    check.add_argument("--from", dest="source", required=True)
+    check.add_argument("--to", dest="target", required=True)
+    check.add_argument("--sample", type=int, default=50)
+    check.add_argument("--top-k", type=int, default=10)
+    replay = commands.add_parser("replay", help="Re-send writes the dual-write secondary missed")
+    args = parser.parse_args(argv)
+
+    setup_environment()
+    os.chdir(SRC_DIR)
+    try:
+        from vector_store.migration import export_vectors, import_vectors, verify
+        from vector_store.vectorstore_singletone import get_vector_index
+
+        if args.action == "export":
+            report = export_vectors(get_vector_index(args.source), args.dir, args.page_size)
+            print(f"✅ Exported {report['rows']} rows in {report['shards']} shards ({report['rows_per_s']:.1f} rows/s)")
+        elif args.action == "import":
+            report = import_vectors(get_vector_index(args.target), args.dir, max_in_flight=args.max_in_flight)
+            print(f"✅ Imported {report['rows']} rows from {report['shards']} shards "
+                  f"({report['skipped_shards']} already done, {report['rows_per_s']:.1f} rows/s)")
+            if report["failed_shards"]:
+                print(f"⚠️  {report['failed_shards']} shards failed; re-run to resume. {report['errors']}")
+                return 1
+        elif args.action == "verify":
+            report = verify(get_vector_index(args.source), get_vector_index(args.target), args.sample, args.top_k)
+            print(json.dumps(report, indent=2))
+            return 0 if report["ok"] else 1
+        else:
+            replayed = get_vector_index("dual").replay_missed()
+            print(f"✅ Replayed {replayed} missed writes")
+    except Exception as e:
+        print(f"❌ Migration {args.action} failed: {e}")
+        return 1
+    return 0
+
+def profile_startup(argv):
+    """Report the import-time tree of the API entry points and the time to the first request"""
+    parser = argparse.ArgumentParser(prog="manage.py profile-startup")
+    parser.add_argument("--module", action="append", dest="modules",
+                        help="Module to profile (repeatable; default: main.main and retriver_agent)")
+    parser.add_argument("--app", default="main.main:app", help="App used for the first-request timing")
+    parser.add_argument("--path", default="/health", help="Path of the first request")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Hide imports cheaper than this")
+    parser.add_argument("--depth", type=int, default=6, help="Deepest level of the tree to show")
+    args = parser.parse_args(argv)
+
+    setup_environment()
+    from core.profiling import format_tree, import_tree, loaded_heavy_modules, time_to_first_request
+
+    paths = [SRC_DIR, PROJECT_ROOT, Path(__file__).resolve().parent]
+    try:
+        for module in args.modules or ["main.main", "retriver_agent"]:
+            nodes = import_tree(module, paths)
+            total = sum(node["cumulative_ms"] for node in nodes)
+            print(f"\n⏱️  import {module}: {total:.1f} ms (cumulative, self, module)")
+            for line in format_tree(nodes, args.min_ms, args.depth):
+                print(line)
+            heavy = loaded_heavy_modules(module, paths)
+            print(f"⚠️  Heavy modules loaded at import: {', '.join(heavy)}" if heavy
+                  else "✅ No heavy modules loaded at import")
+
+        report = time_to_first_request(args.app, args.path, paths)
+        print(f"\n🌐 Time to first request ({args.app} GET {args.path} -> {report['status']}): "
+              f"{report['total_s']:.2f}s total, {report['import_s']:.2f}s import, "
+              f"{report['first_request_s']:.2f}s first request")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    return 0
+
 def install_dependencies():
     """Install dependencies using uv"""
     print("📦 Installing dependencies...")
@@ -98,14 +265,24 @@ Usage:
     uv run manage.py <command>
 
 Commands:
-    runserver      - Start the FastAPI server
+    runserver      - Start the FastAPI server (development, auto-reload)
+    serve          - Start the production server [--workers N] [--host H] [--port P]
     test           - Run tests
+    seed           - Seed the vector store from the knowledge base (idempotent)
+    migrate        - Move vectors between backends: export | import | verify | replay (see --help)
+    bulk-ingest    - Bulk-load a folder concurrently, resumable [--folder F] [--batch-size N] [--max-in-flight N]
+    profile-startup - Show the import-time tree and time to first request [--module M] [--min-ms N]
     install        - Install dependencies
     help           - Show this help message
 
 Examples:
     uv run manage.py runserver
+    uv run manage.py serve --workers 4
     uv run manage.py test
+    uv run manage.py seed
+    uv run manage.py bulk-ingest --folder ./archive --max-in-flight 8
+    uv run manage.py migrate export --from astra --dir ./astra-export
+    uv run manage.py profile-startup --min-ms 20
     uv run manage.py install
     """)
 
@@ -119,8 +296,18 @@ def main():
     
     if command == "runserver":
         return run_server()
+    elif command == "serve":
+        return serve(sys.argv[2:])
     elif command == "test":
         return run_tests()
+    elif command == "seed":
+        return seed_vector_store()
+    elif command == "bulk-ingest":
+        return bulk_ingest(sys.argv[2:])
+    elif command == "migrate":
+        return migrate(sys.argv[2:])
+    elif command == "profile-startup":
+        return profile_startup(sys.argv[2:])
     elif command == "install":
         return install_dependencies()
     elif command == "help":
@@ -1,25 +1,17 @@
-from src.config.settings import GEMINI_API_KEY
-from src.vector_store.vectorstore_singletone import vector_store
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage, AIMessage
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
-from typing import Annotated, TypedDict
+from config.settings import GEMINI_API_KEY
+from vector_store.vectorstore_singletone import vector_store
+from core.base.registry import registry
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 
 load_dotenv()
 
-# Set API key
-os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
+RETRIEVAL_AGENT_GRAPH = "retrieval_agent_graph"
 
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
+# Tools are plain functions here and wrapped with `tool` when the graph is built,
+# so importing this module does not load langchain, langgraph or the Gemini client
 
-@tool
 def add_document_to_vectorstore(file_path: str) -> str:
     """Add a document to the vector database for future retrieval
     :param file_path: Path to the document file (relative to knowledge_base folder)
@@ -34,7 +26,7 @@ def add_document_to_vectorstore(file_path: str) -> str:
             return f"Error: File {file_path} not found in knowledge base"
         
         # Use the document loader strategy to load the document
-        from src.vector_store.document_strategies.local_documents_loader import LocalDocumentsLoader
+        from vector_store.document_strategies.local_documents_loader import LocalDocumentsLoader
         from langchain_community.document_loaders import PyPDFLoader
         
         # Load the specific document
@@ -53,7 +45,6 @@ def add_document_to_vectorstore(file_path: str) -> str:
     except Exception as e:
         return f"Error adding document: {str(e)}"
 
-@tool
 def search_vector_database(query: str, top_k: int = 5) -> str:
     """Search the vector database for relevant information
     :param query: The search query
@@ -70,64 +61,106 @@ def search_vector_database(query: str, top_k: int = 5) -> str:
     except Exception as e:
         return f"Error searching vector database: {str(e)}"
 
-@tool
-def list_available_documents() -> str:
-    """List all available documents in the knowledge base
+def list_available_documents(limit: int = 50) -> str:
+    """List the documents ingested into the knowledge base, newest first, and whether each is indexed
+    :param limit: Maximum number of documents to list
     :return: List of available documents
     """
     try:
-        knowledge_base_path = Path(__file__).parent / "src" / "knowledge_base"
-        if not knowledge_base_path.exists():
-            return "Knowledge base directory not found"
+        # Read from the document catalog rather than scanning the knowledge-base folder
+        from vector_store.catalog import get_document_catalog
+
+        catalog = get_document_catalog()
+        rows, _ = catalog.list(limit)
+        total = catalog.status()["total_documents"]
         
-        documents = []
-        for file_path in knowledge_base_path.iterdir():
-            if file_path.is_file() and not file_path.name.startswith('.'):
-                documents.append(file_path.name)
+        documents = [
+            f"{row['filename']} ({row['processing_status']})" for row in rows
+        ]
         
         if documents:
-            return f"Available documents: {', '.join(documents)}"
+            shown = f" (showing {len(documents)} of {total})" if total > len(documents) else ""
+            return f"Available documents{shown}: {', '.join(documents)}"
         else:
             return "No documents found in knowledge base"
             
     except Exception as e:
         return f"Error listing documents: {str(e)}"
 
-# Define tools
-tools = [add_document_to_vectorstore, search_vector_database, list_available_documents]
+def _build_graph():
+    """Create the LLM and compile the agent graph; runs once, on the first query"""
+    from typing import Annotated, TypedDict
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.tools import tool
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.graph.message import add_messages
+    from langgraph.prebuilt import ToolNode, tools_condition
+    from vector_store.governed_models import governed_chat
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-llm_with_tools = llm.bind_tools(tools)
+    # Set API key
+    if GEMINI_API_KEY:
+        os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
 
-def chatbot(state: State):
-    """Main chatbot node that processes user messages and decides when to use tools"""
-    messages = state["messages"]
-    
-    # Use LLM to decide if tools are needed
-    response = llm_with_tools.invoke(messages)
-    return {"messages": [response]}
+    class State(TypedDict):
+        messages: Annotated[list, add_messages]
+
+    # Define tools
+    tools = [tool(add_document_to_vectorstore), tool(search_vector_database), tool(list_available_documents)]
+
+    # Initialize LLM
+    llm = governed_chat(ChatGoogleGenerativeAI(model="gemini-2.0-flash"))
+    llm_with_tools = llm.bind_tools(tools)
+
+    def chatbot(state: State):
+        """Main chatbot node that processes user messages and decides when to use tools"""
+        messages = state["messages"]
+
+        # Use LLM to decide if tools are needed
+        response = llm_with_tools.invoke(messages)
+        return {"messages": [response]}
+
+    async def achatbot(state: State):
+        """Async variant of the chatbot node, used by graph.ainvoke"""
+        response = await llm_with_tools.ainvoke(state["messages"])
+        return {"messages": [response]}
 
-# Build the graph
-builder = StateGraph(State)
+    # Build the graph
+    builder = StateGraph(State)
 
-# Add nodes
-builder.add_node("chatbot", chatbot)
-builder.add_node("tools", ToolNode(tools))
+    # Add nodes
+    builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot, name="chatbot"))
+    builder.add_node("tools", ToolNode(tools))
 
-# Add edges
-builder.add_edge(START, "chatbot")
-builder.add_conditional_edges("chatbot", tools_condition)
-builder.add_edge("tools", "chatbot")
-builder.add_edge("chatbot", END)
+    # Add edges
+    builder.add_edge(START, "chatbot")
+    builder.add_conditional_edges("chatbot", tools_condition)
+    builder.add_edge("tools", "chatbot")
+    builder.add_edge("chatbot", END)
 
-# Compile the graph
-graph = builder.compile()
+    # Compile the graph
+    return builder.compile()
+
+registry.register(RETRIEVAL_AGENT_GRAPH, _build_graph)
+
+def get_graph():
+    return registry.get(RETRIEVAL_AGENT_GRAPH)
 
 def run_retrieval_agent(user_query: str):
     """Run the retrieval agent with a user query"""
+    from langchain_core.messages import HumanMessage
+
+    initial_state = {"messages": [HumanMessage(content=user_query)]}
+    result = get_graph().invoke(initial_state)
+    return result["messages"][-1].content
+
+async def arun_retrieval_agent(user_query: str):
+    """Run the retrieval agent without blocking the event loop"""
+    from langchain_core.messages import HumanMessage
+
     initial_state = {"messages": [HumanMessage(content=user_query)]}
-    result = graph.invoke(initial_state)
+    graph = await registry.aget(RETRIEVAL_AGENT_GRAPH)
+    result = await graph.ainvoke(initial_state)
     return result["messages"][-1].content
 
 # Example usage
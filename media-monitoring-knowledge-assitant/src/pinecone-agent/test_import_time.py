@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API entry points.
+
+Fails when importing an entry point pulls in an SDK that should load on first use,
+or when the import gets slower than IMPORT_TIME_BUDGET_MS (best of three cold runs).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent
+SRC_DIR = AGENT_DIR.parent
+PROJECT_ROOT = SRC_DIR.parent
+sys.path.insert(0, str(SRC_DIR))
+
+from core.profiling import import_tree, loaded_heavy_modules
+
+PATHS = [SRC_DIR, PROJECT_ROOT, AGENT_DIR]
+ENTRY_POINTS = ["main.main", "retriver_agent"]
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def import_time_ms(module: str, runs: int = 3) -> float:
+    return min(sum(node["cumulative_ms"] for node in import_tree(module, PATHS)) for _ in range(runs))
+
+
+def test_entry_points_do_not_load_heavy_modules():
+    for module in ENTRY_POINTS:
+        heavy = loaded_heavy_modules(module, PATHS)
+        assert not heavy, f"import {module} loads {heavy}; import them where they are first used"
+
+
+def test_entry_points_import_within_budget():
+    for module in ENTRY_POINTS:
+        elapsed = import_time_ms(module)
+        print(f"import {module}: {elapsed:.1f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+        assert elapsed <= IMPORT_TIME_BUDGET_MS, f"import {module} took {elapsed:.1f} ms"
+
+
+if __name__ == "__main__":
+    test_entry_points_do_not_load_heavy_modules()
+    test_entry_points_import_within_budget()
+    print("✅ Import-time budget respected")
@@ -0,0 +1,178 @@
+"""
+Concurrent, resumable bulk ingestion from a `DocumentLoaderStrategy` stream.
+
+Documents are chunked as they stream in and grouped into batches no larger than
+the embedding API accepts in one call. Up to `max_in_flight` batches are embedded
+and inserted at once; reading stops while the window is full, so memory stays
+bounded however large the source is. Every committed batch appends its chunk ids
+to a checkpoint file, so a run that fails part-way (or is killed) resumes where it
+stopped: the next run skips ids found in the checkpoint or the ingest manifest.
+"""
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from config.settings import (
+    BULK_INGEST_BATCH_SIZE, BULK_INGEST_CHECKPOINT_DIR, BULK_INGEST_MAX_IN_FLIGHT, BULK_INGEST_MAX_RETRIES,
+)
+from core.llm_governor import BATCH, llm_priority
+from core.search_cache import get_search_cache
+from vector_store.catalog import STATUS_FAILED, STATUS_INDEXED, STATUS_INDEXING, get_document_catalog, utc_timestamp
+from vector_store.document_strategies.base import SourceDocument
+from vector_store.ingest import _manifest_lock, content_id, load_manifest, save_manifest, split_text
+
+
+class Checkpoint:
+    """Append-only log of committed chunk ids for one table"""
+
+    def __init__(self, directory, table_name: str):
+        self.path = Path(directory) / (re.sub(r"[^\w.-]", "_", table_name) + ".ids")
+
+    def load(self) -> set:
+        if not self.path.exists():
+            return set()
+        return set(self.path.read_text(encoding="utf-8").split())
+
+    def append(self, ids: List[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{chunk_id}\n" for chunk_id in ids))
+            f.flush()
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _insert_batch(index, batch: dict, max_retries: int, backoff: float) -> None:
+    """One embedding call and one concurrent insert per batch, retried with exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            # Queue behind API requests for Gemini; 429s are already retried by the governor
+            with llm_priority(BATCH):
+                index.add_texts(batch["texts"], ids=batch["ids"], metadatas=batch["metadatas"])
+            return
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def bulk_ingest(index, documents: Iterable[SourceDocument], manifest_path,
+                checkpoint_dir=BULK_INGEST_CHECKPOINT_DIR, batch_size: int = BULK_INGEST_BATCH_SIZE,
+                max_in_flight: int = BULK_INGEST_MAX_IN_FLIGHT, max_retries: int = BULK_INGEST_MAX_RETRIES,
+                chunk_size: int = 1000, chunk_overlap: int = 200, backoff: float = 1.0,
+                source: Optional[str] = None) -> dict:
+    """
+    Insert every new chunk of `documents` into `index`. Failed batches are reported,
+    not raised: their ids stay out of the checkpoint and are retried on the next run.
+    Each document is marked indexed in the catalog once all of its chunks are in.
+    """
+    # Gemini embeds at most 100 texts per batch request
+    batch_size = max(1, min(batch_size, getattr(index, "max_embed_batch", batch_size)))
+    max_in_flight = max(1, max_in_flight)
+    checkpoint = Checkpoint(checkpoint_dir, index.table_name)
+    with _manifest_lock:
+        manifest = load_manifest(manifest_path)
+        done = set(manifest.get(index.table_name, []))
+        resumed = checkpoint.load() - done
+        if resumed:
+            # Ids committed by an interrupted run count as inserted
+            done |= resumed
+            manifest[index.table_name] = sorted(done)
+            save_manifest(manifest_path, manifest)
+        checkpoint.clear()
+    catalog = get_document_catalog()
+
+    started = time.perf_counter()
+    stats = {"documents": 0, "chunks": 0, "inserted": 0, "skipped": 0, "failed_batches": 0, "errors": []}
+    remaining = {}       # document id -> chunks not yet committed
+    streaming = set()    # documents whose chunks are still being batched
+    failed_documents = {}
+    committed = []
+
+    def settle(document_id):
+        if remaining.get(document_id) == 0 and document_id not in streaming:
+            del remaining[document_id]
+            if document_id in failed_documents:
+                catalog.record(document_id, processing_status=STATUS_FAILED, error=failed_documents[document_id])
+            else:
+                catalog.record(document_id, processing_status=STATUS_INDEXED, indexed=True, indexed_at=utc_timestamp())
+
+    def collect(futures, block: bool):
+        if block:
+            finished = wait(futures, return_when=FIRST_COMPLETED).done
+        else:
+            finished = {future for future in futures if future.done()}
+        for future in finished:
+            batch = futures.pop(future)
+            error = future.exception()
+            if error is None:
+                checkpoint.append(batch["ids"])
+                committed.extend(batch["ids"])
+                stats["inserted"] += len(batch["ids"])
+            else:
+                stats["failed_batches"] += 1
+                if len(stats["errors"]) < 5:
+                    stats["errors"].append(str(error))
+                failed_documents.update(dict.fromkeys(batch["documents"], f"{error}; re-run to resume"))
+            for document_id in batch["documents"]:
+                remaining[document_id] -= 1
+                settle(document_id)
+
+    def batches():
+        batch = {"texts": [], "ids": [], "metadatas": [], "documents": []}
+        for document in documents:
+            stats["documents"] += 1
+            name = document.metadata.get("source") or document.id
+            catalog.record(document.id, filename=name, source=source or "bulk_ingest",
+                           processing_status=STATUS_INDEXING, error=None)
+            chunks = split_text(document.text, chunk_size, chunk_overlap)
+            catalog.record(document.id, chunk_count=len(chunks))
+            remaining[document.id] = 0
+            streaming.add(document.id)
+            for chunk in chunks:
+                stats["chunks"] += 1
+                chunk_id = content_id(chunk)
+                if chunk_id in done:
+                    stats["skipped"] += 1
+                    continue
+                done.add(chunk_id)
+                remaining[document.id] += 1
+                batch["texts"].append(chunk)
+                batch["ids"].append(chunk_id)
+                batch["metadatas"].append({**document.metadata, "document_id": document.id})
+                batch["documents"].append(document.id)
+                if len(batch["ids"]) == batch_size:
+                    yield batch
+                    batch = {"texts": [], "ids": [], "metadatas": [], "documents": []}
+            streaming.discard(document.id)
+            # Fully skipped documents, or ones whose batches already landed, are complete now
+            settle(document.id)
+        if batch["ids"]:
+            yield batch
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="bulk-ingest") as pool:
+        for batch in batches():
+            while len(futures) >= max_in_flight:
+                collect(futures, block=True)
+            futures[pool.submit(_insert_batch, index, batch, max_retries, backoff)] = batch
+            collect(futures, block=False)
+        while futures:
+            collect(futures, block=True)
+
+    if committed:
+        # Fold this run into the manifest in one write; the checkpoint is then redundant
+        with _manifest_lock:
+            manifest = load_manifest(manifest_path)
+            manifest[index.table_name] = sorted(set(manifest.get(index.table_name, [])) | set(committed))
+            save_manifest(manifest_path, manifest)
+        get_search_cache().bump_generation()
+    checkpoint.clear()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["rows_per_s"] = round(stats["inserted"] / elapsed, 1) if elapsed else 0.0
+    return stats
@@ -0,0 +1,185 @@
+"""
+SQLite catalog of ingested documents, keyed by content hash.
+
+Ingestion writes one row per document as it moves through queued → indexing →
+indexed/failed. Triggers keep the aggregate counters in `stats` up to date, so the
+indexing status is a single-row read, and listings page with a keyset cursor on
+(upload_date, sha256), so a page costs O(page size) however many documents exist.
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from core.base.registry import registry
+from config.settings import DOCUMENT_CATALOG_PATH
+
+DOCUMENT_CATALOG = "document_catalog"
+
+STATUS_QUEUED = "queued"
+STATUS_INDEXING = "indexing"
+STATUS_INDEXED = "indexed"
+STATUS_FAILED = "failed"
+
+COLUMNS = (
+    "sha256", "filename", "file_size", "upload_date", "processing_status",
+    "chunk_count", "indexed", "indexed_at", "source", "error",
+)
+
+_PENDING = f"IN ('{STATUS_QUEUED}', '{STATUS_INDEXING}')"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    file_size INTEGER NOT NULL DEFAULT 0,
+    upload_date TEXT NOT NULL,
+    processing_status TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    indexed INTEGER NOT NULL DEFAULT 0,
+    indexed_at TEXT,
+    source TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_by_upload_date ON documents (upload_date DESC, sha256 DESC);
+
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL DEFAULT 0,
+    indexed INTEGER NOT NULL DEFAULT 0,
+    pending INTEGER NOT NULL DEFAULT 0,
+    in_progress INTEGER NOT NULL DEFAULT 0,
+    last_indexed TEXT
+);
+INSERT OR IGNORE INTO stats (id) VALUES (0);
+
+CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+    UPDATE stats SET
+        total = total + 1,
+        indexed = indexed + NEW.indexed,
+        pending = pending + (NEW.processing_status {_PENDING}),
+        in_progress = in_progress + (NEW.processing_status = '{STATUS_INDEXING}'),
+        last_indexed = MAX(COALESCE(last_indexed, ''), COALESCE(NEW.indexed_at, ''))
+    WHERE id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+    UPDATE stats SET
+        indexed = indexed - OLD.indexed + NEW.indexed,
+        pending = pending - (OLD.processing_status {_PENDING}) + (NEW.processing_status {_PENDING}),
+        in_progress = in_progress - (OLD.processing_status = '{STATUS_INDEXING}')
+            + (NEW.processing_status = '{STATUS_INDEXING}'),
+        last_indexed = MAX(COALESCE(last_indexed, ''), COALESCE(NEW.indexed_at, ''))
+    WHERE id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+    UPDATE stats SET
+        total = total - 1,
+        indexed = indexed - OLD.indexed,
+        pending = pending - (OLD.processing_status {_PENDING}),
+        in_progress = in_progress - (OLD.processing_status = '{STATUS_INDEXING}')
+    WHERE id = 0;
+END;
+"""
+
+
+def utc_timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def encode_cursor(upload_date: str, sha256: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([upload_date, sha256]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        upload_date, sha256 = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(upload_date), str(sha256)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class DocumentCatalog:
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; reopen in each process
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def record(self, sha256: str, **fields) -> None:
+        """Insert or update the row for `sha256`; only the given fields change on update"""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown catalog fields: {sorted(unknown)}")
+        if "indexed" in fields:
+            fields["indexed"] = int(bool(fields["indexed"]))
+        insert = {"filename": "", "upload_date": utc_timestamp(), "processing_status": STATUS_QUEUED, **fields}
+        names = ["sha256", *insert]
+        # The first upload date sticks; later uploads of the same bytes only move the status
+        updates = [f"{name} = excluded.{name}" for name in fields if name != "upload_date"]
+        sql = (
+            f"INSERT INTO documents ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(sha256) DO " + (f"UPDATE SET {', '.join(updates)}" if updates else "NOTHING")
+        )
+        with self._lock:
+            self._db().execute(sql, [sha256, *insert.values()])
+
+    def get(self, sha256: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def is_indexed(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._db().execute("SELECT indexed FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+        return bool(row and row[0])
+
+    def list(self, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Newest first; returns a page and the cursor of the next page (None on the last page)"""
+        sql = "SELECT * FROM documents"
+        params = []
+        if cursor:
+            sql += " WHERE (upload_date, sha256) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        sql += " ORDER BY upload_date DESC, sha256 DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = [dict(row) for row in self._db().execute(sql, params)]
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        return rows[:limit], encode_cursor(last["upload_date"], last["sha256"])
+
+    def status(self) -> dict:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT total, indexed, pending, in_progress, last_indexed FROM stats WHERE id = 0"
+            ).fetchone()
+        return {
+            "total_documents": row["total"],
+            "indexed_documents": row["indexed"],
+            "pending_documents": row["pending"],
+            "indexing_in_progress": row["in_progress"] > 0,
+            "last_indexed": row["last_indexed"] or None,
+        }
+
+
+registry.register(DOCUMENT_CATALOG, lambda: DocumentCatalog(DOCUMENT_CATALOG_PATH))
+
+
+def get_document_catalog() -> DocumentCatalog:
+    return registry.get(DOCUMENT_CATALOG)
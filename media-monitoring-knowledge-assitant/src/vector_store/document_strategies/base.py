@@ -1,7 +1,28 @@
+import hashlib
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+@dataclass
+class SourceDocument:
+    id: str
+    text: str
+    metadata: dict = field(default_factory=dict)
 
 
 class DocumentLoaderStrategy(ABC):
     @abstractmethod
     def load_documents(self, document: str) -> dict:
         pass
+
+    def stream_documents(self) -> Iterator[SourceDocument]:
+        """
+        Yield documents one at a time for bulk ingestion. The default adapts the
+        result of `load_documents`; loaders over large sources should override it
+        so a whole corpus is never held in memory.
+        """
+        for document in self.load_documents(None):
+            text = getattr(document, "text", None) or getattr(document, "page_content", "") or ""
+            document_id = getattr(document, "doc_id", None) or hashlib.sha256(text.encode("utf-8")).hexdigest()
+            yield SourceDocument(document_id, text, dict(getattr(document, "metadata", None) or {}))
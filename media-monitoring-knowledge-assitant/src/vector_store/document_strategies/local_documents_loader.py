@@ -1,6 +1,9 @@
+import hashlib
 import os
-from llama_index.core import SimpleDirectoryReader
-from document_strategies.base import DocumentLoaderStrategy
+from pathlib import Path
+from typing import Iterator
+
+from vector_store.document_strategies.base import DocumentLoaderStrategy, SourceDocument
 
 
 class LocalDocumentsLoader(DocumentLoaderStrategy):
@@ -8,9 +11,27 @@ class LocalDocumentsLoader(DocumentLoaderStrategy):
         self._folder_path = folder_path
 
     def load_documents(self, document: str) -> dict:
+        from llama_index.core import SimpleDirectoryReader
+
         docs = []
         for file in os.listdir(self._folder_path):
             file_path = os.path.join(self._folder_path, file)
             loader = SimpleDirectoryReader(file_path)
             docs.extend(loader.load_data())
         return docs
+
+    def stream_documents(self) -> Iterator[SourceDocument]:
+        """One document per readable file, keyed by the hash of its bytes like uploads are"""
+        from vector_store.ingest import extract_text
+
+        for path in sorted(Path(self._folder_path).iterdir()):
+            if not path.is_file():
+                continue
+            try:
+                text = extract_text(path)
+            except Exception as e:
+                print(f"Skipping {path.name}: {e}")
+                continue
+            yield SourceDocument(
+                hashlib.sha256(path.read_bytes()).hexdigest(), text, {"source": path.name},
+            )
@@ -0,0 +1,86 @@
+"""
+LangChain chat and embedding models whose calls go through the LLM governor.
+
+Imported only where the Gemini clients are built, so importing the API does not
+load LangChain.
+"""
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from core.llm_governor import LLMGovernor, get_llm_governor
+
+
+def without_sdk_retries(client):
+    """
+    `client` with its own retry loop turned off. The Gemini SDK retries 429s up to six
+    times by default, which would hide them from the limiter and multiply the governor's
+    retries; with it off, every 429 reaches the governor at once.
+    """
+    if not getattr(client, "max_retries", None):
+        return client
+    if hasattr(client, "model_copy"):
+        return client.model_copy(update={"max_retries": 0})
+    client.max_retries = 0
+    return client
+
+
+def _model_key(model: Any, fallback: str) -> str:
+    key = getattr(model, "model", None) or getattr(model, "model_name", None) or fallback
+    return str(key).removeprefix("models/")
+
+
+class GovernedChatModel(BaseChatModel):
+    """Every generation of `inner` takes a slot for `model_key` from the governor"""
+    inner: BaseChatModel
+    model_key: str
+    governor: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"governed-{self.inner._llm_type}"
+
+    def _governor(self) -> LLMGovernor:
+        return self.governor or get_llm_governor()
+
+    def bind_tools(self, tools, **kwargs: Any):
+        """Let `inner` format the tools, but bind them here so tool calls stay governed"""
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        return self._governor().call(
+            self.model_key, lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        return await self._governor().acall(
+            self.model_key, lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+
+
+class GovernedEmbeddings(Embeddings):
+    """Every embedding request of `inner` takes a slot for `model_key`; other attributes pass through"""
+
+    def __init__(self, inner: Embeddings, model_key: Optional[str] = None, governor: Optional[LLMGovernor] = None):
+        self.inner = without_sdk_retries(inner)
+        self.model_key = model_key or _model_key(inner, type(inner).__name__)
+        self.governor = governor
+
+    def __getattr__(self, name):
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _governor(self) -> LLMGovernor:
+        return self.governor or get_llm_governor()
+
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self._governor().call(self.model_key, lambda: self.inner.embed_documents(texts, **kwargs))
+
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self._governor().call(self.model_key, lambda: self.inner.embed_query(text, **kwargs))
+
+
+def governed_chat(llm: BaseChatModel, governor: Optional[LLMGovernor] = None) -> GovernedChatModel:
+    return GovernedChatModel(inner=without_sdk_retries(llm), model_key=_model_key(llm, llm._llm_type), governor=governor)
@@ -0,0 +1,148 @@
+"""
+Idempotent seeding of the vector store from the knowledge base.
+
+Chunks are keyed by a hash of their content: the manifest lets a re-run skip chunks
+without re-embedding them, and the same ids make the insert itself an upsert, so a
+lost manifest costs embedding calls but never creates duplicate rows. Whole
+documents are tracked by the hash of their bytes in the document catalog.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Iterable, List
+
+from core.llm_governor import BATCH, llm_priority
+from core.search_cache import get_search_cache
+from vector_store.catalog import STATUS_FAILED, STATUS_INDEXED, STATUS_INDEXING, get_document_catalog, utc_timestamp
+
+TEXT_SUFFIXES = {".txt", ".md", ".html", ".xml", ".json"}
+# Every suffix `extract_text` can read
+EXTRACTABLE_SUFFIXES = TEXT_SUFFIXES | {".pdf", ".docx"}
+
+# Background indexing and seeding may update the manifest concurrently
+_manifest_lock = threading.Lock()
+
+
+def content_id(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def load_manifest(path) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(path, manifest: dict):
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def split_text(text: str, chunk_size: int = 80, chunk_overlap: int = 20) -> List[str]:
+    from langchain.text_splitter import CharacterTextSplitter
+
+    text_splitter = CharacterTextSplitter(
+        separator = "\n",
+        chunk_size = chunk_size,
+        chunk_overlap  = chunk_overlap,
+        length_function = len,
+    )
+    return text_splitter.split_text(text)
+
+
+def seed_texts(index, texts: Iterable[str], manifest_path, source: str = None) -> dict:
+    """
+    Insert the chunks of `texts` the manifest has not seen; returns inserted/skipped counts.
+
+    The manifest lock is held only to read and to update the manifest, never across
+    the embedding calls. Two runs that race on the same chunk both insert it, which
+    the content-hash ids turn into a single row.
+    """
+    with _manifest_lock:
+        seen = set(load_manifest(manifest_path).get(index.table_name, []))
+
+    new_texts, new_ids = [], []
+    total = 0
+    for text in texts:
+        total += 1
+        chunk_id = content_id(text)
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+        new_texts.append(text)
+        new_ids.append(chunk_id)
+
+    if new_texts:
+        metadatas = [{"source": source}] * len(new_texts) if source else None
+        with llm_priority(BATCH):
+            index.add_texts(new_texts, ids=new_ids, metadatas=metadatas)
+        # Re-read so ids other runs recorded while this one was embedding are kept
+        with _manifest_lock:
+            manifest = load_manifest(manifest_path)
+            manifest[index.table_name] = sorted(set(manifest.get(index.table_name, [])) | set(new_ids))
+            save_manifest(manifest_path, manifest)
+        # Cached search results predate these chunks
+        get_search_cache().bump_generation()
+    return {"inserted": len(new_texts), "skipped": total - len(new_texts)}
+
+
+def seed_knowledge_base(index, folder, manifest_path, chunk_size: int = 80, chunk_overlap: int = 20) -> dict:
+    """Seed every `.txt` file in `folder`; safe to re-run after adding files"""
+    report = {}
+    catalog = get_document_catalog()
+    for file_path in sorted(Path(folder).glob("*.txt")):
+        data = file_path.read_bytes()
+        chunks = split_text(data.decode("utf-8"), chunk_size, chunk_overlap)
+        result = seed_texts(index, chunks, manifest_path, source=file_path.name)
+        catalog.record(
+            hashlib.sha256(data).hexdigest(), filename=file_path.name, file_size=len(data), source="knowledge_base",
+            processing_status=STATUS_INDEXED, indexed=True, chunk_count=len(chunks), indexed_at=utc_timestamp(),
+        )
+        report[file_path.name] = {"chunks": len(chunks), **result}
+        print(f"Seeded {file_path.name}: {result['inserted']} new of {len(chunks)} chunks")
+    return report
+
+
+def can_extract(filename: str) -> bool:
+    return Path(filename).suffix.lower() in EXTRACTABLE_SUFFIXES
+
+
+def extract_text(path) -> str:
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        from pypdf import PdfReader
+        return "\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+    if suffix == ".docx":
+        import docx
+        return "\n".join(paragraph.text for paragraph in docx.Document(str(path)).paragraphs)
+    if suffix in TEXT_SUFFIXES:
+        return path.read_text(encoding="utf-8", errors="replace")
+    raise ValueError(f"No text extractor for {suffix} files")
+
+
+def index_document(index, path, filename: str, sha256: str, manifest_path,
+                   chunk_size: int = 1000, chunk_overlap: int = 200, delete_after: bool = True) -> dict:
+    """Extract, chunk and insert an uploaded file, recording its status in the catalog under its content hash"""
+    catalog = get_document_catalog()
+    catalog.record(sha256, filename=filename, processing_status=STATUS_INDEXING, error=None)
+    try:
+        chunks = split_text(extract_text(path), chunk_size, chunk_overlap)
+        result = seed_texts(index, chunks, manifest_path, source=filename)
+        catalog.record(
+            sha256, processing_status=STATUS_INDEXED, indexed=True, chunk_count=len(chunks),
+            file_size=Path(path).stat().st_size, indexed_at=utc_timestamp(),
+        )
+        print(f"Indexed {filename}: {result['inserted']} new of {len(chunks)} chunks")
+        return result
+    except Exception as e:
+        catalog.record(sha256, processing_status=STATUS_FAILED, error=str(e))
+        print(f"Error indexing {filename}: {e}")
+        raise
+    finally:
+        if delete_after:
+            Path(path).unlink(missing_ok=True)
@@ -0,0 +1,233 @@
+"""
+Move stored vectors between backends without re-embedding.
+
+`export_vectors` pages rows out of any `VectorIndexStrategy` into a portable
+directory: one float32 NumPy shard and one JSONL file (id, text, metadata) per
+page, plus a `manifest.json` written last, so an export without a manifest is
+known to be incomplete. `import_vectors` loads the shards into another backend with
+several shards in flight and records finished shards, so a failed import resumes.
+The manifest records the embedding model and dimension of the source, and an
+import refuses a target that would embed its queries differently: the vectors
+would load, but every text search on them would fail or return noise.
+`verify` compares row counts and, for a sample of source rows, how many of their
+nearest neighbours the target returns as well.
+"""
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from config.settings import INGEST_MANIFEST_PATH
+from core.search_cache import get_search_cache
+from vector_store.ingest import _manifest_lock, load_manifest, save_manifest
+
+FORMAT_VERSION = 1
+
+
+def _write_shard(directory: Path, number: int, rows: List[dict], dimension: int) -> dict:
+    name = f"shard-{number:05d}"
+    vectors = np.asarray([row["vector"] for row in rows], dtype=np.float32)
+    if vectors.shape != (len(rows), dimension):
+        raise ValueError(f"Shard {name} has vectors of shape {vectors.shape}; expected dimension {dimension}")
+    np.save(directory / f"{name}.tmp.npy", vectors)
+    with open(directory / f"{name}.tmp.jsonl", "w", encoding="utf-8") as f:
+        for row in rows:
+            record = {"id": row["id"], "text": row["text"], "metadata": row.get("metadata")}
+            if "namespace" in row:
+                record["namespace"] = row["namespace"]
+            f.write(json.dumps(record) + "\n")
+    (directory / f"{name}.tmp.npy").replace(directory / f"{name}.npy")
+    (directory / f"{name}.tmp.jsonl").replace(directory / f"{name}.jsonl")
+    return {"name": name, "rows": len(rows)}
+
+
+def export_vectors(index, directory, page_size: int = 1000) -> dict:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "manifest.json").unlink(missing_ok=True)
+    started = time.perf_counter()
+    shards, dimension = [], None
+    for page in index.iter_vectors(page_size):
+        if not page:
+            continue
+        dimension = dimension or len(page[0]["vector"])
+        shards.append(_write_shard(directory, len(shards), page, dimension))
+    rows = sum(shard["rows"] for shard in shards)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "source": index.table_name,
+        "embedding_model": index.embedding_model,
+        "dimension": dimension,
+        "rows": rows,
+        "shards": shards,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "shards": len(shards), "dimension": dimension, "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0}
+
+
+def read_manifest(directory) -> dict:
+    path = Path(directory) / "manifest.json"
+    if not path.exists():
+        raise ValueError(f"{directory} has no manifest.json; the export is missing or did not finish")
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported export format {manifest.get('format')!r}")
+    return manifest
+
+
+def read_shard(directory, name: str) -> List[dict]:
+    directory = Path(directory)
+    vectors = np.load(directory / f"{name}.npy", mmap_mode="r")
+    with open(directory / f"{name}.jsonl", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    for row, vector in zip(rows, vectors):
+        row["vector"] = vector.tolist()
+    return rows
+
+
+def iter_shards(directory) -> Iterator[Tuple[str, List[dict]]]:
+    for shard in read_manifest(directory)["shards"]:
+        yield shard["name"], read_shard(directory, shard["name"])
+
+
+def check_compatible(index, manifest: dict):
+    """Raise ValueError unless `index` holds and queries vectors of the exported model and dimension"""
+    source_model, target_model = manifest.get("embedding_model"), index.embedding_model
+    if target_model is not None and source_model != target_model:
+        raise ValueError(
+            f"{index.table_name} embeds queries with {target_model}, but the export holds vectors from "
+            f"{source_model or 'an unrecorded model'}; re-embed the documents instead of importing them"
+        )
+    target_dimension = index.dimension()
+    if manifest.get("dimension") and target_dimension and manifest["dimension"] != target_dimension:
+        raise ValueError(
+            f"{index.table_name} stores {target_dimension}-dimensional vectors; the export has {manifest['dimension']}"
+        )
+
+
+def import_vectors(index, directory, manifest_path=INGEST_MANIFEST_PATH, max_in_flight: int = 4,
+                   batch_size: int = 500) -> dict:
+    """
+    Load an export into `index`, `max_in_flight` shards at a time. Finished shards are
+    appended to `imported-<table>.txt` in the export directory and skipped on re-runs.
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    check_compatible(index, manifest)
+    progress_path = directory / ("imported-" + re.sub(r"[^\w.-]", "_", index.table_name) + ".txt")
+    finished = set(progress_path.read_text(encoding="utf-8").split()) if progress_path.exists() else set()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    stats = {"rows": 0, "shards": 0, "skipped_shards": 0, "failed_shards": 0, "errors": []}
+
+    def load(name: str) -> Tuple[int, List[str]]:
+        rows = read_shard(directory, name)
+        for start in range(0, len(rows), batch_size):
+            index.add_vectors(rows[start:start + batch_size])
+        with lock, open(progress_path, "a", encoding="utf-8") as f:
+            f.write(f"{name}\n")
+        return len(rows), [row["id"] for row in rows]
+
+    imported_ids = []
+    futures = {}
+
+    def collect(block: bool):
+        done = wait(futures, return_when=FIRST_COMPLETED).done if block else [f for f in futures if f.done()]
+        for future in done:
+            name = futures.pop(future)
+            try:
+                count, ids = future.result()
+            except Exception as e:
+                stats["failed_shards"] += 1
+                if len(stats["errors"]) < 5:
+                    stats["errors"].append(f"{name}: {e}")
+                continue
+            stats["rows"] += count
+            stats["shards"] += 1
+            imported_ids.extend(ids)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="vector-import") as pool:
+        for shard in manifest["shards"]:
+            if shard["name"] in finished:
+                stats["skipped_shards"] += 1
+                continue
+            while len(futures) >= max(1, max_in_flight):
+                collect(block=True)
+            futures[pool.submit(load, shard["name"])] = shard["name"]
+        while futures:
+            collect(block=True)
+
+    if imported_ids:
+        # The target now holds these chunks; seeding must not embed them again
+        with _manifest_lock:
+            ingest_manifest = load_manifest(manifest_path)
+            seen = set(ingest_manifest.get(index.table_name, []))
+            ingest_manifest[index.table_name] = sorted(seen | set(imported_ids))
+            save_manifest(manifest_path, ingest_manifest)
+        get_search_cache().bump_generation()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["rows_per_s"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+def _sample_rows(index, sample_size: int, page_size: int, seed: int) -> List[dict]:
+    """Reservoir sample over a full pass, so every row is equally likely without holding them all"""
+    rng = random.Random(seed)
+    sample, seen = [], 0
+    for page in index.iter_vectors(page_size):
+        for row in page:
+            seen += 1
+            if len(sample) < sample_size:
+                sample.append(row)
+            else:
+                slot = rng.randrange(seen)
+                if slot < sample_size:
+                    sample[slot] = row
+    return sample
+
+
+def verify(source, target, sample_size: int = 50, top_k: int = 10, page_size: int = 1000, seed: int = 0) -> dict:
+    """
+    Counts on both sides, then for each sampled source row: whether the target returns
+    the row itself first, and the overlap between the two backends' top-k neighbours.
+    Vector lookups cannot tell whether text queries will work, so the two embedding
+    models are compared as well.
+    """
+    source_count, target_count = source.count(), target.count()
+    overlaps, self_hits, missing = [], 0, []
+    for row in _sample_rows(source, sample_size, page_size, seed):
+        expected = [match["id"] for match in source.search_by_vector(row["vector"], top_k)]
+        actual = [match["id"] for match in target.search_by_vector(row["vector"], top_k)]
+        overlaps.append(len(set(expected) & set(actual)) / max(1, len(expected)))
+        if actual and actual[0] == row["id"]:
+            self_hits += 1
+        elif row["id"] not in actual:
+            missing.append(row["id"])
+    sampled = len(overlaps)
+    embedding_models_match = target.embedding_model is None or source.embedding_model == target.embedding_model
+    return {
+        "source_count": source_count,
+        "target_count": target_count,
+        "counts_match": source_count == target_count,
+        "sampled": sampled,
+        "top_k": top_k,
+        "mean_neighbour_overlap": round(sum(overlaps) / sampled, 4) if sampled else None,
+        "min_neighbour_overlap": round(min(overlaps), 4) if sampled else None,
+        "self_top1_rate": round(self_hits / sampled, 4) if sampled else None,
+        "missing_ids": missing[:20],
+        "source_embedding_model": source.embedding_model,
+        "target_embedding_model": target.embedding_model,
+        "embedding_models_match": embedding_models_match,
+        "ok": source_count == target_count and sampled > 0 and not missing and embedding_models_match,
+    }
@@ -1,9 +1,23 @@
+import asyncio
 from abc import ABC, abstractmethod
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from typing import List
+from typing import Iterator, List, Optional
+
+
+class UnsupportedFilter(ValueError):
+    """A search filter the backend cannot apply inside the index"""
+
+
+def embedding_model_name(embeddings) -> Optional[str]:
+    """The model an `Embeddings` object embeds with, without the `models/` prefix"""
+    name = getattr(embeddings, "model_key", None) or getattr(embeddings, "model", None)
+    return str(name).removeprefix("models/") if name else None
 
 
 class VectorIndexStrategy(ABC):
+    # The model that embeds this backend's text queries, and so must have produced its
+    # vectors; None for a backend that only stores vectors (see `vector_store.migration`)
+    embedding_model: Optional[str] = None
+
     @abstractmethod
     def create_or_load_vectorstore(self) -> "VectorIndexStrategy":
         """
@@ -13,5 +27,80 @@ class VectorIndexStrategy(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def query(self, text: List[float], top_k: int) -> List[str]:
+    def query(self, text: List[float], top_k: int, filters: Optional[dict] = None) -> List[str]:
+        raise NotImplementedError
+
+    def bulk_ingest(self, documents, manifest_path=None, **options) -> dict:
+        """
+        Chunk, embed and insert a stream of `SourceDocument`s with batched embedding
+        calls and concurrent inserts; resumable after a partial failure. See
+        `vector_store.bulk_ingest` for the options.
+        """
+        from config.settings import INGEST_MANIFEST_PATH
+        from vector_store.bulk_ingest import bulk_ingest
+
+        return bulk_ingest(self, documents, manifest_path or INGEST_MANIFEST_PATH, **options)
+
+    # Migration primitives: move stored vectors between backends without re-embedding
+
+    def count(self) -> int:
+        """Number of stored rows"""
+        raise NotImplementedError(f"{type(self).__name__} cannot count its rows")
+
+    def iter_vectors(self, page_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        Yield every stored row in pages of at most `page_size` dicts with `id`,
+        `text`, `vector` (list of floats) and `metadata`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot export its vectors")
+
+    def add_vectors(self, rows: List[dict]) -> int:
+        """Insert rows shaped like `iter_vectors` output as-is, upserting by id; returns the count"""
+        raise NotImplementedError(f"{type(self).__name__} cannot import precomputed vectors")
+
+    def search_by_vector(self, vector: List[float], top_k: int) -> List[dict]:
+        """The `top_k` nearest rows to a stored vector, as dicts with `id` and `score`"""
+        raise NotImplementedError(f"{type(self).__name__} cannot search by vector")
+
+    def dimension(self) -> Optional[int]:
+        """Length of the stored vectors, or None while it is not known (e.g. an empty index)"""
+        return None
+
+    def connect(self) -> None:
+        """Open connections ahead of the first query; a no-op for in-process backends."""
+        return None
+
+    @abstractmethod
+    def search(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        """
+        Retrieval only: return the `top_k` closest chunks as dicts with `content`,
+        `score` (relevance in [0, 1]) and `metadata`, without calling an LLM.
+
+        `filters` maps metadata keys to a required value (or a list of accepted
+        values). Backends apply them inside the index, before ranking, and raise
+        UnsupportedFilter for filters they cannot push down.
+        """
         raise NotImplementedError
+
+    async def asearch(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        """Async variant of `search`, run in a worker thread by default."""
+        return await asyncio.to_thread(self.search, text, top_k, filters)
+
+    def search_many(self, texts: List[str], top_k: int, filters: Optional[dict] = None) -> List[List[dict]]:
+        """
+        Batched `search`: one result list per query, in input order. The default
+        searches one query at a time; backends should embed all queries in a
+        single call and run the lookups natively batched or concurrently.
+        """
+        return [self.search(text, top_k, filters) for text in texts]
+
+    async def asearch_many(self, texts: List[str], top_k: int, filters: Optional[dict] = None) -> List[List[dict]]:
+        """Async variant of `search_many`, run in a worker thread by default."""
+        return await asyncio.to_thread(self.search_many, texts, top_k, filters)
+
+    async def aquery(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[str]:
+        """
+        Async variant of `query`. The default runs the blocking call in a worker
+        thread; backends with native async clients should override it.
+        """
+        return await asyncio.to_thread(self.query, text, top_k, filters)
@@ -0,0 +1,147 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from vector_store.vector_index_strategies.base import VectorIndexStrategy
+
+
+class DualWriteVectorIndex(VectorIndexStrategy):
+    """
+    Cutover wrapper: reads are served by `primary`, writes go to both backends.
+
+    Each backend embeds with its own model, so the two may use different embedders.
+    A write the secondary rejects does not fail the request; the rows are appended
+    to `missed_path` (JSONL) and `replay_missed` re-sends them once it is healthy.
+    Rows written with their vectors keep them in the log and are replayed as
+    vectors, so a replay never re-embeds what was imported precomputed.
+    Cut over by swapping primary and secondary, then dropping the wrapper.
+    """
+
+    def __init__(self, primary: VectorIndexStrategy, secondary: VectorIndexStrategy, missed_path: Optional[str] = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.missed_path = Path(missed_path) if missed_path else None
+        # Chunk ids in the ingest manifest describe what the serving backend holds
+        self.table_name = primary.table_name
+        self.secondary_failures = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dual-write")
+
+    @property
+    def is_open(self) -> bool:
+        return self.primary.is_open
+
+    @property
+    def embedding_model(self) -> Optional[str]:
+        return self.primary.embedding_model
+
+    def dimension(self) -> Optional[int]:
+        return self.primary.dimension()
+
+    def connect(self) -> None:
+        self.primary.connect()
+        self.secondary.connect()
+
+    def _record_missed(self, rows: List[dict], error: Exception) -> None:
+        with self._lock:
+            self.secondary_failures += 1
+            print(f"Dual write: secondary {self.secondary.table_name} missed {len(rows)} rows: {error}")
+            if self.missed_path is not None:
+                self.missed_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.missed_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(row) + "\n" for row in rows))
+
+    def _write_both(self, write_primary, write_secondary, rows: List[dict]):
+        """Run both writes concurrently; only the primary's failure reaches the caller"""
+        secondary = self._pool.submit(write_secondary)
+        try:
+            return write_primary()
+        finally:
+            try:
+                secondary.result()
+            except Exception as e:
+                self._record_missed(rows, e)
+
+    def add_texts(self, texts: List[str], ids: List[str], metadatas: List[dict] = None) -> List[str]:
+        texts, ids = list(texts), list(ids)
+        metadatas = list(metadatas) if metadatas else None
+        rows = [
+            {"id": row_id, "text": text, "metadata": metadatas[i] if metadatas else None}
+            for i, (row_id, text) in enumerate(zip(ids, texts))
+        ]
+        return self._write_both(
+            lambda: self.primary.add_texts(texts, ids=ids, metadatas=metadatas),
+            lambda: self.secondary.add_texts(texts, ids=ids, metadatas=metadatas),
+            rows,
+        )
+
+    def add_vectors(self, rows: List[dict]) -> int:
+        missed = [
+            {"id": row["id"], "text": row["text"], "metadata": row.get("metadata"),
+             "vector": [float(value) for value in row["vector"]]}
+            for row in rows
+        ]
+        return self._write_both(lambda: self.primary.add_vectors(rows), lambda: self.secondary.add_vectors(rows), missed)
+
+    def replay_missed(self) -> int:
+        """Re-send the writes the secondary missed; rows that fail again stay in the file"""
+        if self.missed_path is None or not self.missed_path.exists():
+            return 0
+        with self._lock:
+            rows = [json.loads(line) for line in self.missed_path.read_text(encoding="utf-8").splitlines() if line]
+            self.missed_path.unlink()
+        replayed = 0
+        vector_rows = [row for row in rows if row.get("vector") is not None]
+        text_rows = [row for row in rows if row.get("vector") is None]
+        if vector_rows:
+            try:
+                replayed += self.secondary.add_vectors(vector_rows)
+            except Exception as e:
+                self._record_missed(vector_rows, e)
+        if text_rows:
+            # Missed `add_texts` calls: the secondary embeds them with its own model, as it would have
+            try:
+                self.secondary.add_texts(
+                    [row["text"] for row in text_rows], ids=[row["id"] for row in text_rows],
+                    metadatas=[row.get("metadata") for row in text_rows],
+                )
+                replayed += len(text_rows)
+            except Exception as e:
+                self._record_missed(text_rows, e)
+        return replayed
+
+    def create_or_load_vectorstore(self, documents=None):
+        self.primary.create_or_load_vectorstore(documents)
+        self.secondary.create_or_load_vectorstore(documents)
+        return self
+
+    # Reads
+
+    def query(self, text: str, top_k: int, filters: Optional[dict] = None):
+        return self.primary.query(text, top_k, filters)
+
+    async def aquery(self, text: str, top_k: int, filters: Optional[dict] = None):
+        return await self.primary.aquery(text, top_k, filters)
+
+    def search(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        return self.primary.search(text, top_k, filters)
+
+    async def asearch(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        return await self.primary.asearch(text, top_k, filters)
+
+    def search_many(self, texts: List[str], top_k: int, filters: Optional[dict] = None) -> List[List[dict]]:
+        return self.primary.search_many(texts, top_k, filters)
+
+    async def asearch_many(self, texts: List[str], top_k: int, filters: Optional[dict] = None) -> List[List[dict]]:
+        return await self.primary.asearch_many(texts, top_k, filters)
+
+    def count(self) -> int:
+        return self.primary.count()
+
+    def iter_vectors(self, page_size: int = 1000):
+        return self.primary.iter_vectors(page_size)
+
+    def search_by_vector(self, vector, top_k: int) -> List[dict]:
+        return self.primary.search_by_vector(vector, top_k)
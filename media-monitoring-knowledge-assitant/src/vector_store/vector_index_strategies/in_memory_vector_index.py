@@ -0,0 +1,279 @@
+import json
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from vector_store.vector_index_strategies.base import VectorIndexStrategy, embedding_model_name
+
+
+class InMemoryVectorIndex(VectorIndexStrategy):
+    """
+    Exact cosine search over a numpy matrix, for local runs, tests and evaluation.
+
+    `embeddings` is any LangChain `Embeddings`. Vectors are stored normalized, so a
+    batch of queries is scored with a single matrix multiply. With `path` set, each
+    insert is appended to a log next to the saved snapshot before it returns, which
+    keeps the index in step with the ingest manifest at a cost proportional to the
+    batch. The log is folded into a new snapshot once it holds half as many rows as
+    the index, so the total write cost stays linear, and both are reloaded on
+    first use. Without `path` the index lives only in this process.
+    """
+
+    # The log is never compacted below this many rows
+    min_log_rows = 1024
+
+    def __init__(self, embeddings, path: Optional[str] = None):
+        self._embeddings = embeddings
+        self.embedding_model = embedding_model_name(embeddings)
+        self.path = Path(path) if path else None
+        self.table_name = f"in_memory:{self.path or 'ephemeral'}"
+        self._matrix = None
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Optional[dict]] = []
+        self._positions = {}
+        self._log_rows = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ids)
+
+    def connect(self) -> None:
+        self._load()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path is not None and (self.path / "vectors.npy").exists():
+                self._matrix = np.load(self.path / "vectors.npy")
+                rows = json.loads((self.path / "rows.json").read_text(encoding="utf-8"))
+                self._ids = [row["id"] for row in rows]
+                self._texts = [row["text"] for row in rows]
+                self._metadatas = [row["metadata"] for row in rows]
+                self._positions = {row_id: i for i, row_id in enumerate(self._ids)}
+            if self.path is not None:
+                self._replay_log()
+            self._loaded = True
+
+    def _replay_log(self):
+        """Apply the rows appended since the snapshot; a row whose vector was not fully written is dropped"""
+        rows_path, vectors_path = self.path / "rows.log.jsonl", self.path / "vectors.log"
+        if not rows_path.exists() or not vectors_path.exists():
+            return
+        raw = np.fromfile(vectors_path, dtype=np.float32)
+        rows, offset = [], 0
+        with open(rows_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break
+                if offset + row["dimension"] > len(raw):
+                    break
+                rows.append(row)
+                offset += row["dimension"]
+        if not rows:
+            return
+        vectors = raw[:offset].reshape(len(rows), rows[0]["dimension"])
+        self._apply([row["id"] for row in rows], [row["text"] for row in rows],
+                    [row["metadata"] for row in rows], vectors)
+        self._log_rows = len(rows)
+
+    def _append_log(self, ids: List[str], texts: List[str], metadatas: List[Optional[dict]], vectors: np.ndarray):
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Vectors first: a row line is only written once its vector is on disk
+        with open(self.path / "vectors.log", "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.path / "rows.log.jsonl", "a", encoding="utf-8") as f:
+            for row_id, text, metadata in zip(ids, texts, metadatas):
+                f.write(json.dumps(
+                    {"id": row_id, "text": text, "metadata": metadata, "dimension": vectors.shape[1]}
+                ) + "\n")
+        self._log_rows += len(ids)
+
+    def _save(self):
+        """Write a snapshot of the whole index, then drop the log it replaces"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        rows = [
+            {"id": row_id, "text": text, "metadata": metadata}
+            for row_id, text, metadata in zip(self._ids, self._texts, self._metadatas)
+        ]
+        np.save(self.path / "vectors.tmp.npy", self._matrix)
+        (self.path / "rows.tmp.json").write_text(json.dumps(rows), encoding="utf-8")
+        (self.path / "vectors.tmp.npy").replace(self.path / "vectors.npy")
+        (self.path / "rows.tmp.json").replace(self.path / "rows.json")
+        # Replaying a log the snapshot already holds is harmless, so a crash here loses nothing
+        (self.path / "rows.log.jsonl").unlink(missing_ok=True)
+        (self.path / "vectors.log").unlink(missing_ok=True)
+        self._log_rows = 0
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def add_texts(self, texts: List[str], ids: List[str], metadatas: List[dict] = None) -> List[str]:
+        """Insert texts under caller-chosen ids; an existing id is overwritten in place"""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas else [None] * len(texts)
+        vectors = self._normalize(self._embeddings.embed_documents(texts))
+        self._upsert(list(ids), texts, metadatas, vectors)
+        return list(ids)
+
+    def add_vectors(self, rows: List[dict]) -> int:
+        if not rows:
+            return 0
+        vectors = self._normalize([row["vector"] for row in rows])
+        self._upsert(
+            [row["id"] for row in rows], [row["text"] for row in rows], [row.get("metadata") for row in rows], vectors,
+        )
+        return len(rows)
+
+    def _upsert(self, ids: List[str], texts: List[str], metadatas: List[Optional[dict]], vectors: np.ndarray):
+        self._load()
+        with self._lock:
+            self._apply(ids, texts, metadatas, vectors)
+            if self.path is not None:
+                self._append_log(ids, texts, metadatas, vectors)
+                if self._log_rows > max(self.min_log_rows, len(self._ids) // 2):
+                    self._save()
+
+    def _apply(self, ids: List[str], texts: List[str], metadatas: List[Optional[dict]], vectors: np.ndarray):
+        with self._lock:
+            new_rows = []
+            for row_id, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                position = self._positions.get(row_id)
+                if position is None:
+                    self._positions[row_id] = len(self._ids) + len(new_rows)
+                    new_rows.append(vector)
+                    self._ids.append(row_id)
+                    self._texts.append(text)
+                    self._metadatas.append(metadata)
+                else:
+                    self._matrix[position] = vector
+                    self._texts[position] = text
+                    self._metadatas[position] = metadata
+            if new_rows:
+                stacked = np.vstack(new_rows)
+                self._matrix = stacked if self._matrix is None else np.vstack([self._matrix, stacked])
+
+    def count(self) -> int:
+        return len(self)
+
+    def dimension(self) -> Optional[int]:
+        self._load()
+        return None if self._matrix is None else int(self._matrix.shape[1])
+
+    def iter_vectors(self, page_size: int = 1000):
+        self._load()
+        with self._lock:
+            matrix, ids, texts, metadatas = self._matrix, list(self._ids), self._texts, self._metadatas
+        for start in range(0, len(ids), page_size):
+            yield [
+                {"id": ids[i], "text": texts[i], "vector": matrix[i].tolist(), "metadata": metadatas[i]}
+                for i in range(start, min(start + page_size, len(ids)))
+            ]
+
+    def search_by_vector(self, vector, top_k: int) -> List[dict]:
+        self._load()
+        with self._lock:
+            if self._matrix is None or not len(self._ids):
+                return []
+            matrix, ids = self._matrix, self._ids
+        scores = matrix @ self._normalize([vector])[0]
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [{"id": ids[i], "score": float(scores[i])} for i in top[np.argsort(-scores[top])]]
+
+    def create_or_load_vectorstore(self, documents=None):
+        if documents:
+            texts = [document.page_content for document in documents]
+            ids = [getattr(document, "id", None) or str(len(self) + i) for i, document in enumerate(documents)]
+            self.add_texts(texts, ids, [document.metadata for document in documents])
+        return self
+
+    def query(self, text: str, top_k: int, filters: Optional[dict] = None) -> str:
+        """No LLM is attached to this backend: returns the matching passages themselves"""
+        return "\n\n".join(match["content"] for match in self.search(text, top_k, filters))
+
+    def search(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        return self.search_many([text], top_k, filters)[0]
+
+    @staticmethod
+    def _matches(metadata: Optional[dict], filters: dict) -> bool:
+        metadata = metadata or {}
+        for key, accepted in filters.items():
+            value = metadata.get(key)
+            if isinstance(accepted, (list, tuple, set)):
+                if value not in accepted:
+                    return False
+            elif value != accepted:
+                return False
+        return True
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query embeddings, as `embed_query` makes them, in one call where the model allows it"""
+        if len(texts) == 1:
+            return [self._embeddings.embed_query(texts[0])]
+        try:
+            # Gemini embeds a batch as queries when asked for the retrieval-query task
+            return self._embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+        except TypeError:
+            return [self._embeddings.embed_query(text) for text in texts]
+
+    def search_many(self, texts: List[str], top_k: int, filters: Optional[dict] = None) -> List[List[dict]]:
+        """One embedding call and one matrix multiply for the whole batch"""
+        texts = list(texts)
+        if not texts:
+            return []
+        self._load()
+        queries = self._normalize(self._embed_queries(texts))
+        with self._lock:
+            if self._matrix is None or not len(self._ids):
+                return [[] for _ in texts]
+            if queries.shape[1] != self._matrix.shape[1]:
+                raise RuntimeError(
+                    f"{self.embedding_model} embeds queries in {queries.shape[1]} dimensions but this index "
+                    f"holds {self._matrix.shape[1]}-dimensional vectors; they came from another model"
+                )
+            # Inserts only append to the lists and swap in a new matrix, so these rows stay valid
+            matrix, contents, metadatas = self._matrix, self._texts, self._metadatas
+
+        rows = np.arange(matrix.shape[0])
+        if filters:
+            # Filter first so only the matching rows are scored
+            rows = np.fromiter((i for i in rows if self._matches(metadatas[i], filters)), dtype=np.intp)
+            if not len(rows):
+                return [[] for _ in texts]
+            matrix = matrix[rows]
+
+        scores = queries @ matrix.T
+        k = min(top_k, scores.shape[1])
+        # argpartition finds the top k in linear time; only those k are sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[row, candidates])]
+            results.append([
+                {
+                    "content": contents[rows[i]],
+                    "score": min(max(float(scores[row, i]), 0.0), 1.0),
+                    "metadata": metadatas[rows[i]] or None,
+                }
+                for i in ranked
+            ])
+        return results
@@ -0,0 +1,172 @@
+from typing import List, Optional
+
+from vector_store.vector_index_strategies.base import VectorIndexStrategy, embedding_model_name
+
+# The Query-Agent keeps each client in its own `client-<id>` namespace
+ALL_NAMESPACES = "*"
+
+
+class PineconeVectorIndex(VectorIndexStrategy):
+    """
+    A Pinecone namespace, laid out as the Query-Agent uploader writes it with lean
+    payloads off (chunk text in the `chunk_text` metadata field). It is here so the Query-Agent index can be
+    exported to or loaded from the other backends; text search needs `embeddings`
+    from the same model that produced the stored vectors.
+
+    With `namespace="*"` it covers every namespace the index reports: rows read
+    from it carry their `namespace`, writes go back to that namespace, and queries
+    merge the best matches of all of them.
+    """
+
+    # Pinecone caps upserts at 1000 vectors / 2 MB and fetches at 1000 ids per request
+    upsert_batch = 100
+    fetch_batch = 100
+
+    def __init__(self, api_key: str, index_name: str = None, host: str = None, namespace: str = "",
+                 embeddings=None, text_key: str = "chunk_text", embedding_model: str = None):
+        self._api_key = api_key
+        self._index_name = index_name
+        self._host = host
+        self.namespace = namespace or ""
+        self._embeddings = embeddings
+        # Without an embedder this names the model the stored vectors came from
+        self.embedding_model = embedding_model_name(embeddings) if embeddings is not None else embedding_model
+        self.text_key = text_key
+        self.table_name = f"pinecone:{index_name or host}/{self.namespace}"
+        self._index = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._index is not None
+
+    def _open(self):
+        if self._index is None:
+            from pinecone import Pinecone
+
+            client = Pinecone(api_key=self._api_key)
+            self._index = client.Index(host=self._host) if self._host else client.Index(self._index_name)
+        return self._index
+
+    def connect(self) -> None:
+        self._open()
+
+    def create_or_load_vectorstore(self, documents=None):
+        self._open()
+        return self
+
+    def _to_row(self, vector_id: str, values, metadata: Optional[dict]) -> dict:
+        metadata = dict(metadata or {})
+        if self.text_key not in metadata:
+            # Uploaded with the Query-Agent's LEAN_VECTOR_PAYLOADS: the text is in its local chunk store
+            raise ValueError(f"Pinecone vector {vector_id!r} has no {self.text_key!r} metadata; "
+                             "re-upload it with LEAN_VECTOR_PAYLOADS=false to read it from here")
+        return {"id": vector_id, "text": metadata.pop(self.text_key), "vector": list(values), "metadata": metadata}
+
+    @property
+    def all_namespaces(self) -> bool:
+        return self.namespace == ALL_NAMESPACES
+
+    def namespaces(self) -> List[str]:
+        if not self.all_namespaces:
+            return [self.namespace]
+        return sorted(self._open().describe_index_stats().namespaces)
+
+    def count(self) -> int:
+        stats = self._open().describe_index_stats()
+        if self.all_namespaces:
+            return sum(namespace.vector_count for namespace in stats.namespaces.values())
+        namespace = stats.namespaces.get(self.namespace)
+        return namespace.vector_count if namespace else 0
+
+    def dimension(self) -> Optional[int]:
+        return self._open().describe_index_stats().dimension or None
+
+    def iter_vectors(self, page_size: int = 1000):
+        """List ids page by page, then fetch their vectors and metadata in bounded requests"""
+        index = self._open()
+        for namespace in self.namespaces():
+            token = None
+            while True:
+                listing = index.list_paginated(
+                    namespace=namespace, limit=min(page_size, 100), pagination_token=token
+                )
+                ids = [item.id for item in listing.vectors]
+                page = []
+                for start in range(0, len(ids), self.fetch_batch):
+                    fetched = index.fetch(ids=ids[start:start + self.fetch_batch], namespace=namespace).vectors
+                    for vector_id in ids[start:start + self.fetch_batch]:
+                        if vector_id in fetched:
+                            row = self._to_row(vector_id, fetched[vector_id].values, fetched[vector_id].metadata)
+                            if self.all_namespaces:
+                                row["namespace"] = namespace
+                            page.append(row)
+                if page:
+                    yield page
+                token = listing.pagination.next if listing.pagination else None
+                if not token:
+                    break
+
+    def add_vectors(self, rows: List[dict]) -> int:
+        index = self._open()
+        by_namespace = {}
+        for row in rows:
+            # Rows exported from every namespace go back to their own; others to the default one
+            namespace = row.get("namespace", "") if self.all_namespaces else self.namespace
+            by_namespace.setdefault(namespace or "", []).append(row)
+        for namespace, namespace_rows in by_namespace.items():
+            for start in range(0, len(namespace_rows), self.upsert_batch):
+                vectors = []
+                for row in namespace_rows[start:start + self.upsert_batch]:
+                    metadata = {**(row.get("metadata") or {}), self.text_key: row["text"]}
+                    # Pinecone rejects null metadata values
+                    metadata = {key: value for key, value in metadata.items() if value is not None}
+                    vectors.append({"id": row["id"], "values": list(row["vector"]), "metadata": metadata})
+                index.upsert(vectors=vectors, namespace=namespace)
+        return len(rows)
+
+    def add_texts(self, texts: List[str], ids: List[str], metadatas: List[dict] = None) -> List[str]:
+        vectors = self._require_embeddings().embed_documents(list(texts))
+        metadatas = metadatas or [None] * len(texts)
+        self.add_vectors([
+            {"id": row_id, "text": text, "vector": vector, "metadata": metadata}
+            for row_id, text, vector, metadata in zip(ids, texts, vectors, metadatas)
+        ])
+        return list(ids)
+
+    def _query(self, **query) -> list:
+        """Matches from every covered namespace, best first, cut to `top_k`"""
+        index = self._open()
+        matches = []
+        for namespace in self.namespaces():
+            matches.extend(index.query(**query, namespace=namespace).matches)
+        return sorted(matches, key=lambda match: match.score, reverse=True)[:query["top_k"]]
+
+    def search_by_vector(self, vector, top_k: int) -> List[dict]:
+        return [{"id": match.id, "score": float(match.score)} for match in self._query(vector=list(vector), top_k=top_k)]
+
+    def _require_embeddings(self):
+        if self._embeddings is None:
+            raise ValueError("This Pinecone index has no embeddings configured; only vector operations are available")
+        return self._embeddings
+
+    def search(self, text: str, top_k: int, filters: Optional[dict] = None) -> List[dict]:
+        vector = self._require_embeddings().embed_query(text)
+        query = {"vector": vector, "top_k": top_k, "include_metadata": True}
+        if filters:
+            query["filter"] = {
+                key: {"$in": list(value)} if isinstance(value, (list, tuple, set)) else {"$eq": value}
+                for key, value in filters.items()
+            }
+        matches = []
+        for match in self._query(**query):
+            row = self._to_row(match.id, [], match.metadata)
+            matches.append({
+                "content": row["text"],
+                "score": min(max(float(match.score), 0.0), 1.0),
+                "metadata": row["metadata"] or None,
+            })
+        return matches
+
+    def query(self, text: str, top_k: int, filters: Optional[dict] = None) -> str:
+        """No LLM is attached to this backend: returns the matching passages themselves"""
+        return "\n\n".join(match["content"] for match in self.search(text, top_k, filters))
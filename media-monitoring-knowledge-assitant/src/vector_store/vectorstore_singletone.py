@@ -1,35 +1,143 @@
 from core.base.singletone import SingletonBase
-from document_strategies.base import DocumentLoaderStrategy
-from vector_index_strategies.base import VectorIndexStrategy
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from document_strategies.local_documents_loader import LocalDocumentsLoader
-from config.settings import BASE_DIR
-from vector_index_strategies.astradb_vector_index import AstraDBVectorIndex
-from config.settings import ASTRA_DB_APPLICATION_TOKEN, ASTRA_DB_API_ENDPOINT, ASTRA_DB_COLLECTION_NAME
+from core.base.registry import registry
+from config.settings import BASE_DIR, IN_MEMORY_INDEX_PATH, VECTOR_INDEX_BACKEND
+from config.settings import DUAL_WRITE_MISSED_PATH, DUAL_WRITE_PRIMARY, DUAL_WRITE_SECONDARY
+from config.settings import PINECONE_API_KEY, PINECONE_HOST, PINECONE_INDEX_NAME, PINECONE_NAMESPACE
+from config.settings import ASTRA_DB_APPLICATION_TOKEN, ASTRA_DB_API_ENDPOINT, ASTRA_DB_COLLECTION_NAME, ASTRA_DB_ID, GEMINI_API_KEY
 
+EMBEDDINGS = "embeddings"
+DOCUMENT_LOADER = "document_loader"
+ASTRA_VECTOR_INDEX = "astra_vector_index"
+IN_MEMORY_VECTOR_INDEX = "in_memory_vector_index"
+PINECONE_VECTOR_INDEX = "pinecone_vector_index"
+DUAL_WRITE_VECTOR_INDEX = "dual_write_vector_index"
+VECTOR_INDEX = "vector_index"
 
-class VectorstoreSingletone(SingletonBase):
 
-    def __init__(
-        self, embeddings_model,
-        document_loader_strategy:DocumentLoaderStrategy, 
-        vector_store:VectorIndexStrategy
-        ):
-       self._embeddings_model = embeddings_model
-       self._vector_store = vector_store
-       
-    def _build_vector_store():
-        pass
-    def query(self, text:str, topk:int):
-       return self._vector_store.query(text,topk) 
-
-vector_store = VectorstoreSingletone(
-    embeddings_model=GoogleGenerativeAIEmbeddings("models/gemini-embedding-001"),
-    document_loader_strategy=LocalDocumentsLoader(folder_path=f"{BASE_DIR}/knowledge_base"),
-    vector_store=AstraDBVectorIndex(
+# Factories run on first use, so importing this module makes no network calls
+def _build_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from vector_store.governed_models import GovernedEmbeddings
+    return GovernedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001", google_api_key=GEMINI_API_KEY)
+    )
+
+def _build_document_loader():
+    from vector_store.document_strategies.local_documents_loader import LocalDocumentsLoader
+    return LocalDocumentsLoader(folder_path=f"{BASE_DIR}/knowledge_base")
+
+def _build_astra_vector_index():
+    from vector_store.vector_index_strategies.astradb_vector_index import AstraDBVectorIndex
+    return AstraDBVectorIndex(
         ASTRA_DB_APPLICATION_TOKEN,
         ASTRA_DB_API_ENDPOINT,
         ASTRA_DB_COLLECTION_NAME,
-        GoogleGenerativeAIEmbeddings("models/gemini-embedding-001")
+        ASTRA_DB_ID,
+        GEMINI_API_KEY,
+    )
+
+def _build_in_memory_vector_index():
+    from vector_store.vector_index_strategies.in_memory_vector_index import InMemoryVectorIndex
+    return InMemoryVectorIndex(registry.get(EMBEDDINGS), path=IN_MEMORY_INDEX_PATH or None)
+
+# The Query-Agent's Pinecone index holds MiniLM vectors, so it has no embedder here:
+# it is a migration source or target, not a backend the API serves
+def _build_pinecone_vector_index():
+    from vector_store.vector_index_strategies.pinecone_vector_index import PineconeVectorIndex
+    return PineconeVectorIndex(
+        PINECONE_API_KEY, PINECONE_INDEX_NAME, host=PINECONE_HOST, namespace=PINECONE_NAMESPACE,
+        embedding_model="all-MiniLM-L6-v2",
     )
-)
\ No newline at end of file
+
+def _build_dual_write_vector_index():
+    from vector_store.vector_index_strategies.dual_write_vector_index import DualWriteVectorIndex
+    if "dual" in (DUAL_WRITE_PRIMARY, DUAL_WRITE_SECONDARY) or DUAL_WRITE_PRIMARY == DUAL_WRITE_SECONDARY:
+        raise ValueError("DUAL_WRITE_PRIMARY and DUAL_WRITE_SECONDARY must name two different concrete backends")
+    return DualWriteVectorIndex(
+        get_vector_index(DUAL_WRITE_PRIMARY), get_vector_index(DUAL_WRITE_SECONDARY), DUAL_WRITE_MISSED_PATH,
+    )
+
+BACKENDS = {
+    "astra": ASTRA_VECTOR_INDEX,
+    "memory": IN_MEMORY_VECTOR_INDEX,
+    "pinecone": PINECONE_VECTOR_INDEX,
+    "dual": DUAL_WRITE_VECTOR_INDEX,
+}
+
+def get_vector_index(backend: str):
+    """A vector index by backend name (`astra`, `memory`, `pinecone` or `dual`)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector index backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    return registry.get(BACKENDS[backend])
+
+# The index the API serves, picked by VECTOR_INDEX_BACKEND ("astra", "memory", or "dual"
+# to write to DUAL_WRITE_PRIMARY and DUAL_WRITE_SECONDARY while reading from the primary)
+def _build_vector_index():
+    if VECTOR_INDEX_BACKEND not in ("astra", "memory", "dual"):
+        raise ValueError(f"Unknown VECTOR_INDEX_BACKEND {VECTOR_INDEX_BACKEND!r}; expected astra, memory or dual")
+    return get_vector_index(VECTOR_INDEX_BACKEND)
+
+registry.register(EMBEDDINGS, _build_embeddings)
+registry.register(DOCUMENT_LOADER, _build_document_loader, fork_safe=True)
+registry.register(ASTRA_VECTOR_INDEX, _build_astra_vector_index)
+registry.register(IN_MEMORY_VECTOR_INDEX, _build_in_memory_vector_index)
+registry.register(PINECONE_VECTOR_INDEX, _build_pinecone_vector_index)
+registry.register(DUAL_WRITE_VECTOR_INDEX, _build_dual_write_vector_index)
+registry.register(VECTOR_INDEX, _build_vector_index)
+
+
+class VectorstoreSingletone(SingletonBase):
+    """Facade over the registry's vector store; resources are resolved by name on each call"""
+
+    def __init__(
+        self, embeddings_name: str = EMBEDDINGS,
+        document_loader_name: str = DOCUMENT_LOADER,
+        vector_store_name: str = VECTOR_INDEX,
+        ):
+       self._embeddings_name = embeddings_name
+       self._document_loader_name = document_loader_name
+       self._vector_store_name = vector_store_name
+
+    @property
+    def embeddings_model(self):
+        return registry.get(self._embeddings_name)
+
+    @property
+    def document_loader(self):
+        return registry.get(self._document_loader_name)
+
+    @property
+    def vector_store(self):
+        return registry.get(self._vector_store_name)
+
+    @property
+    def is_open(self) -> bool:
+        return registry.is_ready(self._vector_store_name) and self.vector_store.is_open
+
+    def warm_up(self):
+        """Build the embedder and connect the vector store before taking traffic"""
+        registry.warm_up(self._embeddings_name, self._vector_store_name)
+        self.vector_store.connect()
+
+    def query(self, text:str, topk:int, filters:dict=None):
+       return self.vector_store.query(text, topk, filters)
+
+    async def aquery(self, text:str, topk:int, filters:dict=None):
+       store = await registry.aget(self._vector_store_name)
+       return await store.aquery(text, topk, filters)
+
+    def search(self, text:str, topk:int, filters:dict=None):
+       return self.vector_store.search(text, topk, filters)
+
+    async def asearch(self, text:str, topk:int, filters:dict=None):
+       store = await registry.aget(self._vector_store_name)
+       return await store.asearch(text, topk, filters)
+
+    def search_many(self, texts:list, topk:int, filters:dict=None):
+       return self.vector_store.search_many(texts, topk, filters)
+
+    async def asearch_many(self, texts:list, topk:int, filters:dict=None):
+       store = await registry.aget(self._vector_store_name)
+       return await store.asearch_many(texts, topk, filters)
+
+vector_store = VectorstoreSingletone()
\ No newline at end of file